@@ -0,0 +1,215 @@
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from archivos import escribir_atomico
+from cache_resultados import huella
+from conexion import BACKENDS, libsumo
+from controladores import (COLA_BASE, COLA_MAXIMO, COLA_POR_AUTO, CONTROLADORES, GAP_OUT_MINIMO, IA_BASE, IA_MAXIMO,
+                           IA_POR_AUTO, MAX_PRESION_INTERVALO, TIEMPO_VERDE_FIJO)
+from escenario import ARCHIVO_RED, PERFILES, ejecutar_escenario
+from estadistica import METRICAS
+from motor_semaforos import TIEMPO_AMARILLO
+from pool_sumo import PoolSumo, calentar, trabajador_actual
+from tripinfo import leer_tripinfo
+
+# --- AJUSTE DE CONSTANTES DEL CONTROLADOR (SUCCESSIVE HALVING) ---
+# Se sortean configuraciones del espacio de búsqueda y se evalúan con horizontes cortos;
+# en cada ronda solo sigue el mejor 1/eta, con un horizonte eta veces más largo.
+# Cada evaluación (parámetros, semilla, perfil, horizonte, red) se guarda en disco:
+# repetir un ajuste o ampliarlo no vuelve a simular lo ya medido.
+
+DIRECTORIO_CACHE = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "ajuste")
+HORIZONTES = (750, 1500, 3000)
+ETA = 3
+# libsumo (sin socket) si está instalado; si no, traci
+BACKEND = "libsumo" if libsumo else "traci"
+
+# Valores candidatos por constante, en las unidades de cada controlador
+# (segundos del controlador, salvo "minimo" y "amarillo" que van en pasos)
+ESPACIOS = {
+    "fijo": {
+        "verde": (15, 20, 25, 30, 35, 40, 45, 50, 60),
+        "amarillo": (30, 40, 50),
+    },
+    "cola": {
+        "base": (4, 6, 8, 10, 12, 15),
+        "por_auto": (1.0, 1.5, 2.0, 3.0, 4.0),
+        "maximo": (30, 40, 50, 60, 90),
+        "amarillo": (30, 40, 50),
+    },
+    "ia": {
+        "base": (4, 6, 8, 10, 12),
+        "por_auto": (1.0, 1.5, 2.0, 2.5, 3.0),
+        "maximo": (30, 40, 50, 60, 75),
+        "minimo": (30, 50, 75, 100, 150),
+        "amarillo": (30, 40, 50),
+    },
+    "max_presion": {
+        "intervalo": (4, 6, 8, 10, 15, 20),
+        "amarillo": (30, 40, 50),
+    },
+}
+# Valores actuales (siempre se evalúan como referencia): los de controladores.py y motor_semaforos.py
+VALORES_ACTUALES = {
+    "fijo": {"verde": TIEMPO_VERDE_FIJO, "amarillo": TIEMPO_AMARILLO},
+    "cola": {"base": COLA_BASE, "por_auto": COLA_POR_AUTO, "maximo": COLA_MAXIMO, "amarillo": TIEMPO_AMARILLO},
+    "ia": {"base": IA_BASE, "por_auto": IA_POR_AUTO, "maximo": IA_MAXIMO, "minimo": GAP_OUT_MINIMO,
+           "amarillo": TIEMPO_AMARILLO},
+    "max_presion": {"intervalo": MAX_PRESION_INTERVALO, "amarillo": TIEMPO_AMARILLO},
+}
+
+
+def muestrear(modo, n, semilla=0):
+    # n configuraciones distintas del espacio (la actual primero), sin reemplazo
+    espacio = ESPACIOS[modo]
+    nombres = list(espacio)
+    actual = tuple(VALORES_ACTUALES[modo][k] for k in nombres)
+    todas = [c for c in itertools.product(*(espacio[k] for k in nombres)) if c != actual]
+    rng = np.random.default_rng(semilla)
+    elegidas = rng.choice(len(todas), size=min(max(n - 1, 0), len(todas)), replace=False)
+    return [dict(zip(nombres, c)) for c in [actual] + [todas[i] for i in sorted(elegidas)]]
+
+
+# --- EVALUACIÓN CON MEMORIA EN DISCO ---
+def clave_evaluacion(modo, parametros, semilla, perfil, pasos, red_hash, metrica, calentamiento=0):
+    contenido = json.dumps([modo, sorted(parametros.items()), semilla, perfil, pasos, red_hash, metrica, calentamiento])
+    return hashlib.blake2b(contenido.encode(), digest_size=20).hexdigest()
+
+
+def _ruta_cache(clave, directorio):
+    return os.path.join(directorio, f"{clave}.json")
+
+
+def _evaluar(trabajo):
+    # En un proceso del pool: simula, resume la métrica y borra el tripinfo
+    with tempfile.TemporaryDirectory() as tmp:
+        archivo = os.path.join(tmp, "tripinfo.xml")
+        resultado = ejecutar_escenario(
+            trabajo["modo"], trabajo["perfil"], trabajo["semilla"], archivo,
+            pasos=trabajo["pasos"], label=f"ajuste-{trabajo['clave'][:12]}", backend=trabajo["backend"],
+            parametros=trabajo["parametros"], calentamiento=trabajo["calentamiento"],
+            # Los viajes sin terminar también cuentan: un controlador que deja calles
+            # esperando no debe verse bien en horizontes cortos
+            opciones_sumo=["--tripinfo-output.write-unfinished", "true"], trabajador=trabajador_actual(),
+        )
+        df = leer_tripinfo(archivo)
+    evaluacion = {
+        "valor": float(df[trabajo["metrica"]].mean()) if len(df) else float("inf"),
+        "viajes": int(len(df)),
+        "fallidos": resultado.get("fallidos", 0),
+    }
+    escribir_atomico(trabajo["ruta"], lambda f: json.dump(evaluacion, f), "w")
+    return evaluacion
+
+
+def evaluar(pool, modo, configuraciones, semillas, perfil, pasos, metrica="timeLoss", backend=BACKEND,
+            directorio=DIRECTORIO_CACHE, calentamiento=0):
+    # Matriz (configuración × semilla) de la métrica; solo se simula lo que no está en caché
+    red_hash = huella(ARCHIVO_RED)
+    if calentamiento:
+        # Un calentamiento por semilla antes de repartir las variantes (no uno por proceso)
+        for _, _, error in pool.mapear([(perfil, s, pasos, calentamiento, "fijo", backend) for s in semillas], calentar):
+            if error is not None:
+                raise error
+    valores = np.empty((len(configuraciones), len(semillas)))
+    pendientes = []
+    simuladas = 0
+    for i, parametros in enumerate(configuraciones):
+        for j, semilla in enumerate(semillas):
+            clave = clave_evaluacion(modo, parametros, semilla, perfil, pasos, red_hash, metrica, calentamiento)
+            ruta = _ruta_cache(clave, directorio)
+            if os.path.exists(ruta):
+                with open(ruta) as f:
+                    valores[i, j] = json.load(f)["valor"]
+                continue
+            trabajo = {"modo": modo, "parametros": parametros, "semilla": semilla, "perfil": perfil,
+                       "pasos": pasos, "metrica": metrica, "backend": backend, "clave": clave, "ruta": ruta,
+                       "calentamiento": calentamiento}
+            trabajo["celda"] = (i, j)
+            pendientes.append(trabajo)
+    for trabajo, evaluacion, error in pool.mapear(pendientes, _evaluar):
+        if error is not None:
+            raise error
+        valores[trabajo["celda"]] = evaluacion["valor"]
+        simuladas += 1
+    return valores, simuladas
+
+
+def successive_halving(modo, configuraciones=27, semillas=(1, 2, 3), perfil="pulsos", horizontes=HORIZONTES,
+                       eta=ETA, metrica="timeLoss", procesos=None, backend=BACKEND, semilla_muestreo=0,
+                       directorio=DIRECTORIO_CACHE, verbose=True, calentamiento=0):
+    # Con calentamiento, todas las configuraciones parten del mismo estado guardado por semilla
+    # y los horizontes cuentan desde el inicio de la simulación
+    vivas = muestrear(modo, configuraciones, semilla_muestreo)
+    rondas = []
+    with PoolSumo(procesos, backend) as pool:
+        for ronda, pasos in enumerate(horizontes):
+            inicio = time.perf_counter()
+            valores, simuladas = evaluar(pool, modo, vivas, semillas, perfil, pasos, metrica, backend, directorio,
+                                         calentamiento)
+            media = valores.mean(axis=1)
+            orden = np.argsort(media, kind="stable")
+            for posicion, i in enumerate(orden):
+                rondas.append({"ronda": ronda, "pasos": pasos, "posicion": posicion + 1,
+                               metrica: media[i], "desvio": valores[i].std(), **vivas[i]})
+            if verbose:
+                print(f"🔁 Ronda {ronda + 1}/{len(horizontes)} | {pasos} pasos | {len(vivas)} configuraciones | "
+                      f"{simuladas} simuladas ({len(vivas) * len(semillas) - simuladas} en caché) | "
+                      f"{time.perf_counter() - inicio:.1f}s")
+                sys.stdout.flush()
+            if ronda < len(horizontes) - 1:
+                # Solo sigue el mejor 1/eta
+                vivas = [vivas[i] for i in orden[:max(1, len(vivas) // eta)]]
+    return pd.DataFrame(rondas)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ajusta las constantes de un controlador con successive halving.")
+    parser.add_argument("--modo", default="ia", choices=list(CONTROLADORES))
+    parser.add_argument("--perfil", default="pulsos", choices=PERFILES)
+    parser.add_argument("--configuraciones", type=int, default=27)
+    parser.add_argument("--semillas", nargs="+", type=int, default=[1, 2, 3])
+    parser.add_argument("--horizontes", nargs="+", type=int, default=list(HORIZONTES),
+                        help="Pasos simulados en cada ronda (crecientes)")
+    parser.add_argument("--eta", type=int, default=ETA, help="En cada ronda sigue el mejor 1/eta")
+    parser.add_argument("--metrica", default="timeLoss", choices=METRICAS, help="Se minimiza su media")
+    parser.add_argument("--procesos", type=int, default=None)
+    parser.add_argument("--backend", default=BACKEND, choices=BACKENDS)
+    parser.add_argument("--semilla-muestreo", type=int, default=0)
+    parser.add_argument("--calentamiento", type=int, default=0,
+                        help="Pasos iniciales tomados de un estado guardado (común a todas las configuraciones)")
+    args = parser.parse_args(argv)
+
+    print(f"🎛️ AJUSTE | {args.modo} | {args.perfil} | {args.configuraciones} configuraciones × "
+          f"{len(args.semillas)} semillas | horizontes {args.horizontes}")
+    inicio = time.perf_counter()
+    tabla = successive_halving(
+        args.modo, args.configuraciones, args.semillas, args.perfil, args.horizontes, args.eta,
+        args.metrica, args.procesos, args.backend, args.semilla_muestreo, calentamiento=args.calentamiento,
+    )
+    final = tabla[tabla["ronda"] == tabla["ronda"].max()]
+    with pd.option_context("display.width", 200, "display.max_columns", None):
+        print(final.drop(columns=["ronda"]).round(3).to_string(index=False))
+
+    parametros = list(ESPACIOS[args.modo])
+    # to_dict("records") conserva el tipo de cada columna (enteros como enteros)
+    mejor = final.iloc[:1].to_dict("records")[0]
+    es_actual = (tabla[parametros] == pd.Series(VALORES_ACTUALES[args.modo])).all(axis=1)
+    actual = tabla[es_actual].iloc[-1:].to_dict("records")[0]
+    print(f"🏆 Mejor: { {k: mejor[k] for k in parametros} } -> {args.metrica} {mejor[args.metrica]:.2f}")
+    print(f"📌 Actual: { {k: actual[k] for k in parametros} } -> {args.metrica} {actual[args.metrica]:.2f} "
+          f"(ronda {actual['ronda'] + 1}, {actual['pasos']} pasos)")
+    print(f"⏱️ {time.perf_counter() - inicio:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
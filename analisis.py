@@ -1,10 +1,16 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
 import plotly.graph_objects as go
-import xml.etree.ElementTree as ET
+import io
+
 import numpy as np
 
+from agregacion import serie_temporal
+from estadistica import cargar_corridas, comparar
+from graficos import caja_precalculada, histograma, linea_reducida
+from meandata import TIPOS as TIPOS_MEANDATA, leer_meandata, matriz, serie_red, tipo_meandata, total_por_calle
+from metricas_vivo import TABLAS, LectorVivo, listar_corridas
+
 # --- CONFIGURACIÓN DE PÁGINA ---
 st.set_page_config(
     page_title="Dashboard : Visualizacion de Datos Control de Tráfico",
@@ -69,28 +75,131 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # --- FUNCIONES ---
-def parse_sumo_xml(file):
+def parse_sumo_xml(files):
+    # Una o más corridas (semillas) del mismo escenario, parseadas en paralelo
+    # y guardadas en caché por contenido: re-ejecuciones sin volver a parsear
     try:
-        tree = ET.parse(file)
-        root = tree.getroot()
-        data = []
-        for trip in root.findall('tripinfo'):
-            data.append({
-                "id": trip.get('id'),
-                "waitingTime": float(trip.get('waitingTime')),
-                "timeLoss": float(trip.get('timeLoss')),
-                "duration": float(trip.get('duration'))
-            })
-        return pd.DataFrame(data)
+        corridas = cargar_corridas([io.BytesIO(f.getvalue()) for f in files])
+        return corridas, pd.concat(corridas, keys=range(len(corridas)), names=["corrida"]).reset_index(level=0)
     except Exception as e:
         st.error(f"Error al procesar XML: {e}")
-        return pd.DataFrame()
+        return [], pd.DataFrame()
+
+def parse_meandata(files):
+    # {tipo: [una tabla por corrida]}: tráfico o emisiones se reconoce por las columnas del archivo
+    tablas = {tipo: [] for tipo in TIPOS_MEANDATA}
+    for f in files or []:
+        try:
+            df = leer_meandata(io.BytesIO(f.getvalue()))
+        except Exception as e:
+            st.error(f"Error al procesar meandata ({f.name}): {e}")
+            continue
+        if not df.empty:
+            tablas[tipo_meandata(df)].append(df)
+    return tablas
+
+# --- MODO EN VIVO ---
+# Lee la base SQLite que publica el runner (--vivo) mientras la simulación corre.
+# Cada refresco pide solo las filas nuevas (cursor por rowid) y las agrega a lo ya leído.
+REFRESCO_VIVO = 0.5
+MAX_MUESTRAS_VIVO = 20000
+
+def _agregar(previo, nuevo):
+    if nuevo.empty:
+        return previo
+    combinado = nuevo if previo is None else pd.concat([previo, nuevo], ignore_index=True)
+    return combinado.tail(MAX_MUESTRAS_VIVO)
+
+@st.fragment(run_every=REFRESCO_VIVO)
+def panel_en_vivo(ruta, corrida):
+    clave = f"vivo:{ruta}:{corrida}"
+    if clave not in st.session_state:
+        st.session_state[clave] = {"lector": LectorVivo(ruta, corrida), **dict.fromkeys(TABLAS)}
+    estado = st.session_state[clave]
+    nuevas = estado["lector"].nuevas()
+    for tabla in TABLAS:
+        estado[tabla] = _agregar(estado[tabla], nuevas[tabla])
+
+    colas, fases, red = estado["colas"], estado["fases"], estado["red"]
+    if colas is None or red is None:
+        st.info("⏳ Esperando las primeras muestras de la corrida...")
+        return
+
+    semaforos = sorted(colas["semaforo"].unique())
+    semaforo = st.selectbox("Semáforo", semaforos, key=f"{clave}:semaforo") if len(semaforos) > 1 else semaforos[0]
+    propias = colas[colas["semaforo"] == semaforo]
+    ultimo = propias["paso"].iloc[-1]
+    actual = propias[propias["paso"] == ultimo]
+
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("⏱️ Paso", f"{ultimo}", "✅ terminada" if nuevas["terminada"] else "🔴 en curso", delta_color="off")
+    col2.metric("🚗 Cola total", f"{int(actual['detenidos'].sum())}")
+    col3.metric("🏁 Llegados", f"{int(red['llegados'].sum())}", f"+{int(red['insertados'].sum())} insertados",
+                delta_color="off")
+    if fases is not None and (fases["semaforo"] == semaforo).any():
+        ultima = fases[fases["semaforo"] == semaforo].iloc[-1]
+        verde = "—" if pd.isna(ultima["verde_s"]) else f"{ultima['verde_s']:.1f} s"
+        col4.metric("🚦 Fase actual", f"{int(ultima['fase'])}", f"verde asignado: {verde}", delta_color="off")
+
+    # Cola por calle de acceso (una línea por calle)
+    fig_colas = go.Figure()
+    colores = ["#00E5FF", "#ff2b2b", "#00ffbf", "#ffd000", "#b388ff", "#ff8a65"]
+    for k, (calle, serie) in enumerate(propias.groupby("calle", sort=True)):
+        fig_colas.add_trace(linea_reducida(serie["detenidos"], calle, colores[k % len(colores)], ancho=2, x=serie["paso"]))
+    fig_colas.update_layout(
+        template="plotly_dark", xaxis_title="Paso", yaxis_title="Vehículos detenidos",
+        legend=dict(orientation="h", y=1.1, x=0.5, xanchor="center"), font=dict(color="white"),
+        height=380, margin=dict(l=40, r=40, t=40, b=40),
+        paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)'
+    )
+    st.plotly_chart(fig_colas, use_container_width=True)
+
+    col_red, col_fases = st.columns([0.5, 0.5])
+    with col_red:
+        fig_red = go.Figure()
+        fig_red.add_trace(go.Bar(x=red["paso"], y=red["llegados"], name="Llegados", marker_color="#00ffbf"))
+        fig_red.add_trace(go.Bar(x=red["paso"], y=red["insertados"], name="Insertados", marker_color="#00E5FF"))
+        fig_red.update_layout(
+            barmode="group", template="plotly_dark", xaxis_title="Paso", yaxis_title="Vehículos por muestra",
+            legend=dict(orientation="h", y=1.15, font=dict(color="white")), font=dict(color="white"), height=320,
+            paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)'
+        )
+        st.plotly_chart(fig_red, use_container_width=True)
+    with col_fases:
+        st.markdown("#### 🧠 Últimas decisiones")
+        if fases is not None:
+            st.dataframe(fases[fases["semaforo"] == semaforo].tail(15).iloc[::-1], use_container_width=True,
+                         hide_index=True)
+
+vista = st.sidebar.radio("Vista", ["📁 Archivos XML", "📡 En vivo"], horizontal=True)
+if vista == "📡 En vivo":
+    st.sidebar.header("📡 Simulación en curso")
+    ruta_vivo = st.sidebar.text_input("Base de métricas (--vivo)", "resultados/vivo.db")
+    corridas_vivo = listar_corridas(ruta_vivo)
+    st.title("📡 Monitoreo en Vivo: Control de Tráfico")
+    if corridas_vivo.empty:
+        st.info(f"👋 No hay corridas en `{ruta_vivo}`. Lanza una con `python experimentos.py --vivo {ruta_vivo}` "
+                f"o `python main.py --vivo {ruta_vivo}`.")
+    else:
+        etiquetas = {
+            fila.id: f"#{fila.id} {fila.modo}/{fila.perfil}/s{fila.semilla} ({fila.creada})"
+                     + ("" if fila.terminada else " 🔴")
+            for fila in corridas_vivo.itertuples()
+        }
+        corrida = st.sidebar.selectbox("Corrida", list(etiquetas), format_func=etiquetas.get)
+        panel_en_vivo(ruta_vivo, corrida)
+    st.stop()
 
 # --- SIDEBAR ---
 st.sidebar.header("📂 Carga de Datos")
-st.sidebar.markdown("Sube los archivos `tripinfo.xml`:")
-file_static = st.sidebar.file_uploader("1. Escenario Fijo (Rojo)", type=["xml"])
-file_smart = st.sidebar.file_uploader("2. Escenario IA (Verde)", type=["xml"])
+st.sidebar.markdown("Sube los archivos `tripinfo.xml` o `.viajes` (una o más corridas por escenario):")
+file_static = st.sidebar.file_uploader("1. Escenario Fijo (Rojo)", type=["xml", "viajes"], accept_multiple_files=True)
+file_smart = st.sidebar.file_uploader("2. Escenario IA (Verde)", type=["xml", "viajes"], accept_multiple_files=True)
+remuestreos = st.sidebar.select_slider("Remuestreos bootstrap", options=[1000, 2000, 5000, 10000], value=10000)
+ventana = st.sidebar.select_slider("Ventana temporal (s)", options=[30, 60, 120, 300, 600], value=60)
+st.sidebar.markdown("Opcional: `.trafico.xml` y `.emisiones.xml` de las corridas con `--meandata`:")
+meandata_static = st.sidebar.file_uploader("3. Meandata Fijo", type=["xml"], accept_multiple_files=True)
+meandata_smart = st.sidebar.file_uploader("4. Meandata IA", type=["xml"], accept_multiple_files=True)
 
 # --- HEADER ---
 st.title("🚦 Análisis de Impacto: Control de Tráfico Adaptativo")
@@ -101,18 +210,17 @@ st.divider()
 
 if file_static and file_smart:
     # Procesamiento
-    df_static = parse_sumo_xml(file_static)
-    df_smart = parse_sumo_xml(file_smart)
+    corridas_static, df_static = parse_sumo_xml(file_static)
+    corridas_smart, df_smart = parse_sumo_xml(file_smart)
     
     if not df_static.empty and not df_smart.empty:
         # Etiquetas y orden
         df_static['Sistema'] = 'Fijo (Convencional)'
         df_smart['Sistema'] = 'IA (Propuesto)'
         
-        # Unir y ordenar por ID para gráficas temporales
-        df_static = df_static.sort_values(by="id").reset_index(drop=True)
-        df_smart = df_smart.sort_values(by="id").reset_index(drop=True)
-        df_combined = pd.concat([df_static, df_smart])
+        # Orden cronológico (salida numérica): el id es texto y "auto_E12_100" va antes que "auto_E12_5"
+        df_static = df_static.sort_values(by="depart", kind="stable").reset_index(drop=True)
+        df_smart = df_smart.sort_values(by="depart", kind="stable").reset_index(drop=True)
         
         # --- 1. KPIs (RESUMEN EJECUTIVO) ---
         col1, col2, col3, col4 = st.columns(4)
@@ -129,8 +237,9 @@ if file_static and file_smart:
         var_ia = df_smart['waitingTime'].var()
         delta_var = ((var_ia - var_fix) / var_fix) * 100
         
-        autos_fix = len(df_static)
-        autos_ia = len(df_smart)
+        # Vehículos por corrida (promedio si se subieron varias semillas)
+        autos_fix = round(len(df_static) / len(corridas_static))
+        autos_ia = round(len(df_smart) / len(corridas_smart))
         delta_autos = autos_ia - autos_fix
 
         col1.metric("⏳ Tiempo Espera (Promedio)", f"{wait_ia:.2f} s", f"{delta_wait:.1f}%", delta_color="inverse")
@@ -138,39 +247,42 @@ if file_static and file_smart:
         col3.metric("📊 Varianza (Estabilidad)", f"{var_ia:.0f}", f"{delta_var:.1f}%", delta_color="inverse")
         col4.metric("🚗 Flujo Vehicular", f"{autos_ia}", f"+{delta_autos} autos")
 
+        # --- 1b. COMPARACIÓN ESTADÍSTICA (IC BOOTSTRAP) ---
+        st.subheader("📐 Comparación Estadística (IC 95% Bootstrap)")
+        df_ic = comparar({"Fijo": corridas_static, "IA": corridas_smart}, "Fijo", remuestreos=remuestreos)
+        if (df_ic["Unidad"] == "viaje").any():
+            st.caption("⚠️ Con una sola corrida por escenario el bootstrap remuestrea viajes; sube varias semillas para un intervalo por corrida.")
+        st.dataframe(
+            df_ic.drop(columns=["Modo"]).set_index("Métrica").style.format(
+                {c: "{:.2f}" for c in df_ic.columns if c not in ("Métrica", "Modo", "Unidad", "n Ref.", "n", "p (Mann-Whitney)")}
+                | {"p (Mann-Whitney)": "{:.4f}"}
+            ),
+            use_container_width=True
+        )
+
         # --- 2. GRÁFICA DE EVOLUCIÓN (MEJORADA) ---
         st.subheader("📈 Tendencia de Congestión en el Tiempo")
         
-        # Suavizado (Media Móvil)
-        window_size = 50
-        df_static['SmoothWait'] = df_static['waitingTime'].rolling(window=window_size).mean()
-        df_smart['SmoothWait'] = df_smart['waitingTime'].rolling(window=window_size).mean()
-        
+        # Ventanas de tiempo por llegada (agregacion.py): media y p90 de espera, y flujo en veh/h
+        serie_fijo = serie_temporal(corridas_static, ventana)
+        serie_ia = serie_temporal(corridas_smart, ventana)
+
         fig_trend = go.Figure()
-        
-        # Línea Fijo (Rojo Brillante)
-        fig_trend.add_trace(go.Scatter(
-            y=df_static['SmoothWait'],
-            mode='lines',
-            name='Fijo (Convencional)',
-            line=dict(color='#ff2b2b', width=3), 
-            opacity=0.9
-        ))
-        
-        # Línea IA (Verde Neón)
-        fig_trend.add_trace(go.Scatter(
-            y=df_smart['SmoothWait'],
-            mode='lines',
-            name='IA (Propuesto)',
-            line=dict(color='#00ffbf', width=3),
-            opacity=0.9
-        ))
+        for serie, nombre, color in [(serie_fijo, 'Fijo (Convencional)', '#ff2b2b'),
+                                     (serie_ia, 'IA (Propuesto)', '#00ffbf')]:
+            # Línea de la media (reducida con LTTB si la corrida tiene muchas ventanas)
+            fig_trend.add_trace(linea_reducida(serie['waitingTime_media'], f'{nombre} · media', color,
+                                               ancho=3, x=serie['inicio']))
+            p90 = linea_reducida(serie['waitingTime_p90'], f'{nombre} · p90', color, ancho=1, x=serie['inicio'])
+            p90.line.dash = "dot"
+            fig_trend.add_trace(p90)
+        fig_trend.update_traces(opacity=0.9)
 
         # Configuración "Dark Mode" para Plotly
         fig_trend.update_layout(
             template="plotly_dark", 
-            xaxis_title="Volumen de Vehículos (Secuencia de llegada)",
-            yaxis_title="Tiempo de Espera (Media Móvil 50)",
+            xaxis_title="Tiempo de simulación (s)",
+            yaxis_title=f"Tiempo de Espera (s, ventanas de {ventana} s)",
             legend=dict(orientation="h", y=1.1, x=0.5, xanchor="center"),
             font=dict(size=14, color="white"), # Letra blanca y grande
             height=450,
@@ -180,6 +292,22 @@ if file_static and file_smart:
         )
         st.plotly_chart(fig_trend, use_container_width=True)
 
+        # Flujo de salida de la red (llegadas por hora, promedio por corrida)
+        fig_flujo = go.Figure()
+        fig_flujo.add_trace(linea_reducida(serie_fijo['flujo_veh_h'], 'Fijo (Convencional)', '#ff2b2b', ancho=2,
+                                           x=serie_fijo['inicio']))
+        fig_flujo.add_trace(linea_reducida(serie_ia['flujo_veh_h'], 'IA (Propuesto)', '#00ffbf', ancho=2,
+                                           x=serie_ia['inicio']))
+        fig_flujo.update_layout(
+            template="plotly_dark",
+            xaxis_title="Tiempo de simulación (s)", yaxis_title="Flujo (veh/h)",
+            legend=dict(orientation="h", y=1.15, x=0.5, xanchor="center"),
+            font=dict(color="white"), height=300,
+            margin=dict(l=40, r=40, t=40, b=40),
+            paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)'
+        )
+        st.plotly_chart(fig_flujo, use_container_width=True)
+
         # --- 3. DETALLES Y GRÁFICAS ADICIONALES ---
         col_stats, col_graphs = st.columns([0.35, 0.65])
         
@@ -235,12 +363,15 @@ if file_static and file_smart:
             
             # --- TAB 1: HISTOGRAMA ---
             with tab1:
-                fig_hist = px.histogram(
-                    df_combined, x="waitingTime", color="Sistema", 
-                    barmode="overlay", nbins=40, opacity=0.7,
-                    color_discrete_map={'Fijo (Convencional)': '#ff2b2b', 'IA (Propuesto)': '#00ffbf'}
-                )
+                # Conteos calculados con NumPy: se envían 40 barras, no todos los viajes
+                bordes, (conteo_fijo, conteo_ia) = histograma([df_static['waitingTime'], df_smart['waitingTime']], bins=40)
+                centros = (bordes[:-1] + bordes[1:]) / 2
+                fig_hist = go.Figure()
+                fig_hist.add_trace(go.Bar(x=centros, y=conteo_fijo, width=np.diff(bordes), name='Fijo (Convencional)', marker_color='#ff2b2b'))
+                fig_hist.add_trace(go.Bar(x=centros, y=conteo_ia, width=np.diff(bordes), name='IA (Propuesto)', marker_color='#00ffbf'))
+                fig_hist.update_traces(opacity=0.7)
                 fig_hist.update_layout(
+                    barmode="overlay",
                     template="plotly_dark",
                     xaxis_title="Segundos de Espera",
                     yaxis_title="Frecuencia",
@@ -252,10 +383,10 @@ if file_static and file_smart:
 
             # --- TAB 2: BOXPLOT ---
             with tab2:
-                fig_box = px.box(
-                    df_combined, x="Sistema", y="waitingTime", color="Sistema",
-                    color_discrete_map={'Fijo (Convencional)': '#ff2b2b', 'IA (Propuesto)': '#00ffbf'},
-                    points="outliers" 
+                # Caja desde cuantiles precalculados + muestra acotada de atípicos
+                fig_box = go.Figure(
+                    caja_precalculada(df_static['waitingTime'], 'Fijo (Convencional)', '#ff2b2b')
+                    + caja_precalculada(df_smart['waitingTime'], 'IA (Propuesto)', '#00ffbf')
                 )
                 fig_box.update_layout(
                     template="plotly_dark",
@@ -269,8 +400,8 @@ if file_static and file_smart:
             # --- TAB 3: CURVA ACUMULADA ---
             with tab3:
                 fig_line = go.Figure()
-                fig_line.add_trace(go.Scatter(y=df_static['waitingTime'], mode='lines', name='Fijo', line=dict(color='#ff2b2b', width=1)))
-                fig_line.add_trace(go.Scatter(y=df_smart['waitingTime'], mode='lines', name='IA', line=dict(color='#00ffbf', width=1)))
+                fig_line.add_trace(linea_reducida(df_static['waitingTime'], 'Fijo', '#ff2b2b'))
+                fig_line.add_trace(linea_reducida(df_smart['waitingTime'], 'IA', '#00ffbf'))
                 fig_line.update_layout(
                     template="plotly_dark",
                     xaxis_title="Vehículo N°", yaxis_title="Tiempo Espera (s)",
@@ -285,3 +416,82 @@ if file_static and file_smart:
 else:
     # Pantalla de inicio
     st.info("👋 Sube los archivos XML en la barra lateral para ver el reporte.")
+
+# --- 4. EMISIONES Y ESTADO DE LA RED (MEANDATA) ---
+# Agregados por calle e intervalo que escribe SUMO (meandata.py): no hacen falta los tripinfo
+if meandata_static and meandata_smart:
+    md_static = parse_meandata(meandata_static)
+    md_smart = parse_meandata(meandata_smart)
+    sistemas = [(md_static, 'Fijo (Convencional)', '#ff2b2b'), (md_smart, 'IA (Propuesto)', '#00ffbf')]
+    con_emisiones = bool(md_static["emisiones"] and md_smart["emisiones"])
+    con_trafico = bool(md_static["trafico"] and md_smart["trafico"])
+    estilo = dict(template="plotly_dark", font=dict(color="white"),
+                  legend=dict(orientation="h", y=1.15, x=0.5, xanchor="center"),
+                  margin=dict(l=40, r=40, t=40, b=40), paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)')
+
+    st.divider()
+    st.subheader("🌱 Emisiones y Estado de la Red")
+    if not (con_emisiones or con_trafico):
+        st.warning("⚠️ Sube el mismo tipo de meandata (tráfico o emisiones) para ambos escenarios.")
+
+    if con_emisiones:
+        # Totales por corrida (promedio si hay varias semillas); SUMO da mg por intervalo
+        col1, col2, col3, col4 = st.columns(4)
+        for col, columna, etiqueta, escala, unidad in [
+            (col1, "CO2_abs", "🏭 CO₂ Total", 1e6, "kg"), (col2, "fuel_abs", "⛽ Combustible", 1e6, "kg"),
+            (col3, "NOx_abs", "🌫️ NOx", 1e3, "g"), (col4, "PMx_abs", "🫁 Partículas (PMx)", 1e3, "g"),
+        ]:
+            total_fix = serie_red(md_static["emisiones"], columna).sum() / escala
+            total_ia = serie_red(md_smart["emisiones"], columna).sum() / escala
+            delta = (total_ia - total_fix) / total_fix * 100 if total_fix else 0.0
+            col.metric(etiqueta, f"{total_ia:,.1f} {unidad}", f"{delta:.1f}%", delta_color="inverse")
+
+        col_tiempo, col_calles = st.columns([0.6, 0.4])
+        with col_tiempo:
+            fig_co2 = go.Figure()
+            for md, nombre, color in sistemas:
+                serie = serie_red(md["emisiones"], "CO2_abs") / 1e6
+                fig_co2.add_trace(linea_reducida(serie, nombre, color, ancho=2, x=serie.index))
+            fig_co2.update_layout(xaxis_title="Tiempo de simulación (s)", yaxis_title="CO₂ por intervalo (kg)",
+                                  height=350, **estilo)
+            st.plotly_chart(fig_co2, use_container_width=True)
+        with col_calles:
+            fig_calles = go.Figure()
+            for md, nombre, color in sistemas:
+                por_calle = total_por_calle(md["emisiones"], "CO2_abs") / 1e6
+                fig_calles.add_trace(go.Bar(x=por_calle.index, y=por_calle.values, name=nombre, marker_color=color))
+            fig_calles.update_layout(barmode="group", xaxis_title="Calle", yaxis_title="CO₂ (kg)", height=350,
+                                     **estilo)
+            st.plotly_chart(fig_calles, use_container_width=True)
+
+    if con_trafico:
+        col_densidad, col_ocupacion = st.columns(2)
+        for col, columna, titulo in [(col_densidad, "density", "Densidad media por calle (veh/km)"),
+                                     (col_ocupacion, "occupancy", "Ocupación media por calle (%)")]:
+            with col:
+                fig = go.Figure()
+                for md, nombre, color in sistemas:
+                    serie = serie_red(md["trafico"], columna, como="media")
+                    fig.add_trace(linea_reducida(serie, nombre, color, ancho=2, x=serie.index))
+                fig.update_layout(xaxis_title="Tiempo de simulación (s)", yaxis_title=titulo, height=320, **estilo)
+                st.plotly_chart(fig, use_container_width=True)
+
+    # Mapa de calor calle × tiempo de la métrica y el escenario elegidos
+    opciones = ([("CO₂ (kg)", "emisiones", "CO2_abs", 1e6)] if con_emisiones else []) + (
+        [("Densidad (veh/km)", "trafico", "density", 1), ("Ocupación (%)", "trafico", "occupancy", 1)]
+        if con_trafico else [])
+    if opciones:
+        st.markdown("### 🗺️ Por calle en el tiempo")
+        col_metrica, col_sistema = st.columns(2)
+        etiqueta = col_metrica.selectbox("Métrica", [o[0] for o in opciones])
+        sistema = col_sistema.radio("Escenario", ["Fijo (Convencional)", "IA (Propuesto)"], horizontal=True)
+        _, tipo, columna, escala = next(o for o in opciones if o[0] == etiqueta)
+        md = md_static if sistema.startswith("Fijo") else md_smart
+        tabla = matriz(md[tipo], columna) / escala
+        fig_calor = go.Figure(go.Heatmap(z=tabla.T.values, x=tabla.index, y=list(tabla.columns),
+                                         colorscale="Inferno", colorbar=dict(title=etiqueta)))
+        fig_calor.update_layout(template="plotly_dark", xaxis_title="Tiempo de simulación (s)", yaxis_title="Calle",
+                                font=dict(color="white"), height=max(300, 28 * len(tabla.columns)),
+                                margin=dict(l=40, r=40, t=20, b=40),
+                                paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)')
+        st.plotly_chart(fig_calor, use_container_width=True)
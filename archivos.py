@@ -0,0 +1,30 @@
+import os
+import tempfile
+
+# --- ESCRITURA ATÓMICA ---
+# El contenido se escribe en un temporal del mismo directorio y se renombra con os.replace:
+# quien lee (otro proceso, el dashboard, un lector periódico) ve el archivo anterior o el
+# completo, nunca uno a medio escribir, y si dos procesos escriben el mismo a la vez gana uno entero.
+
+
+def escribir_atomico(ruta, escribir, modo=None, encoding=None):
+    # escribir(destino): con modo ("wb", "w") recibe el temporal abierto; sin modo, su ruta (para
+    # quien escribe por su cuenta, p. ej. saveState de SUMO). El temporal conserva las extensiones
+    # de ruta (".npz", ".xml.gz"): np.savez y SUMO eligen el formato por ellas
+    directorio = os.path.dirname(ruta) or "."
+    os.makedirs(directorio, exist_ok=True)
+    nombre = os.path.basename(ruta)
+    sufijo = "." + nombre.split(".", 1)[1] if "." in nombre else ""
+    fd, temporal = tempfile.mkstemp(suffix=sufijo, dir=directorio)
+    try:
+        if modo is None:
+            os.close(fd)
+            escribir(temporal)
+        else:
+            with os.fdopen(fd, modo, encoding=encoding) as f:
+                escribir(f)
+        os.replace(temporal, ruta)
+    except BaseException:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+        raise
@@ -0,0 +1,49 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from conexion import BACKENDS, libsumo
+from escenario import ejecutar_escenario
+
+# --- BENCHMARK: PASOS POR SEGUNDO SEGÚN BACKEND (red.net.xml) ---
+
+
+def medir_backend(backend, modo="ia", perfil="hora_pico", pasos=3000, semilla=42, repeticiones=3):
+    mejores = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for i in range(repeticiones):
+            salida = os.path.join(tmp, f"{backend}_{i}.xml")
+            inicio = time.perf_counter()
+            resultado = ejecutar_escenario(modo, perfil, semilla, salida, pasos=pasos, backend=backend,
+                                           label=f"bench-{backend}-{i}")
+            mejores.append(resultado["pasos"] / (time.perf_counter() - inicio))
+    # Incluye el arranque de SUMO: es el costo real de una corrida por lotes
+    return max(mejores)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compara pasos/segundo entre los backends traci y libsumo.")
+    parser.add_argument("--pasos", type=int, default=3000)
+    parser.add_argument("--repeticiones", type=int, default=3)
+    parser.add_argument("--modo", default="ia")
+    parser.add_argument("--perfil", default="hora_pico")
+    args = parser.parse_args(argv)
+
+    print(f"📊 BENCHMARK DE BACKENDS | {args.perfil} / {args.modo} | {args.pasos} pasos")
+    resultados = {}
+    for backend in BACKENDS:
+        if backend == "libsumo" and libsumo is None:
+            print(f"   {backend:<8} | no instalado")
+            continue
+        resultados[backend] = medir_backend(backend, args.modo, args.perfil, args.pasos, repeticiones=args.repeticiones)
+        print(f"   {backend:<8} | {resultados[backend]:>10.0f} pasos/s")
+        sys.stdout.flush()
+
+    if len(resultados) == 2:
+        print(f"   🚀 libsumo es {resultados['libsumo'] / resultados['traci']:.1f}x más rápido")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from conexion import abrir_conexion, libsumo
+from controladores import CONTROLADORES
+from escenario import DIRECTORIO_BASE, ruta_binario_sumo, ruta_ejecutable
+from motor_semaforos import MotorSemaforos
+from topologia import Topologia, construir_topologia
+
+# --- BENCHMARK: COSTO DEL MOTOR DE CONTROL SEGÚN CANTIDAD DE SEMÁFOROS ---
+# Desde red.net.xml (1 semáforo) hasta grillas generadas con cientos de semáforos.
+
+
+def _herramienta_sumo(nombre):
+    # SUMO_HOME puede apuntar a una instalación sin tools/ (p. ej. la de pip)
+    candidatos = [os.environ.get("SUMO_HOME")]
+    try:
+        import sumo
+        candidatos.append(sumo.SUMO_HOME)
+    except ImportError:
+        pass
+    for base in filter(None, candidatos):
+        ruta = os.path.join(base, "tools", nombre)
+        if os.path.exists(ruta):
+            return ruta
+    raise FileNotFoundError(f"No se encontró {nombre} (definir SUMO_HOME)")
+
+
+def generar_grilla(directorio, n, pasos, semilla=42):
+    red = os.path.join(directorio, f"grilla_{n}.net.xml")
+    viajes = os.path.join(directorio, f"grilla_{n}.trips.xml")
+    rutas = os.path.join(directorio, f"grilla_{n}.rou.xml")
+    subprocess.run([
+        ruta_ejecutable("netgenerate"), "--grid", "--grid.number", str(n),
+        "--grid.length", "100", "--default.lanenumber", "2", "--tls.guess", "true",
+        "--no-turnarounds", "true", "-o", red,
+    ], check=True, capture_output=True)
+    # Demanda aleatoria proporcional al tamaño de la grilla (randomTrips también escribe
+    # las rutas con duarouter; sin -r las dejaría en el directorio actual)
+    subprocess.run([
+        sys.executable, _herramienta_sumo("randomTrips.py"), "-n", red, "-o", viajes, "-r", rutas,
+        "-e", str(pasos), "--period", f"{4.0 / n:.3f}", "--seed", str(semilla),
+    ], check=True, capture_output=True)
+    return red, rutas
+
+
+def medir_red(red, rutas, pasos, modo="ia", backend="libsumo"):
+    cmd = [ruta_binario_sumo(), "-n", red, "-r", rutas, "--no-step-log", "true", "--no-warnings", "true"]
+    # Sin caché de disco: las grillas son temporales
+    topologia = Topologia(construir_topologia(red))
+    conn = abrir_conexion(cmd, backend, label=f"bench-{os.path.basename(red)}")
+    try:
+        motor = MotorSemaforos(conn, topologia, modo)
+        t_sumo = t_motor = 0.0
+        for _ in range(pasos):
+            inicio = time.perf_counter()
+            conn.simulationStep()
+            medio = time.perf_counter()
+            motor.paso()
+            t_sumo += medio - inicio
+            t_motor += time.perf_counter() - medio
+        return len(motor.semaforos), t_motor / pasos * 1e6, t_sumo / pasos * 1e6
+    finally:
+        conn.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mide el costo por paso del motor de control en redes crecientes.")
+    parser.add_argument("--grillas", nargs="+", type=int, default=[3, 6, 10, 15, 22])
+    parser.add_argument("--pasos", type=int, default=500)
+    parser.add_argument("--modo", default="ia", choices=list(CONTROLADORES))
+    parser.add_argument("--backend", default="libsumo" if libsumo else "traci")
+    args = parser.parse_args(argv)
+
+    print(f"📊 BENCHMARK MOTOR DE CONTROL | modo {args.modo} | {args.backend} | {args.pasos} pasos")
+    print(f"   {'red':<18} | {'semáforos':>9} | {'motor µs/paso':>13} | {'µs/semáforo':>11} | {'SUMO µs/paso':>12}")
+    with tempfile.TemporaryDirectory() as tmp:
+        redes = [("red.net.xml", os.path.join(DIRECTORIO_BASE, "red.net.xml"),
+                  os.path.join(DIRECTORIO_BASE, "rutas.rou.xml"))]
+        for n in args.grillas:
+            red, rutas = generar_grilla(tmp, n, args.pasos)
+            redes.append((f"grilla {n}x{n}", red, rutas))
+
+        for nombre, red, rutas in redes:
+            semaforos, us_motor, us_sumo = medir_red(red, rutas, args.pasos, args.modo, args.backend)
+            print(f"   {nombre:<18} | {semaforos:>9} | {us_motor:>13.1f} | {us_motor / max(semaforos, 1):>11.2f} | {us_sumo:>12.1f}")
+            sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    main()
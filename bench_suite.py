@@ -0,0 +1,245 @@
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from bench_tripinfo import ampliar_archivo
+from conexion import abrir_conexion, libsumo
+from demanda import Demanda
+from escenario import ARCHIVO_RED, DIRECTORIO_BASE, comando_sumo, configurar_calles
+from instrumentacion import Instrumentacion
+from motor_semaforos import MotorSemaforos
+from topologia import cargar_topologia
+from traci_falso import SumoFalso
+from tripinfo import leer_tripinfo
+
+# --- SUITE DE BENCHMARKS CON HISTORIAL ---
+# Escenarios fijos (red.net.xml, misma demanda y semilla) medidos con cada backend disponible:
+# - pasos/s del bucle completo, llamadas a la API TraCI por paso y latencia de decisión
+#   del motor de control (motor.paso(), media y p99)
+# - MB/s del lector de tripinfo sobre un archivo fijo
+# Cada corrida se agrega a un historial JSONL y se compara con la anterior de la misma
+# máquina: así una regresión de rendimiento aparece en cuanto se introduce.
+# El backend "falso" (traci_falso.py) no necesita SUMO: mide solo la lógica de control.
+
+HISTORIAL = os.path.join(DIRECTORIO_BASE, "resultados", "bench_historial.jsonl")
+TOLERANCIA = 0.10
+# métrica -> 1 si más es mejor, -1 si menos es mejor, 0 si debe ser idéntica (comportamiento)
+METRICAS = {
+    "pasos_por_segundo": 1,
+    "llamadas_por_paso": -1,
+    "latencia_media_us": -1,
+    "latencia_p99_us": -1,
+    "mb_por_segundo": 1,
+    "viajes": 0,
+    "espera_media": 0,
+}
+
+
+def _conectar(backend, semilla, directorio):
+    if backend == "falso":
+        return SumoFalso(cargar_topologia(ARCHIVO_RED))
+    salida = os.path.join(directorio, f"tripinfo_{backend}.xml")
+    return abrir_conexion(comando_sumo(salida, semilla), backend, label=f"suite-{backend}")
+
+
+def medir_escenario(backend, modo, perfil="hora_pico", semilla=42, pasos=3000):
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = _conectar(backend, semilla, tmp)
+        try:
+            topologia = cargar_topologia(ARCHIVO_RED)
+            _, entradas, salidas, permitidos = configurar_calles(topologia)
+            # Solo se cuentan las llamadas (medir cada una inflaría la latencia del motor)
+            llamadas = Instrumentacion()
+            contador = llamadas.envolver(conn, tiempos=False)
+            demanda = Demanda(perfil, semilla, entradas, salidas, pasos, permitidos)
+            demanda.preparar(contador)
+            motor = MotorSemaforos(contador, topologia, modo)
+            # Solo se cuentan las llamadas del bucle (no la preparación)
+            llamadas.reiniciar()
+
+            latencias = np.empty(pasos)
+            inicio = time.perf_counter()
+            for step in range(pasos):
+                contador.simulationStep()
+                demanda.insertar(contador, step)
+                antes = time.perf_counter()
+                motor.paso()
+                latencias[step] = time.perf_counter() - antes
+            total = time.perf_counter() - inicio
+            resultado = {
+                "pasos_por_segundo": pasos / total,
+                "llamadas_por_paso": llamadas.total_llamadas() / pasos,
+                "latencia_media_us": latencias.mean() * 1e6,
+                "latencia_p99_us": np.percentile(latencias, 99) * 1e6,
+            }
+            if backend == "falso":
+                # Determinista: cualquier cambio es un cambio de comportamiento del controlador
+                resumen = conn.resumen()
+                resultado["viajes"] = resumen["viajes"]
+                resultado["espera_media"] = round(resumen["espera_media"], 6)
+            return resultado
+        finally:
+            conn.close()
+
+
+def medir_tripinfo(archivo, repetir=20, repeticiones=3):
+    with tempfile.TemporaryDirectory() as tmp:
+        grande = os.path.join(tmp, "tripinfo_grande.xml")
+        ampliar_archivo(archivo, grande, repetir)
+        megas = os.path.getsize(grande) / 1e6
+        mejor = min(_cronometrar(leer_tripinfo, grande) for _ in range(repeticiones))
+    return {"mb_por_segundo": megas / mejor}
+
+
+def _cronometrar(funcion, *args):
+    inicio = time.perf_counter()
+    funcion(*args)
+    return time.perf_counter() - inicio
+
+
+def _mejor(mediciones):
+    # Mejor valor de cada métrica entre repeticiones (el ruido solo empeora los tiempos)
+    mejor = dict(mediciones[0])
+    for medicion in mediciones[1:]:
+        for metrica, valor in medicion.items():
+            if METRICAS[metrica] > 0:
+                mejor[metrica] = max(mejor[metrica], valor)
+            elif METRICAS[metrica] < 0:
+                mejor[metrica] = min(mejor[metrica], valor)
+    return mejor
+
+
+def backends_disponibles():
+    backends = ["falso"]
+    try:
+        comando_sumo("tripinfo.xml", 0)
+    except FileNotFoundError:
+        return backends
+    if libsumo is not None:
+        backends.append("libsumo")
+    return backends + ["traci"]
+
+
+def correr_suite(backends, modos, perfil="hora_pico", semilla=42, pasos=3000, repeticiones=3,
+                 archivo_tripinfo=os.path.join(DIRECTORIO_BASE, "datos_ia.xml"), verbose=True):
+    escenarios = {}
+    for backend in backends:
+        for modo in modos:
+            clave = f"{backend}/{modo}/{perfil}/s{semilla}/{pasos}"
+            escenarios[clave] = _mejor([medir_escenario(backend, modo, perfil, semilla, pasos)
+                                        for _ in range(repeticiones)])
+            if verbose:
+                m = escenarios[clave]
+                print(f"   {clave:<40} | {m['pasos_por_segundo']:>9.0f} pasos/s | "
+                      f"{m['llamadas_por_paso']:>6.2f} llamadas/paso | motor {m['latencia_media_us']:>7.1f} µs "
+                      f"(p99 {m['latencia_p99_us']:>7.1f})")
+                sys.stdout.flush()
+    if os.path.exists(archivo_tripinfo):
+        clave = f"tripinfo/{os.path.basename(archivo_tripinfo)}"
+        escenarios[clave] = medir_tripinfo(archivo_tripinfo, repeticiones=repeticiones)
+        if verbose:
+            print(f"   {clave:<40} | {escenarios[clave]['mb_por_segundo']:>9.1f} MB/s")
+    return escenarios
+
+
+# --- HISTORIAL Y REGRESIONES ---
+def _commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=DIRECTORIO_BASE, check=True,
+                              capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def registro(escenarios):
+    return {
+        "fecha": datetime.datetime.now().isoformat(timespec="seconds"),
+        "commit": _commit(),
+        "maquina": platform.node(),
+        "python": platform.python_version(),
+        "escenarios": escenarios,
+    }
+
+
+def leer_historial(ruta=HISTORIAL):
+    if not os.path.exists(ruta):
+        return []
+    with open(ruta, encoding="utf-8") as f:
+        return [json.loads(linea) for linea in f if linea.strip()]
+
+
+def guardar_registro(entrada, ruta=HISTORIAL):
+    directorio = os.path.dirname(ruta)
+    if directorio:
+        os.makedirs(directorio, exist_ok=True)
+    with open(ruta, "a", encoding="utf-8") as f:
+        f.write(json.dumps(entrada, ensure_ascii=False) + "\n")
+
+
+def comparar(actual, anterior, tolerancia=TOLERANCIA):
+    # (escenario, métrica, antes, ahora, tipo): "regresion" si empeora más que la tolerancia,
+    # "cambio" si una métrica de comportamiento (determinista) no coincide
+    hallazgos = []
+    for clave, metricas in actual.items():
+        previas = anterior.get(clave, {})
+        for metrica, valor in metricas.items():
+            if metrica not in previas:
+                continue
+            antes = previas[metrica]
+            sentido = METRICAS[metrica]
+            if sentido == 0:
+                if valor != antes:
+                    hallazgos.append((clave, metrica, antes, valor, "cambio"))
+            elif antes and sentido * (valor - antes) / abs(antes) < -tolerancia:
+                hallazgos.append((clave, metrica, antes, valor, "regresion"))
+    return hallazgos
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Suite de benchmarks con historial y detección de regresiones.")
+    parser.add_argument("--backends", nargs="+", default=None, choices=["falso", "libsumo", "traci"],
+                        help="Por defecto: falso + los que tengan SUMO instalado")
+    parser.add_argument("--modos", nargs="+", default=["fijo", "ia", "max_presion"])
+    parser.add_argument("--perfil", default="hora_pico")
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--pasos", type=int, default=3000)
+    parser.add_argument("--repeticiones", type=int, default=3)
+    parser.add_argument("--historial", default=HISTORIAL)
+    parser.add_argument("--tolerancia", type=float, default=TOLERANCIA,
+                        help="Empeoramiento relativo tolerado antes de marcar una regresión")
+    parser.add_argument("--no-guardar", action="store_true", help="No agrega la corrida al historial")
+    args = parser.parse_args(argv)
+
+    backends = args.backends or backends_disponibles()
+    print(f"📊 SUITE DE BENCHMARKS | {', '.join(backends)} | {args.perfil} | {args.pasos} pasos")
+    escenarios = correr_suite(backends, args.modos, args.perfil, args.semilla, args.pasos, args.repeticiones)
+    entrada = registro(escenarios)
+
+    previas = [r for r in leer_historial(args.historial) if r.get("maquina") == entrada["maquina"]]
+    regresiones = 0
+    if previas:
+        anterior = previas[-1]
+        hallazgos = comparar(escenarios, anterior["escenarios"], args.tolerancia)
+        print(f"🔎 Comparado con {anterior['fecha']} ({anterior.get('commit') or 'sin commit'})")
+        for clave, metrica, antes, ahora, tipo in hallazgos:
+            icono = "🐢 REGRESIÓN" if tipo == "regresion" else "⚠️ CAMBIO"
+            print(f"   {icono} {clave} | {metrica}: {antes:.4g} -> {ahora:.4g}")
+        regresiones = sum(tipo == "regresion" for *_, tipo in hallazgos)
+        if not hallazgos:
+            print("   ✅ Sin regresiones")
+    if not args.no_guardar:
+        guardar_registro(entrada, args.historial)
+        print(f"📁 Historial: {args.historial}")
+    return 1 if regresiones else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
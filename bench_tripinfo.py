@@ -0,0 +1,79 @@
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+import xml.etree.ElementTree as ET
+
+import numpy as np
+import pandas as pd
+
+from tripinfo import iterar_bloques, leer_tripinfo
+
+# --- BENCHMARK: LECTURA DE TRIPINFO (MB/s) ---
+
+
+def parse_sumo_xml_original(archivo):
+    # Implementación anterior de analisis.py (árbol completo + lista de dicts)
+    tree = ET.parse(archivo)
+    root = tree.getroot()
+    data = []
+    for trip in root.findall('tripinfo'):
+        data.append({
+            "id": trip.get('id'),
+            "waitingTime": float(trip.get('waitingTime')),
+            "timeLoss": float(trip.get('timeLoss')),
+            "duration": float(trip.get('duration'))
+        })
+    return pd.DataFrame(data)
+
+
+def solo_espera_por_bloques(archivo):
+    # Uso en streaming: se conserva una sola columna, el resto se descarta por bloque
+    return np.concatenate([b["waitingTime"] for b in iterar_bloques(archivo, 8192)])
+
+
+def ampliar_archivo(origen, destino, repeticiones):
+    # Genera un tripinfo grande repitiendo los viajes del archivo original
+    with open(origen, encoding="utf-8") as f:
+        lineas = [l for l in f if l.lstrip().startswith("<tripinfo ")]
+    with open(destino, "w", encoding="utf-8") as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n<tripinfos>\n')
+        for _ in range(repeticiones):
+            f.writelines(lineas)
+        f.write("</tripinfos>\n")
+
+
+def medir(funcion, archivo, repeticiones=3):
+    megas = os.path.getsize(archivo) / 1e6
+    mejor = float("inf")
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        df = funcion(archivo)
+        mejor = min(mejor, time.perf_counter() - inicio)
+    # Pico de memoria en una pasada aparte (tracemalloc frena la lectura)
+    tracemalloc.start()
+    funcion(archivo)
+    pico = tracemalloc.get_traced_memory()[1] / 1e6
+    tracemalloc.stop()
+    return megas / mejor, pico, len(df)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compara el lector de tripinfo original contra el incremental.")
+    parser.add_argument("--archivo", default="datos_ia.xml")
+    parser.add_argument("--repetir", type=int, default=20, help="Veces que se replica el archivo para agrandarlo")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        grande = os.path.join(tmp, "tripinfo_grande.xml")
+        ampliar_archivo(args.archivo, grande, args.repetir)
+        print(f"📊 BENCHMARK TRIPINFO | {os.path.getsize(grande) / 1e6:.1f} MB")
+        for nombre, funcion in [("original", parse_sumo_xml_original), ("incremental", leer_tripinfo),
+                               ("bloques", solo_espera_por_bloques)]:
+            velocidad, pico, filas = medir(funcion, grande)
+            print(f"   {nombre:<12} | {velocidad:>7.1f} MB/s | pico {pico:>7.1f} MB | {filas} viajes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+import collections
+import hashlib
+import os
+
+import numpy as np
+import pandas as pd
+
+from archivos import escribir_atomico
+from registro_viajes import es_registro, leer_viajes
+from tripinfo import leer_tripinfo
+
+# --- CACHÉ DE RESULTADOS PARSEADOS ---
+# Clave = hash del contenido del archivo (no el nombre): el mismo tripinfo subido dos veces
+# o copiado a otra carpeta se reconoce igual.
+# - Disco: un .npz por archivo con las columnas ya tipadas (compartido dashboard/scripts).
+# - Memoria: LRU acotado encima del disco para las re-ejecuciones de Streamlit.
+
+DIRECTORIO_CACHE = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "tripinfo")
+# Se incrementa si cambian las columnas o el formato del .npz (invalida las cachés anteriores)
+VERSION = 1
+MAX_EN_MEMORIA = 64
+MAX_BYTES_MEMORIA = 1 << 30
+TAM_LECTURA = 1 << 20
+
+_memoria = collections.OrderedDict()
+_bytes_memoria = 0
+# (ruta, tamaño, mtime) -> hash: evita volver a leer archivos locales que no cambiaron
+_huellas = {}
+
+
+def huella(fuente):
+    h = hashlib.blake2b(digest_size=20)
+    if isinstance(fuente, (str, os.PathLike)):
+        estado = os.stat(fuente)
+        firma = (os.path.abspath(fuente), estado.st_size, estado.st_mtime_ns)
+        if firma in _huellas:
+            return _huellas[firma]
+        with open(fuente, "rb") as f:
+            for trozo in iter(lambda: f.read(TAM_LECTURA), b""):
+                h.update(trozo)
+        _huellas[firma] = h.hexdigest()
+    else:
+        posicion = fuente.tell()
+        for trozo in iter(lambda: fuente.read(TAM_LECTURA), b""):
+            h.update(trozo)
+        fuente.seek(posicion)
+    return h.hexdigest()
+
+
+def _ruta_disco(clave, directorio):
+    return os.path.join(directorio, f"{clave}-v{VERSION}.npz")
+
+
+def _guardar_disco(df, ruta):
+    columnas = {}
+    for nombre in df.columns:
+        valores = df[nombre].to_numpy()
+        # Texto como unicode de ancho fijo: el .npz se abre sin pickle
+        columnas[nombre] = valores.astype(str) if valores.dtype == object else valores
+    # Escritura atómica: otro proceso nunca ve un .npz a medio escribir
+    escribir_atomico(ruta, lambda f: np.savez(f, **columnas), "wb")
+
+
+def _leer_disco(ruta):
+    with np.load(ruta, allow_pickle=False) as datos:
+        return pd.DataFrame({nombre: datos[nombre] for nombre in datos.files})
+
+
+def _recordar(clave, df):
+    global _bytes_memoria
+    if clave in _memoria:
+        return
+    _memoria[clave] = (df, int(df.memory_usage(deep=True).sum()))
+    _bytes_memoria += _memoria[clave][1]
+    # Se desaloja lo menos usado hasta volver a los límites (siempre queda el último)
+    while len(_memoria) > 1 and (len(_memoria) > MAX_EN_MEMORIA or _bytes_memoria > MAX_BYTES_MEMORIA):
+        _, (_, tam) = _memoria.popitem(last=False)
+        _bytes_memoria -= tam
+
+
+def buscar_en_cache(fuente, directorio=DIRECTORIO_CACHE, clave=None):
+    # DataFrame si el contenido ya fue parseado (memoria o disco), si no None
+    clave = clave or huella(fuente)
+    if clave in _memoria:
+        _memoria.move_to_end(clave)
+        df = _memoria[clave][0]
+    else:
+        ruta = _ruta_disco(clave, directorio)
+        if not os.path.exists(ruta):
+            return None
+        df = _leer_disco(ruta)
+        _recordar(clave, df)
+    # Copia superficial: el llamador puede agregar columnas sin tocar la caché
+    return df.copy(deep=False)
+
+
+def cargar_tripinfo(fuente, directorio=DIRECTORIO_CACHE):
+    # Un registro compacto (registro_viajes.py) se abre con memmap: no necesita caché
+    if es_registro(fuente):
+        return leer_viajes(fuente)
+    # La huella se calcula antes de parsear: leer el archivo consume la posición
+    clave = huella(fuente)
+    df = buscar_en_cache(fuente, directorio, clave)
+    if df is not None:
+        return df
+    df = leer_tripinfo(fuente)
+    _guardar_disco(df, _ruta_disco(clave, directorio))
+    _recordar(clave, df)
+    return df.copy(deep=False)
+
+
+def limpiar_memoria():
+    global _bytes_memoria
+    _memoria.clear()
+    _bytes_memoria = 0
@@ -0,0 +1,220 @@
+import argparse
+import csv
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import traci.constants as tc
+
+from demanda import Demanda
+from escenario import ARCHIVO_RED, MODOS, PERFILES, configurar_calles, ejecutar_escenario, obtener_estado
+from registro_viajes import EXTENSION as EXTENSION_VIAJES
+from sensado import SensorVectorial
+from topologia import cargar_topologia
+
+# --- COMPARACIÓN PAREADA EN PARALELO (LOCKSTEP) ---
+# Dos o más controladores corren a la vez, cada uno con su SUMO y en su propio hilo, y avanzan
+# juntos: ninguna corrida pasa de un bloque de pasos al siguiente hasta que todas terminaron el
+# bloque (threading.Barrier). Con bloque=1 es paso a paso estricto; por defecto se sincroniza cada
+# 10 pasos (1 s del controlador), que ahorra cambios de hilo y sigue dando una fila por paso.
+# - Misma demanda por construcción: el calendario se compila una sola vez y cada corrida usa una
+#   copia (mismas inserciones, no depende de que los modos consuman igual números aleatorios).
+#   También comparten la semilla de SUMO y, con calentamiento, el mismo estado inicial.
+# - Mientras SUMO simula un paso, el hilo espera el socket de TraCI sin el GIL: los pasos de
+#   las corridas se solapan y el par tarda lo que la corrida más lenta, no la suma.
+# - Cada corrida anota sus métricas en todos los pasos; al cerrar el bloque se arma una fila por
+#   paso con las de cada corrida y su diferencia contra la referencia (el primer modo), que van a
+#   un CSV mientras la corrida sigue.
+# Solo con el backend traci: libsumo admite una simulación por proceso.
+
+DIRECTORIO_PAREADOS = "resultados_pareados"
+BLOQUE = 10  # pasos entre sincronizaciones
+# Segundos que una corrida espera a las demás en la barrera: si una quedó colgada (SUMO que no
+# responde), las otras fallan con BrokenBarrierError en lugar de esperar para siempre
+ESPERA_MAXIMA = 300
+METRICAS_PASO = ("detenidos", "espera", "llegados", "en_red")
+
+
+class ParticipantePareado:
+    # Una corrida dentro de la comparación: ejecutar_escenario llama iniciar(), paso() y cerrar()
+    def __init__(self, comparacion, modo):
+        self.comparacion = comparacion
+        self.modo = modo
+        self.detenidos = 0
+        self.espera = 0.0  # veh·s detenidos en las calles de acceso, acumulado
+        self.llegados = 0
+        self.en_red = 0  # insertados que todavía no llegaron
+        self.step = None
+        self.filas = []
+
+    def iniciar(self, conn, motor, demanda):
+        self._demanda = demanda
+        # Tras cargar un estado de calentamiento ya hay vehículos en la red (o esperando entrar)
+        self._iniciales = conn.simulation.getMinExpectedNumber()
+        self._dt = conn.simulation.getDeltaT()
+        calles = sorted({calle for tls in motor.semaforos for calle in motor.topologia.calles_controladas(tls)})
+        self.sensor = SensorVectorial(conn, calles, "edge")
+        self._simulacion = conn.simulation
+        self._simulacion.subscribe((tc.VAR_ARRIVED_VEHICLES_NUMBER,))
+
+    def paso(self, step):
+        self.detenidos = int(self.sensor.leer()[0].sum())
+        self.espera += self.detenidos * self._dt
+        self.llegados += self._simulacion.getSubscriptionResults()[tc.VAR_ARRIVED_VEHICLES_NUMBER]
+        self.en_red = self._iniciales + self._demanda.insertados - self.llegados
+        self.step = step
+        self.filas.append([step] + [getattr(self, m) for m in METRICAS_PASO])
+        # Fin de bloque: el último en llegar publica las filas y libera a todos
+        comparacion = self.comparacion
+        if (step + 1) % comparacion.bloque == 0 or step == comparacion.pasos - 1:
+            comparacion.barrera.wait()
+
+    def ejecutar(self, *args, **kwargs):
+        # ejecutar_escenario para esta corrida. Si falla en cualquier punto, también antes de llegar
+        # a su bucle (controlador, calentamiento, conexión con SUMO), se libera a las demás
+        try:
+            return ejecutar_escenario(*args, pareado=self, **kwargs)
+        except BaseException:
+            self.cerrar()
+            raise
+
+    def cerrar(self):
+        # Si la corrida se cortó antes del último paso, las demás reciben BrokenBarrierError en
+        # lugar de quedarse esperándola (tras el último paso no: podrían no haber salido de wait())
+        if self.step != self.comparacion.pasos - 1:
+            self.comparacion.barrera.abort()
+
+
+class ComparacionPareada:
+    def __init__(self, modos, pasos, archivo_diferencias=None, al_paso=None, bloque=BLOQUE,
+                 espera=ESPERA_MAXIMA):
+        if len(set(modos)) != len(modos) or len(modos) < 2:
+            raise ValueError(f"Se necesitan al menos dos modos distintos (recibidos: {', '.join(modos)})")
+        self.modos = list(modos)
+        self.pasos = pasos
+        self.bloque = max(int(bloque), 1)
+        self.participantes = [ParticipantePareado(self, modo) for modo in self.modos]
+        self.barrera = threading.Barrier(len(self.participantes), action=self._publicar, timeout=espera)
+        self.al_paso = al_paso
+        self.ultima = None
+        self.referencia = self.modos[0]
+        self.columnas = ["paso"] + [f"{m}_{modo}" for modo in self.modos for m in METRICAS_PASO]
+        self.columnas += [f"dif_{m}_{modo}" for modo in self.modos[1:] for m in METRICAS_PASO]
+        self._archivo = self._escritor = None
+        if archivo_diferencias is not None:
+            directorio = os.path.dirname(archivo_diferencias)
+            if directorio:
+                os.makedirs(directorio, exist_ok=True)
+            self._archivo = open(archivo_diferencias, "w", newline="", encoding="utf-8")
+            self._escritor = csv.writer(self._archivo)
+            self._escritor.writerow(self.columnas)
+
+    def _publicar(self):
+        # Corre en uno de los hilos mientras los demás esperan en la barrera: debe ser breve
+        filas = []
+        # Todas las corridas anotaron los mismos pasos del bloque
+        for pasos in zip(*(p.filas for p in self.participantes)):
+            base = pasos[0][1:]
+            fila = [pasos[0][0]] + [v for valores in pasos for v in valores[1:]]
+            fila += [v - b for valores in pasos[1:] for v, b in zip(valores[1:], base)]
+            filas.append(fila)
+        for p in self.participantes:
+            p.filas = []
+        if not filas:
+            return
+        self.ultima = dict(zip(self.columnas, filas[-1]))
+        if self._escritor is not None:
+            self._escritor.writerows(filas)
+            self._archivo.flush()
+        if self.al_paso is not None:
+            for fila in filas:
+                self.al_paso(dict(zip(self.columnas, fila)))
+
+    def cerrar(self):
+        if self._archivo is not None and not self._archivo.closed:
+            self._archivo.close()
+
+
+def comparar_en_paralelo(modos=("fijo", "ia"), perfil="pulsos", semilla=42, pasos=3000,
+                         directorio=DIRECTORIO_PAREADOS, calentamiento=0, controlador_calentamiento="fijo",
+                         formato=".xml", al_paso=None, bloque=BLOQUE):
+    # Una salida por modo (<directorio>/<perfil>/<modo>_s<semilla>.xml, como experimentos.py) y
+    # las diferencias paso a paso en <directorio>/<perfil>/pareado_s<semilla>.csv
+    for modo in modos:
+        if modo not in MODOS:
+            raise ValueError(f"Modo desconocido: {modo!r} (opciones: {', '.join(MODOS)})")
+    if perfil not in PERFILES:
+        raise ValueError(f"Perfil desconocido: {perfil!r} (opciones: {', '.join(PERFILES)})")
+
+    inicio = time.perf_counter()
+    carpeta = os.path.join(directorio, perfil)
+    archivo_diferencias = os.path.join(carpeta, f"pareado_s{semilla}.csv")
+    comparacion = ComparacionPareada(modos, pasos, archivo_diferencias, al_paso, bloque)
+
+    # Lo compartido se prepara una vez, antes de abrir las corridas
+    topologia = cargar_topologia(ARCHIVO_RED)
+    _, entradas, salidas, permitidos = configurar_calles(topologia)
+    demanda = Demanda(perfil, semilla, entradas, salidas, pasos, permitidos)
+    if calentamiento:
+        obtener_estado(perfil, semilla, pasos, calentamiento, controlador_calentamiento)
+
+    try:
+        with ThreadPoolExecutor(max_workers=len(modos), thread_name_prefix="pareado") as hilos:
+            futuros = [hilos.submit(participante.ejecutar, modo, perfil, semilla,
+                                    os.path.join(carpeta, f"{modo}_s{semilla}{formato}"), pasos=pasos,
+                                    label=f"pareado-{modo}-{perfil}-{semilla}", calentamiento=calentamiento,
+                                    controlador_calentamiento=controlador_calentamiento, demanda=demanda)
+                       for modo, participante in zip(modos, comparacion.participantes)]
+            errores = [f.exception() for f in futuros]
+    finally:
+        comparacion.cerrar()
+
+    # La causa primero: las demás corridas solo ven la barrera rota
+    fallidos = [e for e in errores if e is not None]
+    if fallidos:
+        raise next((e for e in fallidos if not isinstance(e, threading.BrokenBarrierError)), fallidos[0])
+    return {
+        "resultados": {modo: f.result() for modo, f in zip(modos, futuros)},
+        "diferencias": archivo_diferencias,
+        "final": comparacion.ultima,
+        "segundos": time.perf_counter() - inicio,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Corre varios controladores en paralelo paso a paso sobre la misma "
+                                                 "demanda y muestra sus diferencias mientras avanzan.")
+    parser.add_argument("--modos", nargs="+", default=["fijo", "ia"], choices=MODOS,
+                        help="El primero es la referencia de las diferencias")
+    parser.add_argument("--perfil", default="pulsos", choices=PERFILES)
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--pasos", type=int, default=3000)
+    parser.add_argument("--directorio", default=DIRECTORIO_PAREADOS)
+    parser.add_argument("--calentamiento", type=int, default=0)
+    parser.add_argument("--formato", default="xml", choices=["xml", "viajes"])
+    parser.add_argument("--bloque", type=int, default=BLOQUE,
+                        help="Pasos entre sincronizaciones de las corridas (1: paso a paso estricto)")
+    parser.add_argument("--cada", type=int, default=300, help="Pasos entre líneas de progreso en la consola")
+    args = parser.parse_args(argv)
+
+    referencia, otros = args.modos[0], args.modos[1:]
+
+    def mostrar(fila):
+        if fila["paso"] % args.cada == 0 or fila["paso"] == args.pasos - 1:
+            difs = ", ".join(f"{modo} {fila[f'dif_espera_{modo}']:+.0f} veh·s "
+                             f"({fila[f'dif_detenidos_{modo}']:+d} detenidos)" for modo in otros)
+            print(f"⏱️ paso {fila['paso']}: espera {referencia} {fila[f'espera_{referencia}']:.0f} veh·s | {difs}")
+
+    print(f"🚀 {' vs '.join(args.modos)} en paralelo sobre '{args.perfil}' (semilla {args.semilla})...")
+    resultado = comparar_en_paralelo(args.modos, args.perfil, args.semilla, args.pasos, args.directorio,
+                                     args.calentamiento, formato=".xml" if args.formato == "xml" else EXTENSION_VIAJES,
+                                     al_paso=mostrar, bloque=args.bloque)
+    for modo, r in resultado["resultados"].items():
+        print(f"📁 {modo}: {r['archivo']} ({r['insertados']} insertados)")
+    print(f"📊 Diferencias paso a paso: {resultado['diferencias']}")
+    print(f"🏁 Comparación completa en {resultado['segundos']:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+import traci
+
+try:
+    import libsumo
+except ImportError:
+    libsumo = None
+
+# --- CAPA DE CONEXIÓN CON SUMO ---
+# Los controladores trabajan contra un objeto "conn" con la API de TraCI
+# (conn.edge, conn.trafficlight, conn.route, conn.vehicle, conn.simulationStep, conn.close).
+# - traci:   SUMO en otro proceso, cada llamada es un viaje por socket. Necesario para sumo-gui.
+# - libsumo: SUMO cargado dentro del proceso de Python, sin socket (solo sin GUI, una simulación por proceso).
+
+BACKENDS = ("traci", "libsumo")
+
+# Excepciones que puede lanzar cualquiera de los backends ante un comando inválido
+ERRORES_SUMO = (traci.TraCIException,) + ((libsumo.TraCIException,) if libsumo else ())
+# ... y cuando SUMO ya no responde (proceso caído, socket cerrado)
+ERRORES_FATALES = (traci.FatalTraCIError, OSError) + ((libsumo.FatalTraCIError,) if libsumo else ())
+
+
+class BackendTraci:
+    nombre = "traci"
+    soporta_gui = True
+
+    def iniciar(self, cmd, label=None):
+        label = label or "default"
+        traci.start(cmd, label=label)
+        return traci.getConnection(label)
+
+
+class BackendLibsumo:
+    nombre = "libsumo"
+    soporta_gui = False
+
+    def __init__(self):
+        if libsumo is None:
+            raise ImportError("libsumo no está instalado (pip install libsumo)")
+
+    def iniciar(self, cmd, label=None):
+        # libsumo es un singleton por proceso: la etiqueta no aplica
+        libsumo.start(cmd)
+        return libsumo
+
+
+def crear_backend(nombre="traci"):
+    if nombre == "traci":
+        return BackendTraci()
+    if nombre == "libsumo":
+        return BackendLibsumo()
+    raise ValueError(f"Backend desconocido: {nombre!r} (opciones: {', '.join(BACKENDS)})")
+
+
+def abrir_conexion(cmd, backend="traci", label=None, gui=False):
+    back = crear_backend(backend)
+    if gui and not back.soporta_gui:
+        raise ValueError(f"El backend '{back.nombre}' no soporta sumo-gui; usa 'traci'.")
+    return back.iniciar(cmd, label)
@@ -0,0 +1,183 @@
+import numpy as np
+import traci.constants as tc
+
+from sensado import SensorVectorial
+
+# --- CONTROLADORES (POLÍTICAS DE SEMÁFORO) ---
+# El motor (motor_semaforos.py) lleva fases, temporizadores y transiciones en amarillo;
+# el controlador solo decide, siempre para muchos semáforos a la vez (índices en arreglos):
+# - fase_objetivo: a qué fase verde ir cuando termina un verde (por defecto la siguiente del ciclo)
+# - duracion_verde: cuántos pasos dura un verde cuando empieza
+# - cortar: (opcional) qué verdes terminan antes de tiempo
+# - pasos_sin_cortar: (con cortar) cuántos pasos seguidos puede no consultarse cortar
+# Tiempos en segundos del controlador (10 pasos = 1 "segundo", como en main2.py).
+
+# CICLO FIJO INEFICIENTE (Para resaltar la IA): 45s es mucho si la calle se vacía a los 15s.
+TIEMPO_VERDE_FIJO = 45
+# main.py: 10s base + 4s por auto de la cola más larga, máximo 90s
+COLA_BASE, COLA_POR_AUTO, COLA_MAXIMO = 10, 4, 90
+# main2.py (IA): 6s base + 2s por auto, máximo 50s, con gap-out tras 10s
+IA_BASE, IA_POR_AUTO, IA_MAXIMO = 6, 2.0, 50
+GAP_OUT_MINIMO = 100
+# Max-pressure: cada cuánto se reevalúa la fase (verde mínimo)
+MAX_PRESION_INTERVALO = 10
+
+
+class Controlador:
+    nombre = None
+    # Si necesita las colas de los carriles controlados (suscripciones del motor)
+    sensado = False
+
+    def preparar(self, motor):
+        pass
+
+    def fase_objetivo(self, motor, idx):
+        return motor.siguiente_verde(idx)
+
+    def duracion_verde(self, motor, idx):
+        raise NotImplementedError
+
+    def cortar(self, motor, candidatos):
+        return None
+
+    def pasos_sin_cortar(self, motor):
+        # Un controlador que corta verdes sin decir cuándo se consulta en todos los pasos
+        if type(self).cortar is not Controlador.cortar:
+            return 0
+        return np.iinfo(np.int64).max
+
+
+class Fijo(Controlador):
+    nombre = "fijo"
+
+    def __init__(self, verde=TIEMPO_VERDE_FIJO):
+        self.verde = verde
+
+    def duracion_verde(self, motor, idx):
+        return np.full(len(idx), self.verde * 10, dtype=np.int64)
+
+
+class Cola(Controlador):
+    # Verde proporcional a la cola más larga de las calles de acceso (main.py)
+    nombre = "cola"
+    sensado = True
+
+    def __init__(self, base=COLA_BASE, por_auto=COLA_POR_AUTO, maximo=COLA_MAXIMO):
+        self.base = base
+        self.por_auto = por_auto
+        self.maximo = maximo
+
+    def duracion_verde(self, motor, idx):
+        tiempo = np.clip(self.base + motor.leer_max_cola(idx) * self.por_auto, self.base, self.maximo)
+        return (tiempo * 10).astype(np.int64)
+
+
+class GapOut(Cola):
+    # IA de main2.py: como Cola con otros tiempos, y corta el verde si sus carriles se vacían
+    nombre = "ia"
+
+    def __init__(self, base=IA_BASE, por_auto=IA_POR_AUTO, maximo=IA_MAXIMO, minimo=GAP_OUT_MINIMO):
+        super().__init__(base, por_auto, maximo)
+        self.minimo = minimo
+
+    def cortar(self, motor, candidatos):
+        candidatos = candidatos & (motor.temporizador > self.minimo)
+        if not candidatos.any():
+            return None
+        return candidatos & (motor.vehiculos_en_verde(candidatos) == 0)
+
+    def pasos_sin_cortar(self, motor):
+        # Mientras algún verde pueda cortarse hay que mirar sus carriles en cada paso; los
+        # temporizadores solo bajan, así que después de eso ya no se consulta hasta el próximo verde
+        en_verde = motor.verdes()
+        if (en_verde & (motor.temporizador - 1 > self.minimo)).any():
+            return 0
+        return np.iinfo(np.int64).max
+
+
+class MaxPresion(Controlador):
+    # Presión de un movimiento = vehículos en el carril de entrada - vehículos en el de salida.
+    # Presión de una fase = suma de sus movimientos con verde: una matriz de incidencia dispersa
+    # (fase × movimiento) por el vector de presiones, para todas las intersecciones a la vez.
+    nombre = "max_presion"
+
+    def __init__(self, intervalo=MAX_PRESION_INTERVALO):
+        self.intervalo = intervalo
+
+    def preparar(self, motor):
+        topologia = motor.topologia
+        d = topologia.datos
+        n = len(motor.semaforos)
+        self._max_fases = motor.es_verde.shape[1]
+        local = np.full(len(topologia.semaforos), -1, dtype=np.int64)
+        local[[topologia.indice_semaforo[t] for t in motor.semaforos]] = np.arange(n)
+
+        # Movimientos señalizados de los semáforos que maneja el motor
+        propios = np.flatnonzero((d["mov_semaforo"] >= 0) & (d["mov_enlace"] >= 0))
+        propios = propios[local[d["mov_semaforo"][propios]] >= 0]
+        semaforo = local[d["mov_semaforo"][propios]]
+        enlace = d["mov_enlace"][propios]
+
+        # Incidencia en formato coordenado: fila = semáforo * max_fases + fase, columna = movimiento
+        inicio_fases = np.concatenate(([0], np.cumsum(topologia.num_fases)))
+        filas, columnas = [], []
+        for i, tls in enumerate(motor.semaforos):
+            t = topologia.indice_semaforo[tls]
+            estados = d["estados"][inicio_fases[t]:inicio_fases[t + 1]]
+            movs = np.flatnonzero(semaforo == i)
+            if not len(estados) or not movs.size:
+                continue
+            matriz = np.array([list(s) for s in estados.tolist()])
+            validos = movs[enlace[movs] < matriz.shape[1]]
+            fase, columna = np.nonzero(np.isin(matriz[:, enlace[validos]], ["G", "g"]))
+            filas.append(i * self._max_fases + fase)
+            columnas.append(validos[columna])
+        self._filas = np.concatenate(filas) if filas else np.zeros(0, dtype=np.int64)
+        self._columnas = np.concatenate(columnas) if columnas else np.zeros(0, dtype=np.int64)
+        self._semaforo_fila = self._filas // self._max_fases
+
+        # Carriles de entrada y salida de los movimientos (una sola suscripción por carril)
+        desde, hacia = d["mov_desde"][propios], d["mov_hacia"][propios]
+        carriles, inversa = np.unique(np.concatenate([desde, hacia]), return_inverse=True)
+        self._entrada, self._salida = inversa[:len(desde)], inversa[len(desde):]
+        self._semaforo_mov = semaforo
+        self.sensor = SensorVectorial(motor.conn, [topologia.carriles[c] for c in carriles.tolist()], "lane")
+        self._vehiculos = np.zeros(len(carriles), dtype=np.int64)
+
+    def presiones(self, motor, idx):
+        # (len(idx) × max_fases); las fases que no son verdes quedan en -inf
+        decide = np.zeros(len(motor.semaforos), dtype=bool)
+        decide[idx] = True
+        movs = decide[self._semaforo_mov]
+        # Solo se leen los carriles de los semáforos que deciden
+        carriles = np.unique(np.concatenate([self._entrada[movs], self._salida[movs]]))
+        self._vehiculos[carriles] = self.sensor.leer_variable(tc.LAST_STEP_VEHICLE_NUMBER, carriles)
+        presion_mov = self._vehiculos[self._entrada] - self._vehiculos[self._salida]
+
+        # Producto disperso incidencia × presión (una suma por fila)
+        presion = np.bincount(self._filas, weights=presion_mov[self._columnas],
+                              minlength=len(motor.semaforos) * self._max_fases)
+        presion = presion.reshape(len(motor.semaforos), self._max_fases)[idx]
+        return np.where(motor.es_verde[idx], presion, -np.inf)
+
+    def fase_objetivo(self, motor, idx):
+        presion = self.presiones(motor, idx)
+        # Los empates favorecen la fase actual (evita amarillos innecesarios)
+        actual = motor.fase[idx]
+        presion[np.arange(len(idx)), actual] += 0.5
+        return np.argmax(presion, axis=1)
+
+    def duracion_verde(self, motor, idx):
+        return np.full(len(idx), self.intervalo * 10, dtype=np.int64)
+
+
+CONTROLADORES = {c.nombre: c for c in (Fijo, Cola, GapOut, MaxPresion)}
+
+
+def crear_controlador(controlador, **parametros):
+    # Nombre registrado (con sus constantes opcionales) o instancia ya configurada
+    if isinstance(controlador, Controlador):
+        return controlador
+    if controlador not in CONTROLADORES:
+        raise ValueError(f"Controlador desconocido: {controlador!r} (opciones: {', '.join(CONTROLADORES)})")
+    return CONTROLADORES[controlador](**parametros)
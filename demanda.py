@@ -0,0 +1,160 @@
+import argparse
+import copy
+import zlib
+from xml.sax.saxutils import quoteattr
+
+import numpy as np
+
+from archivos import escribir_atomico
+from conexion import ERRORES_SUMO
+
+# --- DEMANDA PRECOMPILADA ---
+# Los perfiles se compilan una sola vez en un calendario de inserciones (paso, origen, ruta):
+# - Una ruta por par origen/destino ("ruta_{origen}_{destino}"), no una por vehículo.
+# - Cada origen tiene sus propios generadores NumPy derivados de (semilla, nombre del origen),
+#   así el resultado no depende del orden de ejecución ni de cuántos procesos corran.
+# - Llegadas y destinos salen de flujos separados: el calendario de un horizonte corto es el
+#   comienzo exacto del de uno largo (sortear más llegadas no corre los destinos de las primeras).
+
+# perfil -> (pasos en los que se intenta generar, probabilidad de llegada por entrada)
+PERFILES_DEMANDA = {
+    # Hora Pico: cada 6 pasos, 60% de probabilidad por entrada
+    "hora_pico": (lambda pasos: pasos % 6 == 0, 0.6),
+    # Pulsos: tráfico solo en la primera mitad de cada ciclo de 600 pasos
+    "pulsos": (lambda pasos: pasos % 600 < 300, 0.15),
+}
+
+TIPO_VEHICULO = "DEFAULT_VEHTYPE"
+# Flujos aleatorios de cada origen
+FLUJO_LLEGADAS, FLUJO_DESTINOS = 0, 1
+
+
+def opuesto(calle):
+    return calle[1:] if calle.startswith("-") else f"-{calle}"
+
+
+def generador_origen(semilla, origen, flujo=FLUJO_LLEGADAS):
+    # Flujo independiente y estable por origen (crc32 no depende del hash de Python)
+    return np.random.default_rng(np.random.SeedSequence([semilla, zlib.crc32(origen.encode()), flujo]))
+
+
+class Demanda:
+    # permitidos: {origen: destinos alcanzables} según la topología de la red;
+    # sin él se descarta solo la vuelta en U por nombre ("-E10" <-> "E10")
+    def __init__(self, perfil, semilla, entradas, salidas, pasos, permitidos=None):
+        if perfil not in PERFILES_DEMANDA:
+            raise ValueError(f"Perfil desconocido: {perfil!r} (opciones: {', '.join(PERFILES_DEMANDA)})")
+        self.perfil = perfil
+        self.semilla = semilla
+
+        activo, probabilidad = PERFILES_DEMANDA[perfil]
+        todos = np.arange(pasos)
+        candidatos = todos[activo(todos)]
+
+        # Rutas internadas: una por par origen/destino válido (sin vuelta en U)
+        self.rutas = []
+        pasos_por_origen, rutas_por_origen, origen_por_origen = [], [], []
+        for i, origen in enumerate(entradas):
+            if permitidos is None:
+                destinos = [s for s in salidas if s != opuesto(origen)]
+            else:
+                destinos = [s for s in salidas if s in permitidos.get(origen, ())]
+            if not destinos:
+                continue
+            base = len(self.rutas)
+            self.rutas += [(f"ruta_{origen}_{d}", origen, d) for d in destinos]
+
+            # Llegadas (Bernoulli) y destinos sorteados de forma vectorizada, cada uno con su flujo:
+            # la k-ésima llegada del origen tiene siempre el mismo destino, sea cual sea `pasos`
+            llegadas = candidatos[generador_origen(semilla, origen).random(len(candidatos)) < probabilidad]
+            pasos_por_origen.append(llegadas)
+            destinos_rng = generador_origen(semilla, origen, FLUJO_DESTINOS)
+            rutas_por_origen.append(base + destinos_rng.integers(len(destinos), size=len(llegadas)))
+            origen_por_origen.append(np.full(len(llegadas), i))
+
+        self.entradas = list(entradas)
+        if pasos_por_origen:
+            paso = np.concatenate(pasos_por_origen)
+            orden = np.argsort(paso, kind="stable")
+            self.paso = paso[orden]
+            self.ruta = np.concatenate(rutas_por_origen)[orden]
+            self.origen = np.concatenate(origen_por_origen)[orden]
+        else:
+            self.paso = self.ruta = self.origen = np.zeros(0, dtype=np.int64)
+
+        # Identificadores resueltos de antemano: insertar() solo recorre listas
+        self._ids = [f"auto_{self.entradas[o]}_{k}" for k, o in zip(self.paso.tolist(), self.origen.tolist())]
+        self._ruta_ids = [self.rutas[r][0] for r in self.ruta.tolist()]
+
+        # Índices del calendario por paso: inserciones del paso k = [inicio[k], inicio[k+1])
+        self._inicio = np.searchsorted(self.paso, np.arange(pasos + 1)).tolist()
+        self.insertados = 0
+        self.fallidos = 0
+
+    def __len__(self):
+        return len(self.paso)
+
+    def vehiculos(self):
+        # (paso, id_vehiculo, id_ruta) en orden de inserción
+        return zip(self.paso.tolist(), self._ids, self._ruta_ids)
+
+    def copia(self):
+        # Mismo calendario (arreglos y listas compartidos, de solo lectura) con contadores propios:
+        # varias conexiones reciben exactamente las mismas inserciones (comparacion.py)
+        otra = copy.copy(self)
+        otra.insertados = otra.fallidos = 0
+        return otra
+
+    def proximo_paso(self, step):
+        # Primer paso >= step con inserciones (len(self._inicio) - 1 si no quedan)
+        j = np.searchsorted(self.paso, step)
+        return int(self.paso[j]) if j < len(self.paso) else len(self._inicio) - 1
+
+    def preparar(self, conn):
+        # Las rutas se registran una sola vez al inicio de la simulación
+        # (tras cargar un estado guardado ya existen y no se vuelven a agregar)
+        existentes = set(conn.route.getIDList())
+        for ruta_id, origen, destino in self.rutas:
+            if ruta_id not in existentes:
+                conn.route.add(ruta_id, [origen, destino])
+
+    def insertar(self, conn, step):
+        if step + 1 >= len(self._inicio):
+            return
+        for j in range(self._inicio[step], self._inicio[step + 1]):
+            try:
+                conn.vehicle.add(self._ids[j], self._ruta_ids[j], typeID=TIPO_VEHICULO)
+                self.insertados += 1
+            except ERRORES_SUMO:
+                # Inserción rechazada por SUMO: se cuenta en lugar de ocultarla
+                self.fallidos += 1
+
+    def escribir_rou(self, archivo, paso_segundos=1.0):
+        # Alternativa sin TraCI: el mismo calendario como archivo de rutas de SUMO.
+        # Un vehículo insertado tras el paso k sale en t = (k + 1) * paso_segundos.
+        # Escritura atómica: SUMO o el dashboard nunca leen un .rou.xml a medio escribir
+        def escribir(f):
+            f.write('<?xml version="1.0" encoding="UTF-8"?>\n<routes>\n')
+            for ruta_id, origen, destino in self.rutas:
+                f.write(f'    <route id={quoteattr(ruta_id)} edges={quoteattr(origen + " " + destino)}/>\n')
+            for k, vid, ruta_id in self.vehiculos():
+                f.write(f'    <vehicle id={quoteattr(vid)} type="{TIPO_VEHICULO}" route={quoteattr(ruta_id)} '
+                        f'depart="{(k + 1) * paso_segundos:.2f}"/>\n')
+            f.write("</routes>\n")
+
+        escribir_atomico(archivo, escribir, "w", "utf-8")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precompila un perfil de demanda a un archivo .rou.xml.")
+    parser.add_argument("--perfil", default="pulsos", choices=list(PERFILES_DEMANDA))
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--pasos", type=int, default=3000)
+    parser.add_argument("--entradas", nargs="+", default=["-E11", "-E9", "E10", "E12"])
+    parser.add_argument("--salida", default="demanda.rou.xml")
+    args = parser.parse_args()
+
+    salidas = [opuesto(c) for c in args.entradas]
+    demanda = Demanda(args.perfil, args.semilla, args.entradas, salidas, args.pasos)
+    demanda.escribir_rou(args.salida)
+    print(f"📁 {len(demanda)} vehículos y {len(demanda.rutas)} rutas en: {args.salida}")
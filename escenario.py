@@ -0,0 +1,306 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+
+from archivos import escribir_atomico
+from cache_resultados import huella
+from conexion import abrir_conexion
+from controladores import CONTROLADORES, crear_controlador
+from demanda import PERFILES_DEMANDA, Demanda
+from instrumentacion import Instrumentacion
+from meandata import PERIODO as PERIODO_MEANDATA, escribir_adicional, rutas_meandata
+from metricas_vivo import INTERVALO as INTERVALO_VIVO, PublicadorVivo
+from motor_semaforos import TIEMPO_AMARILLO, MotorSemaforos
+from registro_viajes import EXTENSION as EXTENSION_VIAJES, OPCIONES_ESTADO, RegistradorViajes
+from topologia import cargar_topologia
+
+# --- CONFIGURACIÓN ---
+DIRECTORIO_BASE = os.path.dirname(os.path.abspath(__file__))
+ARCHIVO_CONFIG = os.path.join(DIRECTORIO_BASE, "config.sumocfg")
+ARCHIVO_RED = os.path.join(DIRECTORIO_BASE, "red.net.xml")
+DIRECTORIO_ESTADOS = os.path.join(DIRECTORIO_BASE, ".cache", "estados")
+# Ruta histórica de la instalación en Windows (se usa si no hay SUMO_HOME ni PATH)
+DIRECTORIO_SUMO_WINDOWS = r"C:\Program Files (x86)\Eclipse\Sumo\bin"
+
+ID_SEMAFORO = "J19"
+
+MODOS = tuple(CONTROLADORES)
+PERFILES = tuple(PERFILES_DEMANDA)
+
+
+def ruta_ejecutable(nombre):
+    # Busca un ejecutable de SUMO (sumo, sumo-gui, netgenerate...): primero en SUMO_HOME, luego en el PATH
+    candidatos = []
+    sumo_home = os.environ.get("SUMO_HOME")
+    if sumo_home:
+        candidatos.append(os.path.join(sumo_home, "bin", nombre))
+    candidatos.append(os.path.join(DIRECTORIO_SUMO_WINDOWS, nombre))
+
+    for candidato in candidatos:
+        for ruta in (candidato, candidato + ".exe"):
+            if os.path.isfile(ruta):
+                return ruta
+
+    encontrado = shutil.which(nombre)
+    if encontrado:
+        return encontrado
+    raise FileNotFoundError(f"No se encontró '{nombre}'. Configura SUMO_HOME o agrega SUMO al PATH.")
+
+
+def ruta_binario_sumo(gui=False):
+    # 'sumo' (headless) o 'sumo-gui'
+    return ruta_ejecutable("sumo-gui" if gui else "sumo")
+
+
+def comando_sumo(archivo_salida, semilla, gui=False, opciones=()):
+    # archivo_salida=None: sin --tripinfo-output (los viajes los registra registro_viajes.py)
+    cmd = [ruta_binario_sumo(gui), "-c", ARCHIVO_CONFIG]
+    if archivo_salida is not None:
+        cmd += ["--tripinfo-output", archivo_salida]
+    cmd += [
+        "--device.emissions.probability", "0",
+        "--seed", str(semilla),
+    ]
+    if gui:
+        # Usamos --start para que arranque solo
+        cmd.append("--start")
+    else:
+        cmd += ["--no-step-log", "true", "--no-warnings", "true"]
+    return cmd + list(opciones)
+
+
+def configurar_calles(topologia, id_semaforo=ID_SEMAFORO):
+    # 1. Validación
+    lista_tls = topologia.semaforos
+    if id_semaforo not in lista_tls:
+        if not lista_tls:
+            return None, [], [], {}
+        id_semaforo = lista_tls[0]
+
+    # 2. Calles de acceso y destinos válidos según los giros de la red (sin vuelta en U)
+    entradas = topologia.calles_controladas(id_semaforo)
+    permitidos = topologia.destinos_validos(id_semaforo)
+    # Salidas en el orden de sus entradas inversas; las que no tengan inversa, al final
+    inversas = [topologia.inversa(c) for c in entradas]
+    alcanzables = set().union(*permitidos.values())
+    salidas = [c for c in inversas if c in alcanzables]
+    salidas += sorted(alcanzables.difference(salidas))
+    return id_semaforo, entradas, salidas, permitidos
+
+
+# traci.start elige un puerto libre y lo suelta antes de lanzar SUMO: dos hilos que abren
+# a la vez (comparacion.py) podrían elegir el mismo
+_ABRIENDO = threading.Lock()
+
+
+def _conectar(cmd, backend, label, gui, trabajador):
+    # Con un trabajador del pool (pool_sumo.py) se reusa su SUMO ya abierto
+    if trabajador is not None:
+        return trabajador.conexion(cmd, label)
+    with _ABRIENDO:
+        return abrir_conexion(cmd, backend, label=label, gui=gui)
+
+
+def _desconectar(conn, trabajador):
+    # El SUMO del trabajador no se cierra: se libera (cierra las salidas) para el próximo trabajo
+    if trabajador is not None:
+        trabajador.liberar()
+    else:
+        conn.close()
+
+
+# --- CALENTAMIENTO (CHECKPOINTS DE ESTADO) ---
+# Los primeros pasos solo llenan las colas. Se simulan una vez (con el controlador de
+# calentamiento), se guarda el estado completo de SUMO (vehículos, rutas, semáforos y
+# generador aleatorio) y las corridas siguientes arrancan desde ahí: todas las variantes
+# parten de las mismas condiciones y comparten el costo del calentamiento.
+def clave_estado(perfil, semilla, calentamiento, controlador="fijo"):
+    # Sin el total de pasos: el calendario de demanda de cualquier horizonte empieza igual, así que
+    # el estado tras el calentamiento es el mismo para todos (p. ej. las rondas de ajuste.py)
+    contenido = json.dumps([huella(ARCHIVO_RED), huella(ARCHIVO_CONFIG), perfil, semilla,
+                            calentamiento, controlador])
+    return hashlib.blake2b(contenido.encode(), digest_size=20).hexdigest()
+
+
+def obtener_estado(perfil, semilla, pasos, calentamiento, controlador="fijo", backend="traci",
+                   directorio=DIRECTORIO_ESTADOS, trabajador=None):
+    # Ruta del estado guardado tras `calentamiento` pasos; se simula solo si no está en caché
+    ruta = os.path.join(directorio, f"{clave_estado(perfil, semilla, calentamiento, controlador)}.xml.gz")
+    if os.path.exists(ruta):
+        return ruta
+
+    os.makedirs(directorio, exist_ok=True)
+    cmd = comando_sumo(os.devnull, semilla, opciones=["--save-state.rng", "true"])
+    conn = _conectar(cmd, backend, f"calentamiento-{perfil}-{semilla}-{calentamiento}", False, trabajador)
+    try:
+        topologia = cargar_topologia(ARCHIVO_RED)
+        _, entradas, salidas, permitidos = configurar_calles(topologia)
+        demanda = Demanda(perfil, semilla, entradas, salidas, pasos, permitidos)
+        demanda.preparar(conn)
+        motor = MotorSemaforos(conn, topologia, controlador)
+        for step in range(calentamiento):
+            conn.simulationStep()
+            demanda.insertar(conn, step)
+            motor.paso()
+        # Escritura atómica: varios procesos pueden pedir el mismo estado a la vez
+        escribir_atomico(ruta, conn.simulation.saveState)
+    finally:
+        _desconectar(conn, trabajador)
+    return ruta
+
+
+# --- EJECUCIÓN DE UN ESCENARIO ---
+def ejecutar_escenario(modo, perfil, semilla, archivo_salida, pasos=3000, gui=False, label=None, verbose=False,
+                       backend="traci", parametros=None, opciones_sumo=(), calentamiento=0,
+                       controlador_calentamiento="fijo", trabajador=None, instrumentar=False, intervalo_metricas=0,
+                       vivo=None, intervalo_vivo=INTERVALO_VIVO, avance_rapido=True, demanda=None, pareado=None,
+                       meandata=0, nivel_meandata="edge"):
+    # parametros: constantes del controlador (p. ej. {"base": 6, "maximo": 50}) y "amarillo" en pasos
+    # calentamiento: pasos iniciales que se toman de un estado guardado en lugar de simularse
+    # instrumentar: tiempos por etapa y por comando TraCI en <archivo_salida>.metricas.json / .prom
+    # vivo: base SQLite donde se publican colas, fases y llegadas mientras corre (dashboard en vivo)
+    # archivo_salida terminado en .viajes: registro binario compacto en lugar del tripinfo XML
+    # avance_rapido: los tramos sin eventos (inserciones, vencimientos, consultas del controlador)
+    # se simulan con un solo simulationStep; el resultado es el mismo que paso a paso
+    # demanda: calendario ya compilado (Demanda) para compartir entre corridas; se usa una copia
+    # pareado: participante de una ejecución paso a paso junto a otras corridas (comparacion.py)
+    # meandata: período (s) de los datos agregados por calle o carril (nivel_meandata), tráfico y
+    # emisiones en <salida>.trafico.xml / .emisiones.xml (meandata.py); 0: sin ellos
+    if modo not in MODOS:
+        raise ValueError(f"Modo desconocido: {modo!r} (opciones: {', '.join(MODOS)})")
+    if perfil not in PERFILES:
+        raise ValueError(f"Perfil desconocido: {perfil!r} (opciones: {', '.join(PERFILES)})")
+
+    directorio = os.path.dirname(archivo_salida)
+    if directorio:
+        os.makedirs(directorio, exist_ok=True)
+
+    label = label or f"{modo}-{perfil}-{semilla}"
+    parametros = dict(parametros or {})
+    amarillo = parametros.pop("amarillo", TIEMPO_AMARILLO)
+    controlador = crear_controlador(modo, **parametros)
+    if not 0 <= calentamiento < pasos:
+        raise ValueError(f"El calentamiento ({calentamiento}) debe ser menor que los pasos ({pasos})")
+    # El estado se prepara antes de abrir la corrida (libsumo admite una sola simulación por proceso)
+    estado = obtener_estado(perfil, semilla, pasos, calentamiento, controlador_calentamiento, backend,
+                            trabajador=trabajador) if calentamiento else None
+    compacto = archivo_salida.endswith(EXTENSION_VIAJES)
+    if compacto and estado is not None:
+        opciones_sumo = tuple(opciones_sumo) + OPCIONES_ESTADO
+    base = os.path.splitext(archivo_salida)[0]
+    if meandata:
+        # Emisiones agregadas por el simulador: sin dispositivo de emisiones por vehículo
+        adicional = escribir_adicional(base, meandata, nivel_meandata)
+        opciones_sumo = tuple(opciones_sumo) + ("--additional-files", adicional)
+    cmd = comando_sumo(None if compacto else archivo_salida, semilla, gui, opciones_sumo)
+    conn = _conectar(cmd, backend, label, gui, trabajador)
+
+    instrumentacion = None
+    if instrumentar:
+        instrumentacion = Instrumentacion(base + ".metricas", intervalo_metricas,
+                                          {"modo": modo, "perfil": perfil, "semilla": semilla, "backend": backend})
+    sumo = conn
+    publicador = registrador = None
+
+    step = 0
+    llamadas = 0
+    try:
+        if estado is not None:
+            conn.simulation.loadState(estado)
+            step = calentamiento
+        if instrumentacion is not None:
+            conn = instrumentacion.envolver(conn)
+
+        # Estructura de la red precomputada (caché en disco por hash del .net.xml)
+        topologia = cargar_topologia(ARCHIVO_RED)
+        id_semaforo, entradas, salidas, permitidos = configurar_calles(topologia)
+        if id_semaforo is None:
+            return {"archivo": archivo_salida, "pasos": 0}
+
+        # SEMILLA FIJA: Igualdad de condiciones (calendario precompilado por origen)
+        if demanda is None:
+            demanda = Demanda(perfil, semilla, entradas, salidas, pasos, permitidos)
+        else:
+            demanda = demanda.copia()
+        demanda.preparar(conn)
+
+        # Motor de control: todos los semáforos de la red en una pasada por paso
+        motor = MotorSemaforos(conn, topologia, controlador, amarillo=amarillo)
+        if pareado is not None:
+            # Antes del publicador y del registrador: sus suscripciones de la simulación incluyen la de él
+            pareado.iniciar(conn, motor, demanda)
+        if vivo is not None:
+            publicador = PublicadorVivo(vivo, conn, motor, modo, perfil, semilla, backend, pasos, intervalo_vivo)
+        if compacto:
+            # Después del publicador: su suscripción de la simulación amplía la de él (una por conexión)
+            registrador = RegistradorViajes(archivo_salida, conn, demanda,
+                                            {"modo": modo, "perfil": perfil, "semilla": semilla, "pasos": pasos})
+
+        # Instrumentación, publicación en vivo, registro compacto y ejecución pareada miran cada paso:
+        # sin avance rápido
+        saltar = (avance_rapido and instrumentacion is None and publicador is None and registrador is None
+                  and pareado is None)
+        if saltar:
+            dt = conn.simulation.getDeltaT()
+            t0, s0 = conn.simulation.getTime(), step
+
+        while step < pasos:
+            llamadas += 1
+            if saltar:
+                libres = min(motor.pasos_libres(), demanda.proximo_paso(step) - step, pasos - step)
+                if libres > 1:
+                    # Hasta el próximo evento el bucle solo descontaría temporizadores
+                    conn.simulationStep(t0 + (step + libres - s0) * dt)
+                    motor.avanzar(libres)
+                    step += libres
+                    continue
+            if instrumentacion is None:
+                conn.simulationStep()
+
+                # --- 1. GENERADOR DE TRÁFICO ---
+                demanda.insertar(conn, step)
+
+                # --- 2. LÓGICA DE CONTROL ---
+                cambian = motor.paso()
+            else:
+                # Mismo bucle, con el tiempo de cada etapa
+                t = instrumentacion.marca()
+                conn.simulationStep()
+                t = instrumentacion.fin("simulacion", t)
+                demanda.insertar(conn, step)
+                t = instrumentacion.fin("demanda", t)
+                cambian = motor.paso()
+                instrumentacion.fin("control", t)
+                instrumentacion.paso()
+            if registrador is not None:
+                registrador.paso()
+            if publicador is not None:
+                publicador.paso(step, cambian, demanda.insertados)
+            if pareado is not None:
+                pareado.paso(step)
+            if verbose and motor.controlador.sensado:
+                for i in cambian.tolist():
+                    if motor.en_verde(i):
+                        print(f"🧠 IA ASIGNA: {motor.temporizador[i] / 10:.1f}s "
+                              f"({motor.semaforos[i]}, Cola: {motor.max_cola[i]})")
+
+            step += 1
+    finally:
+        if pareado is not None:
+            # También si la corrida falló: las demás no quedan esperándola
+            pareado.cerrar()
+        if publicador is not None:
+            publicador.cerrar()
+        if registrador is not None:
+            registrador.cerrar()
+        _desconectar(sumo, trabajador)
+
+    resultado = {"archivo": archivo_salida, "pasos": step, "llamadas_paso": llamadas, "insertados": demanda.insertados,
+                 "fallidos": demanda.fallidos}
+    if instrumentacion is not None:
+        resultado["metricas"] = instrumentacion.exportar()
+    if meandata:
+        resultado["meandata"] = rutas_meandata(base)
+    return resultado
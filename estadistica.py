@@ -0,0 +1,162 @@
+import argparse
+import math
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from cache_resultados import buscar_en_cache, cargar_tripinfo
+from registro_viajes import es_registro
+
+# --- COMPARACIÓN ESTADÍSTICA ENTRE CONTROLADORES (N CORRIDAS POR MODO) ---
+# La unidad independiente es la corrida (semilla), no el vehículo: cada corrida se resume
+# en su media y el bootstrap remuestrea corridas. Con una sola corrida por modo se cae
+# al remuestreo de viajes, que sobreestima la certeza y se marca como tal.
+
+METRICAS = ("waitingTime", "timeLoss", "duration")
+REMUESTREOS = 10000
+NIVEL = 0.95
+# Máximo de elementos por lote de remuestreo (acota la memoria con muchos viajes)
+MAX_ELEMENTOS_LOTE = 5_000_000
+
+
+# --- CARGA EN PARALELO ---
+def _cargar(fuente):
+    # En el proceso hijo: parsea y deja el resultado en la caché de disco
+    cargar_tripinfo(fuente)
+
+
+def cargar_corridas(fuentes, procesos=None):
+    # fuentes: rutas o BytesIO (deben poder enviarse a otro proceso)
+    # Los registros compactos (registro_viajes.py) se abren directo: no se parsean ni van a la caché
+    compactos = [es_registro(f) for f in fuentes]
+    corridas = [None if compacto else buscar_en_cache(f) for f, compacto in zip(fuentes, compactos)]
+    faltantes = [f for f, df, compacto in zip(fuentes, corridas, compactos) if df is None and not compacto]
+    if len(faltantes) > 1:
+        with ProcessPoolExecutor(max_workers=procesos) as pool:
+            list(pool.map(_cargar, faltantes))
+    for i, f in enumerate(fuentes):
+        if corridas[i] is None:
+            corridas[i] = cargar_tripinfo(f)
+    return corridas
+
+
+# --- BOOTSTRAP VECTORIZADO ---
+def _medias_bootstrap(valores, remuestreos, rng):
+    # Matriz (remuestreos × n) de índices, procesada por lotes; una media por fila
+    n = len(valores)
+    lote = max(1, MAX_ELEMENTOS_LOTE // max(n, 1))
+    medias = np.empty(remuestreos)
+    for inicio in range(0, remuestreos, lote):
+        fin = min(inicio + lote, remuestreos)
+        indices = rng.integers(0, n, size=(fin - inicio, n))
+        medias[inicio:fin] = valores[indices].mean(axis=1)
+    return medias
+
+
+def intervalo_bootstrap(referencia, propuesto, remuestreos=REMUESTREOS, nivel=NIVEL, semilla=0):
+    # IC percentil de la diferencia de medias (propuesto - referencia) y de su % relativo
+    rng = np.random.default_rng(semilla)
+    referencia = np.asarray(referencia, dtype=np.float64)
+    propuesto = np.asarray(propuesto, dtype=np.float64)
+    medias_ref = _medias_bootstrap(referencia, remuestreos, rng)
+    medias_prop = _medias_bootstrap(propuesto, remuestreos, rng)
+
+    delta = medias_prop - medias_ref
+    relativo = delta / medias_ref * 100
+    colas = [(1 - nivel) / 2 * 100, (1 + nivel) / 2 * 100]
+    return np.percentile(delta, colas), np.nanpercentile(relativo, colas)
+
+
+# --- PRUEBA DE RANGOS (MANN-WHITNEY U) ---
+def _rangos(valores):
+    # Rangos promedio (empates comparten rango), base 1
+    orden = np.argsort(valores, kind="mergesort")
+    ordenados = valores[orden]
+    nuevos = np.concatenate(([True], ordenados[1:] != ordenados[:-1]))
+    grupo = np.cumsum(nuevos) - 1
+    inicio_grupo = np.flatnonzero(nuevos)
+    fin_grupo = np.append(inicio_grupo[1:], len(valores))
+    promedio = (inicio_grupo + fin_grupo + 1) / 2
+    rangos = np.empty(len(valores))
+    rangos[orden] = promedio[grupo]
+    return rangos, fin_grupo - inicio_grupo
+
+
+def mann_whitney(a, b):
+    # U de a frente a b y p-valor bilateral (aproximación normal con corrección por empates)
+    a = np.asarray(a, dtype=np.float64)
+    b = np.asarray(b, dtype=np.float64)
+    n1, n2 = len(a), len(b)
+    if n1 == 0 or n2 == 0:
+        return float("nan"), float("nan")
+    rangos, empates = _rangos(np.concatenate([a, b]))
+    u = rangos[:n1].sum() - n1 * (n1 + 1) / 2
+
+    n = n1 + n2
+    media = n1 * n2 / 2
+    varianza = n1 * n2 / 12 * ((n + 1) - (empates ** 3 - empates).sum() / (n * (n - 1)))
+    if varianza <= 0:
+        return u, 1.0
+    z = (abs(u - media) - 0.5) / math.sqrt(varianza)
+    return u, math.erfc(max(z, 0) / math.sqrt(2))
+
+
+# --- API DE COMPARACIÓN ---
+def comparar(corridas_por_modo, referencia, metricas=METRICAS, remuestreos=REMUESTREOS, nivel=NIVEL, semilla=0):
+    # corridas_por_modo: {modo: [DataFrame por corrida]}
+    filas = []
+    for modo, corridas in corridas_por_modo.items():
+        if modo == referencia:
+            continue
+        base = corridas_por_modo[referencia]
+        por_corrida = len(base) > 1 and len(corridas) > 1
+        for metrica in metricas:
+            if por_corrida:
+                muestra_ref = np.array([df[metrica].mean() for df in base])
+                muestra = np.array([df[metrica].mean() for df in corridas])
+            else:
+                muestra_ref = np.concatenate([df[metrica].to_numpy() for df in base])
+                muestra = np.concatenate([df[metrica].to_numpy() for df in corridas])
+
+            (ic_inf, ic_sup), (rel_inf, rel_sup) = intervalo_bootstrap(
+                muestra_ref, muestra, remuestreos, nivel, semilla)
+            _, p_valor = mann_whitney(muestra, muestra_ref)
+            media_ref, media = muestra_ref.mean(), muestra.mean()
+            filas.append({
+                "Métrica": metrica,
+                "Modo": modo,
+                "Unidad": "corrida" if por_corrida else "viaje",
+                "n Ref.": len(muestra_ref),
+                "n": len(muestra),
+                "Media Ref.": media_ref,
+                "Media": media,
+                "Δ": media - media_ref,
+                "Δ IC inf": ic_inf,
+                "Δ IC sup": ic_sup,
+                "Δ% IC inf": rel_inf,
+                "Δ% IC sup": rel_sup,
+                "p (Mann-Whitney)": p_valor,
+            })
+    return pd.DataFrame(filas)
+
+
+def comparar_archivos(archivos_por_modo, referencia, procesos=None, **kwargs):
+    todas = [f for archivos in archivos_por_modo.values() for f in archivos]
+    cargadas = iter(cargar_corridas(todas, procesos))
+    corridas = {modo: [next(cargadas) for _ in archivos] for modo, archivos in archivos_por_modo.items()}
+    return comparar(corridas, referencia, **kwargs)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compara N corridas por controlador con IC bootstrap y prueba de rangos.")
+    parser.add_argument("--fijo", nargs="+", required=True, help="Archivos tripinfo del modo fijo (referencia)")
+    parser.add_argument("--ia", nargs="+", required=True, help="Archivos tripinfo del modo IA")
+    parser.add_argument("--remuestreos", type=int, default=REMUESTREOS)
+    parser.add_argument("--procesos", type=int, default=None)
+    args = parser.parse_args()
+
+    tabla = comparar_archivos({"fijo": args.fijo, "ia": args.ia}, "fijo",
+                              procesos=args.procesos, remuestreos=args.remuestreos)
+    with pd.option_context("display.width", 200, "display.max_columns", None):
+        print(tabla.round(3).to_string(index=False))
@@ -0,0 +1,115 @@
+import argparse
+import itertools
+import os
+import sys
+import time
+
+from conexion import BACKENDS
+from escenario import EXTENSION_VIAJES, MODOS, PERFILES, PERIODO_MEANDATA
+from meandata import NIVELES as NIVELES_MEANDATA
+from pool_sumo import PoolSumo, calentar, ejecutar_trabajo
+
+# --- CONFIGURACIÓN ---
+DIRECTORIO_RESULTADOS = "resultados"
+# xml: tripinfo de SUMO; viajes: registro binario compacto (registro_viajes.py)
+FORMATOS = {"xml": ".xml", "viajes": EXTENSION_VIAJES}
+
+
+def matriz_escenarios(modos=MODOS, semillas=(42,), perfiles=PERFILES, directorio=DIRECTORIO_RESULTADOS, pasos=3000,
+                      backend="traci", calentamiento=0, instrumentar=False, intervalo_metricas=0, vivo=None,
+                      formato="xml", avance_rapido=True, meandata=0, nivel_meandata="edge"):
+    # Producto cartesiano (modo × semilla × perfil); cada corrida escribe su propio archivo
+    trabajos = []
+    for modo, semilla, perfil in itertools.product(modos, semillas, perfiles):
+        trabajos.append({
+            "modo": modo,
+            "perfil": perfil,
+            "semilla": semilla,
+            "pasos": pasos,
+            "backend": backend,
+            "calentamiento": calentamiento,
+            "instrumentar": instrumentar,
+            "intervalo_metricas": intervalo_metricas,
+            "vivo": vivo,
+            "avance_rapido": avance_rapido,
+            "meandata": meandata,
+            "nivel_meandata": nivel_meandata,
+            "archivo_salida": os.path.join(directorio, perfil, f"{modo}_s{semilla}{FORMATOS[formato]}"),
+        })
+    return trabajos
+
+
+def run_experimentos(modos=MODOS, semillas=(42,), perfiles=PERFILES, directorio=DIRECTORIO_RESULTADOS,
+                     pasos=3000, procesos=None, backend="traci", calentamiento=0, instrumentar=False,
+                     intervalo_metricas=0, vivo=None, formato="xml", avance_rapido=True, meandata=0,
+                     nivel_meandata="edge"):
+    trabajos = matriz_escenarios(modos, semillas, perfiles, directorio, pasos, backend, calentamiento, instrumentar,
+                                 intervalo_metricas, vivo, formato, avance_rapido, meandata, nivel_meandata)
+    resultados = []
+    errores = []
+
+    with PoolSumo(procesos, backend) as pool:
+        if calentamiento:
+            # Un estado por (perfil, semilla), compartido por todos los modos
+            estados = sorted({(t["perfil"], t["semilla"]) for t in trabajos})
+            for _, _, error in pool.mapear([(p, s, pasos, calentamiento, "fijo", backend) for p, s in estados],
+                                           calentar):
+                if error is not None:
+                    raise error
+        for trabajo, resultado, e in pool.mapear(trabajos, ejecutar_trabajo):
+            if e is not None:
+                errores.append((trabajo, e))
+                print(f"❌ {trabajo['modo']}/{trabajo['perfil']}/s{trabajo['semilla']}: {e}")
+                continue
+            resultados.append(resultado)
+            print(f"✅ {resultado['modo']}/{resultado['perfil']}/s{resultado['semilla']} "
+                  f"-> {resultado['archivo']} ({resultado['segundos']:.1f}s, "
+                  f"{resultado['llamadas_paso']} llamadas a simulationStep)")
+
+    return resultados, errores
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ejecuta la matriz de escenarios (modo × semilla × perfil) sin GUI.")
+    parser.add_argument("--modos", nargs="+", default=list(MODOS), choices=MODOS)
+    parser.add_argument("--perfiles", nargs="+", default=list(PERFILES), choices=PERFILES)
+    parser.add_argument("--semillas", nargs="+", type=int, default=[42])
+    parser.add_argument("--pasos", type=int, default=3000)
+    parser.add_argument("--procesos", type=int, default=None, help="Procesos en paralelo (por defecto: núcleos disponibles)")
+    parser.add_argument("--directorio", default=DIRECTORIO_RESULTADOS)
+    parser.add_argument("--backend", default="traci", choices=BACKENDS,
+                        help="traci (socket) o libsumo (en proceso, más rápido sin GUI)")
+    parser.add_argument("--calentamiento", type=int, default=0,
+                        help="Pasos iniciales tomados de un estado guardado (compartido por todos los modos)")
+    parser.add_argument("--instrumentar", action="store_true",
+                        help="Tiempos por etapa y por comando TraCI en <perfil>/<modo>_s<semilla>.metricas.json/.prom")
+    parser.add_argument("--intervalo-metricas", type=int, default=0,
+                        help="Con --instrumentar: exporta cada N pasos (0: solo al final)")
+    parser.add_argument("--vivo", metavar="RUTA_DB",
+                        help="Publica cada corrida en una base SQLite para el dashboard en vivo (analisis.py)")
+    parser.add_argument("--formato", default="xml", choices=list(FORMATOS),
+                        help="xml: tripinfo de SUMO; viajes: registro binario compacto (~10 veces más chico)")
+    parser.add_argument("--paso-a-paso", action="store_true",
+                        help="Desactiva el avance rápido (un simulationStep por paso aunque no haya eventos)")
+    parser.add_argument("--meandata", type=float, nargs="?", const=PERIODO_MEANDATA, default=0, metavar="PERIODO_S",
+                        help=f"Tráfico y emisiones agregados por calle cada PERIODO_S segundos "
+                             f"(por defecto {PERIODO_MEANDATA}), sin dispositivos de emisiones por vehículo")
+    parser.add_argument("--nivel-meandata", default="edge", choices=NIVELES_MEANDATA)
+    args = parser.parse_args(argv)
+
+    total = len(args.modos) * len(args.perfiles) * len(args.semillas)
+    print(f"🚀 Ejecutando {total} escenarios en paralelo...")
+    sys.stdout.flush()
+
+    inicio = time.perf_counter()
+    resultados, errores = run_experimentos(
+        args.modos, args.semillas, args.perfiles, args.directorio, args.pasos, args.procesos, args.backend,
+        args.calentamiento, args.instrumentar, args.intervalo_metricas, args.vivo, args.formato,
+        not args.paso_a_paso, args.meandata, args.nivel_meandata,
+    )
+    print(f"🏁 {len(resultados)}/{total} escenarios completados en {time.perf_counter() - inicio:.1f}s")
+    return 1 if errores else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,98 @@
+import numpy as np
+import plotly.graph_objects as go
+
+# --- GRÁFICOS ESCALABLES ---
+# Todo se resume en el servidor con NumPy antes de llegar a Plotly: el navegador recibe
+# conteos, cuantiles y series reducidas, nunca un punto por vehículo.
+
+MAX_PUNTOS_LINEA = 2000
+MAX_ATIPICOS = 300
+
+
+def histograma(series, bins=40):
+    # Mismos bordes para todas las series (comparables en modo overlay)
+    valores = [np.asarray(s, dtype=np.float64) for s in series]
+    validos = [v[np.isfinite(v)] for v in valores]
+    todos = np.concatenate(validos) if validos else np.zeros(0)
+    if todos.size == 0:
+        bordes = np.linspace(0, 1, bins + 1)
+    else:
+        bordes = np.histogram_bin_edges(todos, bins=bins)
+    conteos = [np.histogram(v, bins=bordes)[0] for v in validos]
+    return bordes, conteos
+
+
+def lttb(x, y, umbral=MAX_PUNTOS_LINEA):
+    # Largest-Triangle-Three-Buckets: reduce la serie conservando picos y forma
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(x)
+    if umbral >= n or umbral < 3:
+        return x, y
+
+    indices = np.empty(umbral, dtype=np.int64)
+    indices[0], indices[-1] = 0, n - 1
+    # Bordes de los umbral-2 buckets intermedios
+    bordes = np.linspace(1, n - 1, umbral - 1).astype(np.int64)
+
+    a = 0
+    for i in range(umbral - 2):
+        inicio, fin = bordes[i], bordes[i + 1]
+        # Promedio del bucket siguiente (o el último punto)
+        sig_inicio, sig_fin = fin, bordes[i + 2] if i + 2 < len(bordes) else n
+        if sig_fin <= sig_inicio:
+            sig_fin = sig_inicio + 1
+        cx = x[sig_inicio:sig_fin].mean()
+        cy = y[sig_inicio:sig_fin].mean()
+
+        # Área del triángulo (a, punto candidato, promedio siguiente)
+        areas = np.abs((x[a] - cx) * (y[inicio:fin] - y[a]) - (x[a] - x[inicio:fin]) * (cy - y[a]))
+        a = inicio + int(np.argmax(areas))
+        indices[i + 1] = a
+
+    return x[indices], y[indices]
+
+
+def linea_reducida(y, nombre, color, ancho=1, umbral=MAX_PUNTOS_LINEA, x=None):
+    y = np.asarray(y, dtype=np.float64)
+    x = np.arange(len(y)) if x is None else np.asarray(x, dtype=np.float64)
+    finitos = np.isfinite(y)
+    xr, yr = lttb(x[finitos], y[finitos], umbral)
+    return go.Scatter(x=xr, y=yr, mode="lines", name=nombre, line=dict(color=color, width=ancho))
+
+
+def resumen_caja(valores):
+    # Cuantiles y bigotes de Tukey (1.5 IQR), como los calcula un boxplot normal
+    v = np.asarray(valores, dtype=np.float64)
+    v = v[np.isfinite(v)]
+    if v.size == 0:
+        return None
+    q1, mediana, q3 = np.percentile(v, [25, 50, 75])
+    iqr = q3 - q1
+    dentro = v[(v >= q1 - 1.5 * iqr) & (v <= q3 + 1.5 * iqr)]
+    atipicos = v[(v < q1 - 1.5 * iqr) | (v > q3 + 1.5 * iqr)]
+    if atipicos.size > MAX_ATIPICOS:
+        # Muestra acotada: siempre los extremos + el resto espaciado
+        atipicos = np.sort(atipicos)[np.linspace(0, atipicos.size - 1, MAX_ATIPICOS).astype(np.int64)]
+    return {
+        "q1": q1, "mediana": mediana, "q3": q3,
+        "min": dentro.min(), "max": dentro.max(),
+        "atipicos": atipicos,
+    }
+
+
+def caja_precalculada(valores, nombre, color):
+    r = resumen_caja(valores)
+    if r is None:
+        return []
+    trazas = [go.Box(
+        x=[nombre], name=nombre, q1=[r["q1"]], median=[r["mediana"]], q3=[r["q3"]],
+        lowerfence=[r["min"]], upperfence=[r["max"]],
+        marker_color=color, line_color=color, boxpoints=False,
+    )]
+    if r["atipicos"].size:
+        trazas.append(go.Scatter(
+            x=[nombre] * r["atipicos"].size, y=r["atipicos"], mode="markers", name=nombre,
+            marker=dict(color=color, size=4), showlegend=False,
+        ))
+    return trazas
@@ -0,0 +1,215 @@
+import json
+import time
+
+from archivos import escribir_atomico
+
+# --- INSTRUMENTACIÓN DEL BUCLE DE CONTROL ---
+# Opcional: si no se usa, el bucle no cambia (una sola comprobación por paso).
+# - Etapas del bucle (simulación, demanda, sensado, control...): tiempo total y cuánto de
+#   ese tiempo se pasó dentro de llamadas a TraCI (el resto es Python propio).
+# - Cada comando TraCI (p. ej. "lane.getSubscriptionResults"): cantidad de llamadas y latencia.
+# Las latencias van a histogramas de potencias de 2 (en ns): registrar una muestra es un
+# bit_length() y un incremento, sin ordenar ni guardar las muestras.
+# Se exporta como JSON y como texto de Prometheus (para el textfile collector de node_exporter).
+
+BIT_MINIMO = 7  # primer bucket: < 128 ns
+NUM_BUCKETS = 25  # hasta ~1 s; el último es +Inf
+LIMITES_NS = [1 << (BIT_MINIMO + i) for i in range(NUM_BUCKETS - 1)]
+DOMINIOS = ("edge", "lane", "trafficlight", "route", "vehicle", "simulation")
+
+reloj = time.perf_counter_ns
+
+
+class Histograma:
+    __slots__ = ("conteos", "total_ns", "n", "traci_ns")
+
+    def __init__(self):
+        self.reiniciar()
+
+    def reiniciar(self):
+        self.conteos = [0] * NUM_BUCKETS
+        self.total_ns = 0
+        self.n = 0
+        # Solo etapas: parte del tiempo que se pasó dentro de llamadas a TraCI
+        self.traci_ns = 0
+
+    def agregar(self, ns):
+        self.conteos[min(max(ns.bit_length() - BIT_MINIMO, 0), NUM_BUCKETS - 1)] += 1
+        self.total_ns += ns
+        self.n += 1
+
+    def percentil_us(self, p):
+        # Cota superior del bucket que contiene el percentil
+        if not self.n:
+            return 0.0
+        objetivo = p / 100 * self.n
+        acumulado = 0
+        for i, conteo in enumerate(self.conteos):
+            acumulado += conteo
+            if acumulado >= objetivo:
+                return LIMITES_NS[i] / 1000 if i < len(LIMITES_NS) else float("inf")
+        return float("inf")
+
+    def resumen(self):
+        return {
+            "n": self.n,
+            "total_s": self.total_ns / 1e9,
+            "media_us": self.total_ns / self.n / 1000 if self.n else 0.0,
+            "p50_us": self.percentil_us(50),
+            "p99_us": self.percentil_us(99),
+            "histograma": {"le_us": [l / 1000 for l in LIMITES_NS] + ["+Inf"], "conteo": list(self.conteos)},
+        }
+
+
+class ConexionInstrumentada:
+    # Envuelve una conexión (traci, libsumo o falsa): cada comando cuenta sus llamadas y,
+    # con tiempos=True, mide su latencia. Los métodos envueltos quedan guardados en la
+    # instancia, así la segunda llamada ya no pasa por __getattr__.
+    def __init__(self, conn, instrumentacion, prefijo="", tiempos=True):
+        self._conn = conn
+        self._instrumentacion = instrumentacion
+        self._prefijo = prefijo
+        self._tiempos = tiempos
+
+    def __getattr__(self, nombre):
+        valor = getattr(self._conn, nombre)
+        if nombre in DOMINIOS:
+            envuelto = ConexionInstrumentada(valor, self._instrumentacion, f"{nombre}.", self._tiempos)
+        elif callable(valor):
+            envuelto = self._envolver(valor, self._prefijo + nombre)
+        else:
+            return valor
+        setattr(self, nombre, envuelto)
+        return envuelto
+
+    def _envolver(self, metodo, comando):
+        instrumentacion = self._instrumentacion
+        histograma = instrumentacion.comando(comando)
+        if not self._tiempos:
+            def contar(*args, **kwargs):
+                histograma.n += 1
+                return metodo(*args, **kwargs)
+            return contar
+
+        def medir(*args, **kwargs):
+            inicio = reloj()
+            try:
+                return metodo(*args, **kwargs)
+            finally:
+                ns = reloj() - inicio
+                histograma.agregar(ns)
+                instrumentacion.en_traci_ns += ns
+        return medir
+
+
+class Instrumentacion:
+    # destino: ruta base de los archivos (destino + ".json" y destino + ".prom");
+    # intervalo: cada cuántos pasos se exporta durante la corrida (0: solo al final)
+    def __init__(self, destino=None, intervalo=0, etiquetas=None):
+        self.destino = destino
+        self.intervalo = intervalo
+        self.etiquetas = dict(etiquetas or {})
+        self.etapas = {}
+        self.comandos = {}
+        self.pasos = 0
+        self.en_traci_ns = 0
+        self._en_traci_marca = 0
+
+    def envolver(self, conn, tiempos=True):
+        return ConexionInstrumentada(conn, self, tiempos=tiempos)
+
+    def comando(self, nombre):
+        if nombre not in self.comandos:
+            self.comandos[nombre] = Histograma()
+        return self.comandos[nombre]
+
+    def marca(self):
+        self._en_traci_marca = self.en_traci_ns
+        return reloj()
+
+    def fin(self, etapa, inicio):
+        # Cierra la etapa que empezó en `inicio` y devuelve el inicio de la siguiente
+        ahora = reloj()
+        histograma = self.etapas.get(etapa)
+        if histograma is None:
+            histograma = self.etapas[etapa] = Histograma()
+        histograma.agregar(ahora - inicio)
+        histograma.traci_ns += self.en_traci_ns - self._en_traci_marca
+        self._en_traci_marca = self.en_traci_ns
+        return ahora
+
+    def paso(self):
+        self.pasos += 1
+        if self.intervalo and self.pasos % self.intervalo == 0:
+            self.exportar()
+
+    def total_llamadas(self):
+        return sum(h.n for h in self.comandos.values())
+
+    def reiniciar(self):
+        # En el lugar: las conexiones envueltas conservan sus referencias a los histogramas
+        for histograma in list(self.etapas.values()) + list(self.comandos.values()):
+            histograma.reiniciar()
+        self.pasos = 0
+
+    # --- EXPORTACIÓN ---
+    def a_dict(self):
+        etapas = {}
+        for nombre, h in self.etapas.items():
+            etapas[nombre] = h.resumen()
+            etapas[nombre]["traci_s"] = h.traci_ns / 1e9
+            etapas[nombre]["por_paso_us"] = h.total_ns / self.pasos / 1000 if self.pasos else 0.0
+        return {
+            "etiquetas": self.etiquetas,
+            "pasos": self.pasos,
+            "llamadas_por_paso": self.total_llamadas() / self.pasos if self.pasos else 0.0,
+            "etapas": etapas,
+            "comandos": {nombre: h.resumen() for nombre, h in sorted(self.comandos.items())},
+        }
+
+    def texto_prometheus(self):
+        lineas = []
+        base = "".join(f',{k}="{v}"' for k, v in sorted(self.etiquetas.items()))
+
+        def histograma(metrica, clave, valores, ayuda):
+            lineas.append(f"# HELP {metrica} {ayuda}")
+            lineas.append(f"# TYPE {metrica} histogram")
+            for nombre, h in sorted(valores.items()):
+                etiqueta = f'{clave}="{nombre}"{base}'
+                acumulado = 0
+                for limite, conteo in zip(LIMITES_NS + [None], h.conteos):
+                    acumulado += conteo
+                    le = "+Inf" if limite is None else f"{limite / 1e9:.9g}"
+                    lineas.append(f'{metrica}_bucket{{{etiqueta},le="{le}"}} {acumulado}')
+                lineas.append(f"{metrica}_sum{{{etiqueta}}} {h.total_ns / 1e9:.9g}")
+                lineas.append(f"{metrica}_count{{{etiqueta}}} {h.n}")
+
+        lineas.append("# HELP sumo_pasos_total Pasos de simulación instrumentados")
+        lineas.append("# TYPE sumo_pasos_total counter")
+        lineas.append(f"sumo_pasos_total{{{base[1:]}}} {self.pasos}" if base else f"sumo_pasos_total {self.pasos}")
+        histograma("sumo_etapa_segundos", "etapa", self.etapas, "Duración de cada etapa del bucle de control")
+        lineas.append("# HELP sumo_etapa_traci_segundos_total Tiempo de cada etapa dentro de llamadas a TraCI")
+        lineas.append("# TYPE sumo_etapa_traci_segundos_total counter")
+        for nombre, h in sorted(self.etapas.items()):
+            lineas.append(f'sumo_etapa_traci_segundos_total{{etapa="{nombre}"{base}}} {h.traci_ns / 1e9:.9g}')
+        lineas.append("# HELP sumo_traci_llamadas_total Llamadas por comando TraCI")
+        lineas.append("# TYPE sumo_traci_llamadas_total counter")
+        for nombre, h in sorted(self.comandos.items()):
+            lineas.append(f'sumo_traci_llamadas_total{{comando="{nombre}"{base}}} {h.n}')
+        medidos = {nombre: h for nombre, h in self.comandos.items() if h.total_ns}
+        if medidos:
+            histograma("sumo_traci_segundos", "comando", medidos, "Latencia de cada comando TraCI")
+        return "\n".join(lineas) + "\n"
+
+    def exportar(self, destino=None):
+        destino = destino or self.destino
+        if destino is None:
+            return None
+        _escribir(destino + ".json", json.dumps(self.a_dict(), ensure_ascii=False, indent=2))
+        _escribir(destino + ".prom", self.texto_prometheus())
+        return destino
+
+
+def _escribir(ruta, contenido):
+    # Atómico: un lector periódico (p. ej. node_exporter) nunca ve el archivo a medias
+    escribir_atomico(ruta, lambda f: f.write(contenido), "w", "utf-8")
@@ -1,15 +1,23 @@
-import traci
-import time
+import argparse
 import sys
-import os
-import random
+
+from conexion import abrir_conexion
+from controladores import COLA_BASE, COLA_POR_AUTO
+from demanda import Demanda
+from escenario import ARCHIVO_RED, configurar_calles, obtener_estado, ruta_binario_sumo
+from instrumentacion import Instrumentacion
+from metricas_vivo import PublicadorVivo
+from motor_semaforos import MotorSemaforos
+from sensado import Sensor
+from telemetria import RITMOS, Ritmo, Telemetria
+from topologia import cargar_topologia
 
 # --- CONFIGURACIÓN ---
-RUTA_SUMO = r"C:\Program Files (x86)\Eclipse\Sumo\bin\sumo-gui.exe"
-# Usamos --start para que arranque solo
-SUMO_CMD = [RUTA_SUMO, "-c", "config.sumocfg", "--start"]
+# Usamos --start para que arranque solo (sumo-gui se busca al conectar, no al importar main.py)
+OPCIONES_SUMO = ["-c", "config.sumocfg", "--start"]
 
-def run_smart_road():
+def run_smart_road(ritmo="tiempo_real", intervalo_consola=0.5, semilla=42, calentamiento=0, instrumentar=None,
+                   intervalo_metricas=0, vivo=None):
     print("\n" + "="*60)
     print("🚀 PROYECTO DE TESIS: CONTROL ADAPTATIVO")
     print("📊 MODO: VISUALIZACIÓN DE DATOS EN TIEMPO REAL")
@@ -18,117 +26,152 @@ def run_smart_road():
     print("⏳ Conectando con SUMO...")
     sys.stdout.flush() # Fuerza a imprimir en consola
     
-    traci.start(SUMO_CMD)
-    print("✅ ¡Simulación Iniciada! Recopilando datos...")
+    # Estado guardado tras el calentamiento (se simula sin GUI solo la primera vez)
+    estado = obtener_estado("hora_pico", semilla, 10000, calentamiento) if calentamiento else None
     
-    ID_SEMAFORO = "J19"
+    # La GUI requiere el backend TraCI (socket)
+    conn = abrir_conexion([ruta_binario_sumo(gui=True)] + OPCIONES_SUMO, "traci", gui=True)
+    sumo = conn
+    telemetria = publicador = None
+    try:
+        if estado is not None:
+            conn.simulation.loadState(estado)
+        print("✅ ¡Simulación Iniciada! Recopilando datos...")
     
-    # 1. Validación
-    lista_tls = traci.trafficlight.getIDList()
-    if ID_SEMAFORO not in lista_tls:
-        if lista_tls: ID_SEMAFORO = lista_tls[0]
-        else: return
-
-    # 2. Configuración de calles
-    carriles_entrantes = traci.trafficlight.getControlledLanes(ID_SEMAFORO)
-    entradas = list(set([c.split('_')[0] for c in carriles_entrantes]))
+        # Instrumentación opcional: tiempos por etapa y por comando TraCI (JSON + Prometheus)
+        instrumentacion = Instrumentacion(instrumentar, intervalo_metricas, {"modo": "cola"}) if instrumentar else None
+        if instrumentacion is not None:
+            conn = instrumentacion.envolver(conn)
+    
+        # 1. Validación y 2. Configuración de calles (índice de topología de la red)
+        topologia = cargar_topologia(ARCHIVO_RED)
+        ID_SEMAFORO, entradas, salidas, permitidos = configurar_calles(topologia)
+        if ID_SEMAFORO is None:
+            return
+    
+        # Demanda "Hora Pico" precompilada: una ruta por par origen/destino
+        demanda = Demanda("hora_pico", semilla, entradas, salidas, 10000, permitidos)
+        demanda.preparar(conn)
+    
+        # Suscripciones a calles y semáforo (una foto por paso, sin consultas extra)
+        sensor = Sensor(conn, entradas, [ID_SEMAFORO])
+    
+        # La consola se escribe desde un hilo de fondo: el bucle solo encola mensajes
+        telemetria = Telemetria(intervalo=intervalo_consola)
+        log = telemetria.publicar
+        # tiempo_real: 1 paso cada 0.1s (demo en la GUI) | rapido: sin pausas
+        pausa = Ritmo(ritmo, periodo=0.1)
     
-    salidas = []
-    for calle in entradas:
-        if calle.startswith("-"): salidas.append(calle[1:]) 
-        else: salidas.append(f"-{calle}")
+        # Controlador "cola" (10s base + 4s por auto, máximo 90s) sobre el motor de semáforos
+        motor = MotorSemaforos(conn, topologia, "cola", semaforos=[ID_SEMAFORO])
     
-    step = 0
-    temporizador_fase = 0  
+        # Publicación en vivo para el dashboard (analisis.py, vista "En vivo")
+        publicador = PublicadorVivo(vivo, conn, motor, "cola", "hora_pico", semilla, "traci", 10000) if vivo else None
     
-    while step < 10000: 
-        traci.simulationStep()
+        step = calentamiento
+    
+        while step < 10000: 
+            if instrumentacion is not None:
+                t = instrumentacion.marca()
+            conn.simulationStep()
+            if instrumentacion is not None:
+                t = instrumentacion.fin("simulacion", t)
+            lectura = sensor.leer()
+            if instrumentacion is not None:
+                t = instrumentacion.fin("sensado", t)
         
-        # --- A. GENERADOR DE TRÁFICO (Hora Pico) ---
-        if step % 6 == 0:  
-            for origen in entradas:
-                if random.random() < 0.6: 
-                    try:
-                        if origen.startswith("-"): opuesto = origen[1:]
-                        else: opuesto = f"-{origen}"
-                        posibles = [s for s in salidas if s != opuesto]
-                        if posibles:
-                            destino = random.choice(posibles)
-                            ruta_id = f"ruta_{origen}_{step}" 
-                            traci.route.add(ruta_id, [origen, destino]) 
-                            traci.vehicle.add(f"auto_{origen}_{step}", ruta_id, typeID="DEFAULT_VEHTYPE")
-                    except: pass 
+            # --- A. GENERADOR DE TRÁFICO (Hora Pico) ---
+            demanda.insertar(conn, step)
+            if instrumentacion is not None:
+                t = instrumentacion.fin("demanda", t)
 
-        # --- B. SENSADO DE COLAS ---
-        max_cola_individual = 0
-        total_esperando = 0
-        reporte_colas = {} 
+            # --- B. SENSADO DE COLAS ---
+            max_cola_individual = 0
+            total_esperando = 0
+            reporte_colas = {} 
 
-        for calle in entradas:
-            try:
-                cola = traci.edge.getLastStepHaltingNumber(calle)
+            for calle in entradas:
+                cola = lectura.detenidos.get(calle, 0)
                 total_esperando += cola
                 reporte_colas[calle] = cola
                 if cola > max_cola_individual:
                     max_cola_individual = cola
-            except: pass
 
-        # --- C. REPORTE EN TIEMPO REAL (LO QUE FALTABA) ---
-        # Imprimimos el estado CADA SEGUNDO (cada 10 pasos)
-        # para que veas que el sistema está leyendo los autos.
-        if step % 10 == 0:
-            fase_actual = traci.trafficlight.getPhase(ID_SEMAFORO)
-            color = "VERDE" if (fase_actual == 0 or fase_actual == 2) else "AMARILLO/ROJO"
-            tiempo_restante = int(temporizador_fase / 10)
+            # --- C. REPORTE EN TIEMPO REAL (LO QUE FALTABA) ---
+            # Publicamos el estado CADA SEGUNDO (cada 10 pasos)
+            # para que veas que el sistema está leyendo los autos.
+            if step % 10 == 0:
+                fase_actual = lectura.fases[ID_SEMAFORO]
+                color = "VERDE" if motor.en_verde(0) else "AMARILLO/ROJO"
+                tiempo_restante = int(motor.temporizador[0] / 10)
             
-            # Esto imprimirá una línea que se actualiza constantemente
-            print(f"👀 MONITOREO | Fase: {fase_actual} ({color}) | Autos Totales: {total_esperando} | Cambio en: {tiempo_restante}s")
-            sys.stdout.flush() # Importante para PowerShell
+                # Se encola; el hilo de telemetría la imprime sin frenar la simulación
+                log(f"👀 MONITOREO | Fase: {fase_actual} ({color}) | Autos Totales: {total_esperando} | Cambio en: {tiempo_restante}s")
 
-        # --- D. ALGORITMO INTELIGENTE ---
-        if temporizador_fase > 0:
-            temporizador_fase -= 1
-        else:
-            # === MOMENTO DE DECISIÓN ===
-            print("\n" + "▒"*60)
-            print("🧠 CEREBRO ACTIVADO: CALCULANDO NUEVOS TIEMPOS...")
-            
-            fase_antigua = traci.trafficlight.getPhase(ID_SEMAFORO)
-            nueva_fase = (fase_antigua + 1) % 4
-            
-            # Cambiar fase y bloquear
-            traci.trafficlight.setPhase(ID_SEMAFORO, nueva_fase)
-            traci.trafficlight.setPhaseDuration(ID_SEMAFORO, 1000)
+            # --- D. ALGORITMO INTELIGENTE ---
+            if instrumentacion is not None:
+                t = instrumentacion.fin("reporte", t)
+            cambian = motor.paso()
+            if instrumentacion is not None:
+                instrumentacion.fin("control", t)
+                instrumentacion.paso()
+            if publicador is not None:
+                publicador.paso(step, cambian, demanda.insertados)
+            if cambian.size:
+                # === MOMENTO DE DECISIÓN ===
+                log("\n" + "▒"*60)
+                log("🧠 CEREBRO ACTIVADO: CALCULANDO NUEVOS TIEMPOS...")
             
-            tiempo_base = 10 
+                nueva_fase = int(motor.fase[0])
             
-            # Si es VERDE (Fases 0 o 2)
-            if nueva_fase == 0 or nueva_fase == 2:
-                tiempo_extra = max_cola_individual * 4 
-                tiempo_total = min(tiempo_base + tiempo_extra, 90)
+                # Si es VERDE
+                if motor.en_verde(0):
+                    max_cola = int(motor.max_cola[0])
+                    tiempo_total = motor.temporizador[0] // 10
                 
-                print(f"🚦 NUEVA LUZ VERDE (Fase {nueva_fase})")
-                print(f"   📊 AUTOS DETECTADOS POR CALLE: {reporte_colas}")
-                if max_cola_individual > 0:
-                    print(f"   ⚠️ Calle crítica tiene {max_cola_individual} autos.")
-                    print(f"   🧮 FÓRMULA: 10s base + ({max_cola_individual} * 4s)")
-                else:
-                    print(f"   🍃 Tráfico libre.")
+                    log(f"🚦 NUEVA LUZ VERDE (Fase {nueva_fase})")
+                    log(f"   📊 AUTOS DETECTADOS POR CALLE: {reporte_colas}")
+                    if max_cola > 0:
+                        log(f"   ⚠️ Calle crítica tiene {max_cola} autos.")
+                        log(f"   🧮 FÓRMULA: {COLA_BASE}s base + ({max_cola} * {COLA_POR_AUTO}s)")
+                    else:
+                        log(f"   🍃 Tráfico libre.")
                 
-                print(f"   ✅ TIEMPO FINAL ASIGNADO: {tiempo_total} SEGUNDOS")
-                temporizador_fase = tiempo_total * 10
+                    log(f"   ✅ TIEMPO FINAL ASIGNADO: {tiempo_total} SEGUNDOS")
             
-            else:
-                # AMARILLO
-                print(f"⚠️ CAMBIO A AMARILLO (Transición)")
-                temporizador_fase = 40 # 4 segundos
+                else:
+                    # AMARILLO
+                    log(f"⚠️ CAMBIO A AMARILLO (Transición)")
             
-            print("▒"*60 + "\n")
-
-        step += 1
-        time.sleep(0.1) 
+                log("▒"*60 + "\n")
 
-    traci.close()
+            step += 1
+            pausa.esperar()
+    finally:
+        # También si la corrida se corta (error o Ctrl+C): la consola, la base en vivo y SUMO quedan cerrados
+        if telemetria is not None:
+            telemetria.cerrar()
+        if publicador is not None:
+            publicador.cerrar()
+        sumo.close()
+    if instrumentacion is not None:
+        print(f"📈 Métricas en: {instrumentacion.exportar()}.json / .prom")
 
 if __name__ == "__main__":
-    run_smart_road()
+    parser = argparse.ArgumentParser(description="Control adaptativo con visualización en tiempo real (sumo-gui).")
+    parser.add_argument("--ritmo", default="tiempo_real", choices=RITMOS,
+                        help="tiempo_real: 1 paso cada 0.1s (demo) | rapido: sin pausas")
+    parser.add_argument("--intervalo-consola", type=float, default=0.5,
+                        help="Cada cuántos segundos se vuelca la telemetría a la consola")
+    parser.add_argument("--semilla", type=int, default=42, help="Semilla de la demanda Hora Pico")
+    parser.add_argument("--calentamiento", type=int, default=0,
+                        help="Arranca desde el estado guardado tras N pasos (colas ya formadas)")
+    parser.add_argument("--instrumentar", metavar="RUTA",
+                        help="Exporta tiempos por etapa y por comando TraCI a RUTA.json y RUTA.prom")
+    parser.add_argument("--intervalo-metricas", type=int, default=0,
+                        help="Con --instrumentar: exporta cada N pasos (0: solo al final)")
+    parser.add_argument("--vivo", metavar="RUTA_DB",
+                        help="Publica colas, fases y llegadas en una base SQLite para el dashboard en vivo")
+    args = parser.parse_args()
+    run_smart_road(args.ritmo, args.intervalo_consola, args.semilla, args.calentamiento, args.instrumentar,
+                   args.intervalo_metricas, args.vivo)
@@ -0,0 +1,146 @@
+import os
+from operator import itemgetter
+from xml.sax.saxutils import quoteattr
+
+import pandas as pd
+
+from archivos import escribir_atomico
+from tripinfo import TAM_BLOQUE, TAM_LECTURA, iterar_columnas
+
+# --- DATOS AGREGADOS POR CALLE (MEANDATA) ---
+# En lugar de un dispositivo de emisiones en cada vehículo, SUMO acumula por calle (o carril) e
+# intervalo: una fila por calle cada `periodo` segundos, sin importar cuántos vehículos pasen.
+# Las emisiones salen del mismo modelo (clase de emisión de cada vehículo) sin --device.emissions.
+# - trafico:   densidad (veh/km), ocupación (%), velocidad (m/s), espera y tiempo perdido (s)
+# - emisiones: CO2, combustible, NOx, PMx, CO y HC en mg por intervalo
+# El lector es el de tripinfo.py (iterar_columnas): expat por trozos, arreglos por bloque.
+
+PERIODO = 60
+NIVELES = ("edge", "lane")
+TIPOS = ("trafico", "emisiones")
+# Solo lo que usa el dashboard (writeAttributes): archivos más chicos y más rápidos de leer
+ATRIBUTOS = {
+    "trafico": ("sampledSeconds", "density", "laneDensity", "occupancy", "speed", "waitingTime", "timeLoss",
+                "entered", "left"),
+    "emisiones": ("sampledSeconds", "CO2_abs", "fuel_abs", "NOx_abs", "PMx_abs", "CO_abs", "HC_abs"),
+}
+ATRIBUTOS_TEXTO = ("edge", "lane")
+ATRIBUTOS_INTERVALO = ("begin", "end")
+
+
+def rutas_meandata(base):
+    # {tipo: archivo de salida} para la corrida con salida base (sin extensión)
+    return {tipo: f"{base}.{tipo}.xml" for tipo in TIPOS}
+
+
+def escribir_adicional(base, periodo=PERIODO, nivel="edge"):
+    # Archivo de additionals con un edgeData/laneData por tipo; devuelve su ruta
+    if nivel not in NIVELES:
+        raise ValueError(f"Nivel desconocido: {nivel!r} (opciones: {', '.join(NIVELES)})")
+    if periodo <= 0:
+        raise ValueError(f"El período de meandata debe ser positivo (recibido: {periodo})")
+    ruta = f"{base}.meandata.add.xml"
+    elemento = f"{nivel}Data"
+
+    def escribir(f):
+        f.write("<additional>\n")
+        for tipo, salida in rutas_meandata(base).items():
+            emisiones = ' type="emissions"' if tipo == "emisiones" else ""
+            # excludeEmpty: las calles sin vehículos en el intervalo no se escriben (valen 0)
+            # withInternal: sin los tramos internos de los cruces se perdería ~10 % de las emisiones
+            f.write(f'    <{elemento} id="{tipo}"{emisiones} period="{periodo:g}" '
+                    f'file={quoteattr(os.path.abspath(salida))} excludeEmpty="true" withInternal="true" '
+                    f'writeAttributes="{" ".join(ATRIBUTOS[tipo])}"/>\n')
+        f.write("</additional>\n")
+
+    # Atómico: corridas paralelas con la misma base no le pasan a SUMO un archivo a medio escribir
+    escribir_atomico(ruta, escribir, "w", "utf-8")
+    return ruta
+
+
+# --- LECTOR INCREMENTAL ---
+def _manejador(nombres):
+    # nombres: columnas numéricas (begin, end y los atributos de la primera fila); los que falten
+    # en otra fila quedan NaN
+    def crear(filas_texto, filas_numericas):
+        estado = {"intervalo": ("nan", "nan"), "calle": None, "extraer": None}
+
+        def agregar(calle, carril, atributos):
+            if estado["extraer"] is None:
+                nombres.extend(ATRIBUTOS_INTERVALO + tuple(a for a in atributos if a != "id"))
+                estado["extraer"] = itemgetter(*nombres[len(ATRIBUTOS_INTERVALO):])
+            filas_texto.append((calle, carril))
+            try:
+                filas_numericas.append(estado["intervalo"] + estado["extraer"](atributos))
+            except KeyError:
+                filas_numericas.append(estado["intervalo"] + tuple(
+                    atributos.get(a) or "nan" for a in nombres[len(ATRIBUTOS_INTERVALO):]))
+
+        def inicio_elemento(nombre, atributos):
+            if nombre == "interval":
+                estado["intervalo"] = (atributos.get("begin", "nan"), atributos.get("end", "nan"))
+            elif nombre == "edge":
+                # A nivel de carril el <edge> solo agrupa sus <lane>
+                estado["calle"] = atributos["id"]
+                if len(atributos) > 1:
+                    agregar(atributos["id"], None, atributos)
+            elif nombre == "lane":
+                agregar(estado["calle"], atributos["id"], atributos)
+
+        return inicio_elemento
+
+    return crear
+
+
+def iterar_bloques(fuente, tam_bloque=TAM_BLOQUE, tam_lectura=TAM_LECTURA):
+    # Bloques {columna: arreglo} con begin, end, edge, lane (None a nivel de calle) y los atributos
+    # numéricos del archivo
+    nombres = []
+    return iterar_columnas(fuente, _manejador(nombres), ATRIBUTOS_TEXTO, nombres, tam_bloque, tam_lectura)
+
+
+def leer_meandata(fuente, tam_bloque=TAM_BLOQUE):
+    bloques = [pd.DataFrame(b) for b in iterar_bloques(fuente, tam_bloque)]
+    if not bloques:
+        return pd.DataFrame(columns=list(ATRIBUTOS_INTERVALO + ATRIBUTOS_TEXTO))
+    return pd.concat(bloques, ignore_index=True)
+
+
+def tipo_meandata(df):
+    return "emisiones" if "CO2_abs" in df.columns else "trafico"
+
+
+# --- AGREGACIÓN PARA EL DASHBOARD ---
+# corridas: DataFrames de leer_meandata del mismo tipo (una por semilla); se promedian entre corridas
+def _claves(df):
+    # Una columna por calle, o por carril en archivos a nivel de carril (la ocupación no se puede
+    # sumar entre carriles). Los tramos internos de un cruce (":J19_0", ":J19_0_1") van juntos (":J19")
+    if df["lane"].notna().any():
+        return df["lane"].str.replace(r"^(:.*)_\d+_\d+$", r"\1", regex=True)
+    return df["edge"].str.replace(r"^(:.*)_\d+$", r"\1", regex=True)
+
+
+def matriz(corridas, columna):
+    # Intervalo × calle o carril (0 donde no hubo vehículos), promedio entre corridas
+    tablas = [df.assign(_clave=_claves(df)).pivot_table(index="begin", columns="_clave", values=columna,
+                                                        aggfunc="sum") for df in corridas]
+    if not tablas:
+        return pd.DataFrame()
+    todas = pd.concat(tablas, keys=range(len(tablas))).fillna(0.0)
+    tabla = todas.groupby(level=1).sum().div(len(tablas)).sort_index(axis=1)
+    tabla.columns.name = None
+    return tabla
+
+
+def serie_red(corridas, columna, como="suma"):
+    # Un valor por intervalo para toda la red: suma de las calles (emisiones) o promedio por calle
+    # (densidad, ocupación; sin los cruces); las calles vacías en un intervalo cuentan como 0
+    tabla = matriz(corridas, columna)
+    if como == "suma":
+        return tabla.sum(axis=1)
+    return tabla.loc[:, ~tabla.columns.str.startswith(":")].mean(axis=1)
+
+
+def total_por_calle(corridas, columna):
+    # Total de la corrida por calle o carril (p. ej. mg de CO2), promedio entre corridas
+    return matriz(corridas, columna).sum(axis=0).sort_values(ascending=False)
@@ -0,0 +1,145 @@
+import datetime
+import os
+import sqlite3
+
+import numpy as np
+import pandas as pd
+import traci.constants as tc
+
+from sensado import SensorVectorial
+
+# --- MÉTRICAS EN VIVO (SQLITE EN MODO WAL) ---
+# El bucle de simulación agrega filas a una base SQLite local mientras corre y el dashboard
+# las lee en paralelo. WAL permite un escritor y varios lectores sin bloquearse entre sí.
+# Todas las tablas son de solo inserción: el lector recuerda el último rowid leído de cada
+# una y en cada consulta pide solo las filas nuevas (nunca relee el historial).
+# - colas:  detenidos por calle de acceso de cada semáforo (cada `intervalo` pasos)
+# - fases:  cada cambio de fase, con el verde asignado en segundos (NULL si no es verde)
+# - red:    vehículos insertados y llegados desde la muestra anterior
+
+INTERVALO = 10  # pasos entre muestras (1 "segundo" del controlador)
+TABLAS = ("colas", "fases", "red")
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS corridas (
+    id INTEGER PRIMARY KEY AUTOINCREMENT, creada TEXT, modo TEXT, perfil TEXT, semilla INTEGER,
+    backend TEXT, pasos INTEGER, terminada INTEGER DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS colas (corrida INTEGER, paso INTEGER, semaforo TEXT, calle TEXT, detenidos INTEGER);
+CREATE TABLE IF NOT EXISTS fases (corrida INTEGER, paso INTEGER, semaforo TEXT, fase INTEGER, verde_s REAL);
+CREATE TABLE IF NOT EXISTS red (corrida INTEGER, paso INTEGER, insertados INTEGER, llegados INTEGER);
+"""
+
+
+def _conectar(ruta):
+    directorio = os.path.dirname(ruta)
+    if directorio:
+        os.makedirs(directorio, exist_ok=True)
+    db = sqlite3.connect(ruta, timeout=30)
+    db.execute("PRAGMA journal_mode=WAL")
+    # Con WAL, NORMAL no pierde consistencia y evita un fsync por commit
+    db.execute("PRAGMA synchronous=NORMAL")
+    db.executescript(ESQUEMA)
+    return db
+
+
+class PublicadorVivo:
+    # Una corrida: se engancha al motor de semáforos y publica una muestra cada `intervalo` pasos
+    def __init__(self, ruta, conn, motor, modo=None, perfil=None, semilla=None, backend=None, pasos=None,
+                 intervalo=INTERVALO):
+        self.db = _conectar(ruta)
+        self.motor = motor
+        self.intervalo = intervalo
+        self.pasos = pasos
+        cursor = self.db.execute(
+            "INSERT INTO corridas (creada, modo, perfil, semilla, backend, pasos) VALUES (?, ?, ?, ?, ?, ?)",
+            (datetime.datetime.now().isoformat(timespec="seconds"), modo, perfil, semilla, backend, pasos))
+        self.corrida = cursor.lastrowid
+        self.db.commit()
+
+        # Calles de acceso de cada semáforo del motor (una suscripción por calle)
+        topologia = motor.topologia
+        self._acceso = [(tls, calle) for tls in motor.semaforos for calle in topologia.calles_controladas(tls)]
+        calles = sorted({calle for _, calle in self._acceso})
+        posicion = {calle: i for i, calle in enumerate(calles)}
+        self._posiciones = np.array([posicion[calle] for _, calle in self._acceso], dtype=np.int64)
+        self.sensor = SensorVectorial(conn, calles, "edge")
+        # Llegadas: suscripción de la simulación (viene con cada simulationStep, sin consultas extra)
+        self._simulacion = conn.simulation
+        self._simulacion.subscribe((tc.VAR_ARRIVED_VEHICLES_NUMBER,))
+        self._llegados = 0
+        self._insertados = self._insertados_publicados = 0
+        self._fases = []
+
+    def paso(self, step, cambian, insertados=0):
+        # Llamar una vez por paso, después de motor.paso()
+        # cambian: semáforos que cambiaron de fase; insertados: total acumulado de la demanda
+        self._llegados += self._simulacion.getSubscriptionResults()[tc.VAR_ARRIVED_VEHICLES_NUMBER]
+        self._insertados = insertados
+        motor = self.motor
+        for i in cambian.tolist():
+            verde = motor.temporizador[i] / 10 if motor.en_verde(i) else None
+            self._fases.append((self.corrida, step, motor.semaforos[i], int(motor.fase[i]), verde))
+        # El último paso siempre se publica (la corrida termina con su muestra final)
+        if step % self.intervalo == 0 or step == self.pasos - 1:
+            self._publicar(step)
+
+    def _publicar(self, step):
+        todas = np.arange(len(self.sensor.ids))
+        detenidos = self.sensor.leer_variable(tc.LAST_STEP_VEHICLE_HALTING_NUMBER, todas)[self._posiciones].tolist()
+        with self.db:
+            self.db.executemany("INSERT INTO colas VALUES (?, ?, ?, ?, ?)",
+                                [(self.corrida, step, tls, calle, d) for (tls, calle), d in zip(self._acceso, detenidos)])
+            self.db.executemany("INSERT INTO fases VALUES (?, ?, ?, ?, ?)", self._fases)
+            self.db.execute("INSERT INTO red VALUES (?, ?, ?, ?)",
+                            (self.corrida, step, self._insertados - self._insertados_publicados, self._llegados))
+        self._fases = []
+        self._insertados_publicados = self._insertados
+        self._llegados = 0
+
+    def cerrar(self):
+        with self.db:
+            self.db.execute("UPDATE corridas SET terminada = 1 WHERE id = ?", (self.corrida,))
+        self.db.close()
+
+
+class LectorVivo:
+    # Lado del dashboard: solo lectura, con un cursor (último rowid) por tabla
+    def __init__(self, ruta, corrida):
+        self.ruta = ruta
+        # int(): un np.int64 se enlazaría como BLOB y no coincidiría con ninguna fila
+        self.corrida = int(corrida)
+        self._cursores = dict.fromkeys(TABLAS, 0)
+
+    def nuevas(self):
+        # {tabla: DataFrame con las filas agregadas desde la lectura anterior} + "terminada"
+        resultado = {}
+        db = _abrir_lectura(self.ruta)
+        try:
+            for tabla in TABLAS:
+                # El rango de rowid se resuelve con la clave primaria: no se recorre lo ya leído
+                df = pd.read_sql_query(f"SELECT rowid AS _fila, * FROM {tabla} WHERE rowid > ? AND corrida = ? "
+                                       f"ORDER BY rowid", db, params=(self._cursores[tabla], self.corrida))
+                if len(df):
+                    self._cursores[tabla] = int(df["_fila"].iloc[-1])
+                resultado[tabla] = df.drop(columns=["_fila", "corrida"])
+            terminada = db.execute("SELECT terminada FROM corridas WHERE id = ?", (self.corrida,)).fetchone()
+        finally:
+            db.close()
+        resultado["terminada"] = bool(terminada and terminada[0])
+        return resultado
+
+
+def _abrir_lectura(ruta):
+    uri = os.path.abspath(ruta).replace("?", "%3f").replace("#", "%23")
+    return sqlite3.connect(f"file:{uri}?mode=ro", uri=True, timeout=5)
+
+
+def listar_corridas(ruta):
+    if not os.path.exists(ruta):
+        return pd.DataFrame(columns=["id", "creada", "modo", "perfil", "semilla", "backend", "pasos", "terminada"])
+    db = _abrir_lectura(ruta)
+    try:
+        return pd.read_sql_query("SELECT * FROM corridas ORDER BY id DESC", db)
+    finally:
+        db.close()
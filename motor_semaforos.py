@@ -0,0 +1,172 @@
+import numpy as np
+import traci.constants as tc
+
+from controladores import crear_controlador
+from sensado import SensorVectorial
+
+# --- MOTOR DE CONTROL PARA TODA LA RED ---
+# Maneja todos los semáforos de la red a la vez. El estado de cada intersección
+# (fase, temporizador, colas) vive en arreglos NumPy y todas se actualizan en una
+# sola pasada vectorizada por paso; solo las que cambian de fase generan llamadas a SUMO.
+# La estructura (carriles controlados, verdes por fase) viene del índice de topologia.py
+# y la política (qué fase y cuánto verde) del controlador elegido (controladores.py).
+
+# Tiempos en pasos del bucle (10 pasos = 1 "segundo" del controlador, como en main2.py)
+TIEMPO_AMARILLO = 40
+# Duración (s) que se le da en SUMO a la fase actual para que su programa no la cambie
+DURACION_SUMO = 9999
+
+
+class MotorSemaforos:
+    def __init__(self, conn, topologia, controlador="ia", semaforos=None, amarillo=TIEMPO_AMARILLO):
+        self.conn = conn
+        self.amarillo = amarillo
+        self.controlador = crear_controlador(controlador)
+        self.modo = self.controlador.nombre
+        self.topologia = topologia
+        self.semaforos = sorted(semaforos) if semaforos is not None else list(topologia.semaforos)
+        n = len(self.semaforos)
+        filas = np.array([topologia.indice_semaforo[t] for t in self.semaforos], dtype=np.int64)
+
+        # Carriles controlados de todos los semáforos, contiguos por semáforo (índice precomputado)
+        inicio, fin = topologia.inicio_controlados[filas], topologia.inicio_controlados[filas + 1]
+        tramos = [np.arange(a, b) for a, b in zip(inicio.tolist(), fin.tolist())]
+        posiciones = np.concatenate(tramos) if tramos else np.zeros(0, dtype=np.int64)
+        carriles = topologia.controlados[posiciones]
+        self.carriles = [topologia.carriles[c] for c in carriles.tolist()]
+        self._semaforo_carril = np.repeat(np.arange(n), fin - inicio)
+        self._filas_carril = np.arange(len(carriles))
+        # (carril × fase): el carril tiene verde en esa fase
+        self._verde_carril = topologia.verde_carril[posiciones]
+
+        # Carriles de una misma calle son consecutivos: grupos para sumar la cola por calle
+        calle = topologia.calle_de_carril[carriles]
+        nueva = np.ones(len(carriles), dtype=bool)
+        nueva[1:] = (calle[1:] != calle[:-1]) | (self._semaforo_carril[1:] != self._semaforo_carril[:-1])
+        self._calle_carril = np.cumsum(nueva) - 1
+        self._semaforo_calle = self._semaforo_carril[nueva]
+
+        self.num_fases = topologia.num_fases[filas]
+        # (semáforo × fase): la fase es verde (la usan también los controladores)
+        self.es_verde = topologia.fase_verde[filas]
+        self.fase = np.array([conn.trafficlight.getPhase(t) for t in self.semaforos], dtype=np.int64)
+        # Solo el motor cambia de fase: el programa de SUMO no debe vencer ninguna por su cuenta
+        for tls in self.semaforos:
+            conn.trafficlight.setPhaseDuration(tls, DURACION_SUMO)
+        self.temporizador = np.zeros(n, dtype=np.int64)
+        # Fase verde elegida por el controlador mientras dura la transición (-1: ninguna)
+        self.objetivo = np.full(n, -1, dtype=np.int64)
+        self.max_cola = np.zeros(n, dtype=np.int64)
+        self._filas = np.arange(n)
+        # Los controladores que no miran las colas (p. ej. el ciclo fijo) no se suscriben
+        self.sensor = SensorVectorial(conn, self.carriles, "lane") if self.controlador.sensado else None
+        self.controlador.preparar(self)
+
+    def en_verde(self, i):
+        return bool(self.es_verde[i, self.fase[i]])
+
+    def verdes(self):
+        # Qué semáforos están en una fase verde ahora
+        return self.es_verde[self._filas, self.fase]
+
+    def vehiculos_en_verde(self, candidatos):
+        # Solo se consultan los carriles con verde en la fase actual de los semáforos candidatos
+        verde = self._verde_carril[self._filas_carril, self.fase[self._semaforo_carril]]
+        posiciones = np.flatnonzero(verde & candidatos[self._semaforo_carril])
+        vehiculos = self.sensor.leer_variable(tc.LAST_STEP_VEHICLE_NUMBER, posiciones)
+        return np.bincount(self._semaforo_carril[posiciones], weights=vehiculos, minlength=len(self.semaforos))
+
+    def leer_max_cola(self, idx):
+        # Cola más larga por calle de acceso (suma de sus carriles), solo para los que deciden
+        decide = np.zeros(len(self.semaforos), dtype=bool)
+        decide[idx] = True
+        posiciones = np.flatnonzero(decide[self._semaforo_carril])
+        detenidos = self.sensor.leer_variable(tc.LAST_STEP_VEHICLE_HALTING_NUMBER, posiciones)
+        por_calle = np.bincount(self._calle_carril[posiciones], weights=detenidos,
+                                minlength=len(self._semaforo_calle)).astype(np.int64)
+        max_cola = np.zeros(len(self.semaforos), dtype=np.int64)
+        np.maximum.at(max_cola, self._semaforo_calle, por_calle)
+        self.max_cola[idx] = max_cola[idx]
+        return self.max_cola[idx]
+
+    def siguiente_verde(self, idx):
+        # Próxima fase verde del ciclo después de la actual (la misma si es la única)
+        desplazamiento = np.arange(1, self.es_verde.shape[1] + 1)
+        candidatas = (self.fase[idx, None] + desplazamiento) % self.num_fases[idx, None]
+        verdes = self.es_verde[idx[:, None], candidatas]
+        primera = np.argmax(verdes, axis=1)
+        siguiente = candidatas[np.arange(len(idx)), primera]
+        return np.where(verdes.any(axis=1), siguiente, (self.fase[idx] + 1) % self.num_fases[idx])
+
+    def pasos_libres(self):
+        # Cuántos de los próximos pasos solo descuentan temporizadores: ninguno vence y el
+        # controlador no necesita mirar las colas (avance rápido en escenario.py)
+        activos = self.temporizador > 0
+        if not activos.all():
+            return 0
+        libres = int(self.temporizador.min()) - 1 if len(self.temporizador) else np.iinfo(np.int64).max
+        return max(min(libres, self.controlador.pasos_sin_cortar(self)), 0)
+
+    def avanzar(self, pasos):
+        # Equivale a `pasos` llamadas a paso() cuando pasos <= pasos_libres()
+        self.temporizador -= pasos
+
+    def paso(self):
+        en_verde = self.verdes()
+
+        # --- Cuenta regresiva + corte anticipado de verdes (si el controlador lo usa) ---
+        activos = self.temporizador > 0
+        self.temporizador[activos] -= 1
+        candidatos = activos & en_verde
+        if candidatos.any():
+            corte = self.controlador.cortar(self, candidatos)
+            if corte is not None:
+                self.temporizador[corte] = 0
+
+        # --- CAMBIO DE FASE para los semáforos cuyo temporizador venció ---
+        vencidos = np.flatnonzero(self.temporizador <= 0)
+        if vencidos.size == 0:
+            return vencidos
+
+        fase = self.fase[vencidos]
+        siguiente = (fase + 1) % self.num_fases[vencidos]
+        verde_siguiente = self.es_verde[vencidos, siguiente]
+        nueva = siguiente.copy()
+
+        # Fin de un verde: el controlador elige la fase objetivo. Si es la misma se extiende;
+        # si no, se pasa por la transición (amarillo) que sigue en el programa.
+        termina_verde = en_verde[vencidos]
+        if termina_verde.any():
+            i = vencidos[termina_verde]
+            objetivo = self.controlador.fase_objetivo(self, i)
+            self.objetivo[i] = objetivo
+            directo = (objetivo == fase[termina_verde]) | verde_siguiente[termina_verde]
+            nueva[termina_verde] = np.where(directo, objetivo, siguiente[termina_verde])
+
+        # Fin de la transición: se entra a la fase objetivo (o a la siguiente si no hay)
+        transicion = ~termina_verde & verde_siguiente
+        if transicion.any():
+            objetivo = self.objetivo[vencidos[transicion]]
+            nueva[transicion] = np.where(objetivo >= 0, objetivo, siguiente[transicion])
+
+        entra_verde = self.es_verde[vencidos, nueva]
+        duracion = np.full(vencidos.size, self.amarillo, dtype=np.int64)
+        if entra_verde.any():
+            duracion[entra_verde] = self.controlador.duracion_verde(self, vencidos[entra_verde])
+            self.objetivo[vencidos[entra_verde]] = -1
+        self.temporizador[vencidos] = duracion
+        self.fase[vencidos] = nueva
+
+        # Solo los semáforos que cambian de fase (o extienden su verde) llaman a SUMO
+        cambia = nueva != fase
+        for i, f, c in zip(vencidos.tolist(), nueva.tolist(), cambia.tolist()):
+            tls = self.semaforos[i]
+            if c:
+                self.conn.trafficlight.setPhase(tls, f)
+            self.conn.trafficlight.setPhaseDuration(tls, DURACION_SUMO)
+        return vencidos[cambia]
+
+    def desfasados(self):
+        # Semáforos cuya fase en SUMO no es la que lleva el motor (deberían ser ninguno)
+        return [tls for tls, f in zip(self.semaforos, self.fase.tolist())
+                if self.conn.trafficlight.getPhase(tls) != f]
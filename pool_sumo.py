@@ -0,0 +1,254 @@
+import argparse
+import multiprocessing
+import os
+import signal
+import sys
+import tempfile
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing.util import Finalize
+
+from conexion import BACKENDS, ERRORES_FATALES, ERRORES_SUMO, abrir_conexion
+from escenario import ARCHIVO_RED, PERFILES, MODOS, ejecutar_escenario, obtener_estado, ruta_binario_sumo
+
+# --- POOL DE SUMO "CALIENTES" ---
+# Cada proceso del pool mantiene un SUMO abierto entre trabajos. Un trabajo nuevo no relanza
+# el proceso ni repite la conexión TraCI: recarga la simulación con sus opciones (load).
+# - Antes de cada trabajo se verifica que SUMO responda; si no, se relanza.
+# - Si un proceso del pool muere, el pool se reconstruye y sus trabajos se reenvían; solo gasta
+#   un reintento el que corría en ese proceso (los demás solo compartían el pool roto).
+
+# Tras cada trabajo se carga una simulación mínima (solo la red): así SUMO cierra y
+# completa los archivos de salida del trabajo anterior sin cerrar la conexión
+OPCIONES_REPOSO = ["--no-step-log", "true", "--no-warnings", "true"]
+# Se relanza SUMO cada tantas corridas (acota la memoria acumulada)
+MAX_CORRIDAS = 200
+REINTENTOS = 1
+
+
+class TrabajadorSumo:
+    def __init__(self, backend="traci", max_corridas=MAX_CORRIDAS):
+        self.backend = backend
+        self.max_corridas = max_corridas
+        # Con libsumo no hay proceso ni socket que ahorrar: iniciar es más barato que recargar dos veces
+        self.recargar = backend == "traci"
+        self.conn = None
+        self.corridas = 0
+        self.lanzamientos = 0
+        self.recargas = 0
+
+    def sano(self):
+        if self.conn is None:
+            return False
+        try:
+            self.conn.simulation.getTime()
+            return True
+        except ERRORES_FATALES + ERRORES_SUMO:
+            return False
+
+    def conexion(self, cmd, label=None):
+        if self.conn is not None and (self.corridas >= self.max_corridas or not self.sano()):
+            self.cerrar()
+        if self.conn is not None:
+            try:
+                # Mismo proceso y misma conexión: solo se recarga con las nuevas opciones
+                self.conn.load(cmd[1:])
+                self.recargas += 1
+                self.corridas += 1
+                return self.conn
+            except ERRORES_FATALES + ERRORES_SUMO:
+                self.cerrar()
+        self.conn = abrir_conexion(cmd, self.backend, label=label or f"pool-{os.getpid()}")
+        self.lanzamientos += 1
+        self.corridas = 1
+        return self.conn
+
+    def liberar(self):
+        # Cierra las salidas del trabajo (tripinfo, estados...) dejando SUMO vivo
+        if not self.recargar:
+            self.cerrar()
+            return
+        try:
+            self.conn.load(["-n", ARCHIVO_RED] + OPCIONES_REPOSO)
+        except ERRORES_FATALES + ERRORES_SUMO:
+            self.cerrar()
+
+    def cerrar(self):
+        if self.conn is not None:
+            try:
+                self.conn.close()
+            except ERRORES_FATALES + ERRORES_SUMO:
+                pass
+        self.conn = None
+
+
+# Un trabajador por proceso del pool (None fuera del pool)
+_trabajador = None
+# Cola por la que el proceso avisa al pool qué trabajo empieza y termina, y el que corre ahora
+_avisos = None
+_actual = None
+
+
+def _cortado(signum, frame):
+    # Otro proceso murió y el pool termina a los demás: el trabajo de este no tuvo la culpa
+    if _actual is not None:
+        _avisos.put((_actual, False))
+    os._exit(1)
+
+
+def _iniciar(backend, max_corridas, avisos=None):
+    global _trabajador, _avisos
+    _trabajador = TrabajadorSumo(backend, max_corridas)
+    _avisos = avisos
+    signal.signal(signal.SIGTERM, _cortado)
+    # Al terminar el proceso del pool se cierra su SUMO (si no, SUMO ve el socket cortado)
+    Finalize(_trabajador, _trabajador.cerrar, exitpriority=10)
+
+
+def trabajador_actual():
+    return _trabajador
+
+
+def ejecutar_trabajo(trabajo):
+    # Trabajo = argumentos de ejecutar_escenario (modo, perfil, semilla, archivo_salida, ...). Corre en
+    # un proceso del pool y reusa su SUMO caliente (etiqueta por corrida si hay que lanzarlo)
+    inicio = time.perf_counter()
+    argumentos = {"label": f"{trabajo['modo']}-{trabajo['perfil']}-{trabajo['semilla']}", **trabajo}
+    resultado = ejecutar_escenario(**argumentos, trabajador=trabajador_actual())
+    # Lo que devuelve la corrida gana sobre el trabajo (p. ej. "meandata": rutas de salida, no el período)
+    resultado = {**trabajo, **resultado}
+    resultado["segundos"] = time.perf_counter() - inicio
+    return resultado
+
+
+def _ejecutar_avisando(funcion, numero, trabajo):
+    # Si el proceso muere en medio, el trabajo queda empezado y sin terminar: fue el que corría
+    global _actual
+    _avisos.put((numero, True))
+    _actual = numero
+    try:
+        return funcion(trabajo)
+    finally:
+        _actual = None
+        _avisos.put((numero, False))
+
+
+def calentar(argumentos):
+    # Argumentos de obtener_estado (perfil, semilla, pasos, calentamiento, controlador, backend)
+    return obtener_estado(*argumentos, trabajador=trabajador_actual())
+
+
+class PoolSumo:
+    def __init__(self, procesos=None, backend="traci", max_corridas=MAX_CORRIDAS, reintentos=REINTENTOS):
+        self.procesos = procesos
+        self.backend = backend
+        self.max_corridas = max_corridas
+        self.reintentos = reintentos
+        self.reconstrucciones = 0
+        self._pool = self._crear()
+
+    def _crear(self):
+        # SimpleQueue escribe en el pipe sin hilo intermedio: los avisos de un proceso que muere
+        # ya están en la cola cuando el pool se rompe
+        self._avisos = multiprocessing.SimpleQueue()
+        self._corriendo = set()
+        return ProcessPoolExecutor(max_workers=self.procesos, initializer=_iniciar,
+                                   initargs=(self.backend, self.max_corridas, self._avisos))
+
+    def _leer_avisos(self):
+        while not self._avisos.empty():
+            numero, empieza = self._avisos.get()
+            if empieza:
+                self._corriendo.add(numero)
+            else:
+                self._corriendo.discard(numero)
+
+    def _enviar(self, funcion, numero, trabajo):
+        return self._pool.submit(_ejecutar_avisando, funcion, numero, trabajo)
+
+    def mapear(self, trabajos, funcion=ejecutar_trabajo):
+        # Genera (trabajo, resultado, error) a medida que terminan. `funcion` corre en el proceso
+        # del pool y puede usar trabajador_actual() para reusar su SUMO.
+        pendientes = {self._enviar(funcion, n, t): (n, t, 0) for n, t in enumerate(trabajos)}
+        while pendientes:
+            hechos, _ = wait(pendientes, return_when=FIRST_COMPLETED)
+            roto = any(isinstance(f.exception(), BrokenProcessPool) for f in hechos)
+            if roto:
+                # Pool roto: todos sus futuros fallan enseguida y se resuelven juntos. Se espera a
+                # que terminen sus procesos: así ya están los avisos de los que cortó
+                hechos, _ = wait(pendientes)
+                self._pool.shutdown()
+            self._leer_avisos()
+            reintentar = []
+            for futuro in hechos:
+                numero, trabajo, intentos = pendientes.pop(futuro)
+                resultado, error = None, None
+                try:
+                    resultado = futuro.result()
+                except BrokenProcessPool as e:
+                    # Murió un proceso del pool: el trabajo se reenvía a un pool nuevo. Solo cuenta
+                    # como intento si corría en el proceso que murió; si esperaba turno o el pool
+                    # lo cortó en otro proceso no tuvo nada que ver
+                    if numero not in self._corriendo:
+                        reintentar.append((numero, trabajo, intentos))
+                        continue
+                    if intentos < self.reintentos:
+                        reintentar.append((numero, trabajo, intentos + 1))
+                        continue
+                    error = e
+                except Exception as e:
+                    error = e
+                yield trabajo, resultado, error
+            if roto:
+                self._avisos.close()
+                self._pool = self._crear()
+                self.reconstrucciones += 1
+                pendientes = {self._enviar(funcion, n, t): (n, t, i) for n, t, i in reintentar}
+
+    def cerrar(self):
+        self._pool.shutdown()
+        self._avisos.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+
+# --- BENCHMARK: POOL CALIENTE vs. UN SUMO NUEVO POR CORRIDA ---
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compara corridas cortas con SUMO nuevo por corrida vs. pool caliente.")
+    parser.add_argument("--corridas", type=int, default=40)
+    parser.add_argument("--pasos", type=int, default=300)
+    parser.add_argument("--modo", default="ia", choices=MODOS)
+    parser.add_argument("--perfil", default="pulsos", choices=PERFILES)
+    parser.add_argument("--procesos", type=int, default=None)
+    parser.add_argument("--backend", default="traci", choices=BACKENDS)
+    args = parser.parse_args(argv)
+
+    print(f"📊 {args.corridas} corridas de {args.pasos} pasos | {args.modo} | {args.backend} | {ruta_binario_sumo()}")
+    with tempfile.TemporaryDirectory() as tmp:
+        trabajos = [{"modo": args.modo, "perfil": args.perfil, "semilla": s, "pasos": args.pasos,
+                     "backend": args.backend, "archivo_salida": os.path.join(tmp, f"s{s}.xml")}
+                    for s in range(args.corridas)]
+
+        # Sin pool caliente: cada corrida lanza su SUMO (como experimentos.py antes)
+        inicio = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=args.procesos) as pool:
+            list(pool.map(ejecutar_trabajo, trabajos))
+        t_frio = time.perf_counter() - inicio
+        print(f"   🧊 SUMO nuevo por corrida: {t_frio:.2f}s ({t_frio / args.corridas * 1000:.0f} ms/corrida)")
+        sys.stdout.flush()
+
+        inicio = time.perf_counter()
+        with PoolSumo(args.procesos, args.backend) as pool:
+            errores = [e for _, _, e in pool.mapear(trabajos) if e is not None]
+        t_caliente = time.perf_counter() - inicio
+        print(f"   🔥 Pool caliente:          {t_caliente:.2f}s ({t_caliente / args.corridas * 1000:.0f} ms/corrida)"
+              f" | x{t_frio / t_caliente:.1f} | errores: {len(errores)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+import json
+import os
+import struct
+
+import numpy as np
+import pandas as pd
+import traci.constants as tc
+
+from conexion import ERRORES_SUMO
+
+# --- REGISTRO COMPACTO DE VIAJES ---
+# Alternativa al --tripinfo-output: los viajes se arman durante la corrida con suscripciones
+# (salidas y llegadas de la simulación + espera y tiempo perdido de cada vehículo en ruta) y
+# se guardan como registros binarios de tamaño fijo (32 bytes por viaje, ~10 veces menos que
+# el XML). El archivo es de solo agregado: cabecera JSON y después los registros, así se abre
+# con np.memmap sin copiar ni parsear nada (también mientras la corrida sigue escribiendo).
+# Lo constante de cada viaje (demora de salida, largo de la ruta) se pide una sola vez al salir.
+# Coincide con el tripinfo de SUMO en todos los campos salvo timeLoss, cuyo último paso
+# (el vehículo ya salió de la red) se extrapola del anterior: diferencia < 0.1 s por viaje.
+
+MAGICO = b"VIAJES\x00\x01"
+EXTENSION = ".viajes"
+ALINEACION = 64
+TAM_BUFFER = 4096
+SIN_INDICE = -1
+SIN_RUTA = 0xFFFF
+
+TIPO_VIAJE = np.dtype([
+    ("vehiculo", "<i4"),  # índice en el calendario de la demanda (SIN_INDICE si no viene de ahí)
+    ("depart", "<f4"),
+    ("departDelay", "<f4"),
+    ("arrival", "<f4"),
+    ("routeLength", "<f4"),
+    ("waitingTime", "<f4"),
+    ("timeLoss", "<f4"),
+    ("waitingCount", "<u2"),
+    ("ruta", "<u2"),  # índice en la lista "rutas" de la cabecera (SIN_RUTA si no es de la demanda)
+])
+
+# La suscripción de la simulación es una sola por conexión: se pide también el número de
+# llegados para no pisar la del publicador en vivo (metricas_vivo.py)
+VARIABLES_SIMULACION = (tc.VAR_TIME, tc.VAR_DEPARTED_VEHICLES_IDS, tc.VAR_ARRIVED_VEHICLES_IDS,
+                        tc.VAR_TELEPORT_STARTING_VEHICLES_IDS, tc.VAR_TELEPORT_ENDING_VEHICLES_IDS,
+                        tc.VAR_ARRIVED_VEHICLES_NUMBER)
+# Lo mínimo por vehículo y paso: cada variable suscrita se transfiere en todos los pasos
+VARIABLES_VEHICULO = (tc.VAR_WAITING_TIME, tc.VAR_TIMELOSS)
+# Al arrancar desde un estado guardado: el dispositivo tripinfo (sin archivo de salida) trae la
+# espera que los vehículos ya en la red acumularon antes del estado
+OPCIONES_ESTADO = ("--device.tripinfo.probability", "1")
+
+
+def es_registro(fuente):
+    # Reconoce el formato por su número mágico (ruta o archivo abierto, sin mover la posición)
+    if isinstance(fuente, (str, os.PathLike)):
+        with open(fuente, "rb") as f:
+            return f.read(len(MAGICO)) == MAGICO
+    posicion = fuente.tell()
+    inicio = fuente.read(len(MAGICO))
+    fuente.seek(posicion)
+    return inicio == MAGICO
+
+
+class RegistradorViajes:
+    # Llamar paso() una vez por paso, después de simulationStep(), y cerrar() al final
+    def __init__(self, ruta, conn, demanda=None, metadatos=None, tam_buffer=TAM_BUFFER):
+        self.ruta = ruta
+        self._conn = conn
+        self._vehiculo = conn.vehicle
+        self._simulacion = conn.simulation
+        self._dt = self._simulacion.getDeltaT()
+        self._simulacion.subscribe(VARIABLES_SIMULACION)
+
+        self._rutas = []
+        self._indices = {}
+        if demanda is not None:
+            self._rutas = [ruta_id for ruta_id, _, _ in demanda.rutas]
+            rutas_calendario = demanda.ruta.tolist()
+            self._indices = {vid: (j, rutas_calendario[j]) for j, (_, vid, _) in enumerate(demanda.vehiculos())}
+        self._largos = {}
+        self._buffer = np.zeros(tam_buffer, dtype=TIPO_VIAJE)
+        self._n = 0
+        self.viajes = 0
+
+        directorio = os.path.dirname(ruta)
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+        self._archivo = open(ruta, "wb")
+        self._archivo.write(_cabecera({"campos": TIPO_VIAJE.descr, "paso": self._dt, "rutas": self._rutas,
+                                       "metadatos": dict(metadatos or {})}))
+
+        # vehículo -> [espera acumulada, esperas cerradas, espera consecutiva, tiempo perdido,
+        #              tiempo perdido del paso anterior, índice, ruta, salida, demora, largo]
+        self._activos = {}
+        # Vehículos que ya estaban en la red (p. ej. tras cargar un estado de calentamiento)
+        for vid in self._vehiculo.getIDList():
+            self._seguir(vid, self._vehiculo.getDeparture(vid))
+            self._espera_previa(vid)
+
+    def _espera_previa(self, vid):
+        # Espera anterior al registro: del dispositivo tripinfo (OPCIONES_ESTADO) o, sin él, la
+        # acumulada de SUMO (solo recuerda los últimos 100 s)
+        vehiculo = self._vehiculo
+        consecutiva = vehiculo.getWaitingTime(vid)
+        try:
+            total = float(vehiculo.getParameter(vid, "device.tripinfo.waitingTime"))
+            esperas = int(vehiculo.getParameter(vid, "device.tripinfo.waitingCount"))
+        except (ValueError, *ERRORES_SUMO):
+            total = vehiculo.getAccumulatedWaitingTime(vid)
+            esperas = int(total > 0)
+        # La espera en curso se sigue contando paso a paso
+        self._activos[vid][:3] = [max(total - consecutiva, 0.0), max(esperas - (consecutiva > 0), 0), consecutiva]
+
+    def _seguir(self, vid, salida):
+        vehiculo = self._vehiculo
+        vehiculo.subscribe(vid, VARIABLES_VEHICULO)
+        indice, ruta = self._indices.get(vid, (SIN_INDICE, SIN_RUTA))
+        ruta_id = self._rutas[ruta] if ruta != SIN_RUTA else vehiculo.getRouteID(vid)
+        largo = self._largos.get(ruta_id)
+        if largo is None:
+            # Igual para todos los vehículos de la ruta
+            largo = self._largos[ruta_id] = self._largo_recorrido(vid)
+        self._activos[vid] = [0.0, 0, 0.0, 0.0, 0.0, indice, ruta, salida, vehiculo.getDepartDelay(vid), largo]
+
+    def _largo_recorrido(self, vid):
+        # Lo recorrido hasta ahora + lo que falta hasta el final de la ruta
+        vehiculo = self._vehiculo
+        ultima = vehiculo.getRoute(vid)[-1]
+        return vehiculo.getDistance(vid) + vehiculo.getDrivingDistance(
+            vid, ultima, self._conn.lane.getLength(f"{ultima}_0"))
+
+    def paso(self):
+        resultados = self._simulacion.getSubscriptionResults()
+        # VAR_TIME es el tiempo al terminar el paso: salidas y llegadas ocurrieron en el anterior a él
+        ahora = resultados[tc.VAR_TIME] - self._dt
+        for vid in resultados[tc.VAR_DEPARTED_VEHICLES_IDS]:
+            self._seguir(vid, ahora)
+
+        activos = self._activos
+        for vid, valores in self._vehiculo.getAllSubscriptionResults().items():
+            estado = activos.get(vid)
+            if estado is None:
+                continue
+            espera = valores[tc.VAR_WAITING_TIME]
+            # La espera de TraCI es consecutiva: si bajó, el vehículo volvió a moverse
+            if espera < estado[2]:
+                estado[0] += estado[2]
+                estado[1] += 1
+            estado[2] = espera
+            estado[4] = estado[3]
+            estado[3] = valores[tc.VAR_TIMELOSS]
+
+        # Teletransportes (atascos): el paso en que desaparece cuenta como espera y el tramo
+        # saltado no se suma al largo (igual que en el tripinfo)
+        for vid in resultados[tc.VAR_TELEPORT_STARTING_VEHICLES_IDS]:
+            if vid in activos:
+                activos[vid][0] += self._dt
+        for vid in resultados[tc.VAR_TELEPORT_ENDING_VEHICLES_IDS]:
+            if vid in activos:
+                activos[vid][9] = self._largo_recorrido(vid)
+
+        for vid in resultados[tc.VAR_ARRIVED_VEHICLES_IDS]:
+            estado = activos.pop(vid, None)
+            if estado is not None:
+                self._agregar(ahora, estado)
+
+    def _agregar(self, llegada, estado):
+        espera, esperas, consecutiva, perdida, perdida_previa, indice, ruta, salida, demora, largo = estado
+        self._buffer[self._n] = (indice, salida, demora, llegada, largo, espera + consecutiva,
+                                 perdida + (perdida - perdida_previa), esperas + (consecutiva > 0), ruta)
+        self._n += 1
+        self.viajes += 1
+        if self._n == len(self._buffer):
+            self.volcar()
+
+    def volcar(self):
+        # Agrega los registros pendientes al final del archivo (los lectores ven solo registros completos)
+        if self._n:
+            self._archivo.write(self._buffer[:self._n].tobytes())
+            self._archivo.flush()
+            self._n = 0
+
+    def cerrar(self):
+        if self._archivo.closed:
+            return
+        self.volcar()
+        self._archivo.close()
+
+
+def _cabecera(datos):
+    # MAGICO + largo (uint32) + JSON, con relleno para que los registros queden alineados
+    texto = json.dumps(datos, ensure_ascii=False).encode()
+    largo = len(MAGICO) + 4 + len(texto)
+    texto += b" " * (-largo % ALINEACION)
+    return MAGICO + struct.pack("<I", len(texto)) + texto
+
+
+def _leer_cabecera(datos):
+    # datos: bytes o memoryview con al menos la cabecera completa
+    if len(datos) < len(MAGICO) + 4 or datos[:len(MAGICO)] != MAGICO:
+        raise ValueError("No es un registro de viajes (número mágico incorrecto)")
+    (largo,) = struct.unpack("<I", datos[len(MAGICO):len(MAGICO) + 4])
+    desplazamiento = len(MAGICO) + 4 + largo
+    return json.loads(bytes(datos[len(MAGICO) + 4:desplazamiento])), desplazamiento
+
+
+def abrir_viajes(fuente):
+    # (arreglo estructurado, cabecera) sin copiar: memmap de una ruta o vista sobre el buffer de
+    # un archivo ya en memoria (p. ej. el UploadedFile de Streamlit). Un registro a medio escribir
+    # al final (corrida en curso) se ignora.
+    if isinstance(fuente, (str, os.PathLike)):
+        with open(fuente, "rb") as f:
+            inicio = f.read(len(MAGICO) + 4)
+            if len(inicio) == len(MAGICO) + 4:
+                inicio += f.read(struct.unpack("<I", inicio[len(MAGICO):])[0])
+        cabecera, desplazamiento = _leer_cabecera(inicio)
+        tipo = np.dtype([tuple(campo) for campo in cabecera["campos"]])
+        n = (os.path.getsize(fuente) - desplazamiento) // tipo.itemsize
+        if n == 0:
+            return np.zeros(0, dtype=tipo), cabecera
+        return np.memmap(fuente, dtype=tipo, mode="r", offset=desplazamiento, shape=(n,)), cabecera
+
+    buffer = memoryview(fuente.getbuffer() if hasattr(fuente, "getbuffer") else fuente.read())
+    cabecera, desplazamiento = _leer_cabecera(buffer)
+    tipo = np.dtype([tuple(campo) for campo in cabecera["campos"]])
+    n = (len(buffer) - desplazamiento) // tipo.itemsize
+    return np.frombuffer(buffer, dtype=tipo, count=n, offset=desplazamiento), cabecera
+
+
+def leer_viajes(fuente):
+    # DataFrame con las columnas de tripinfo que tiene el registro (+ duration y el id de la ruta)
+    viajes, cabecera = abrir_viajes(fuente)
+    df = pd.DataFrame({campo: viajes[campo].astype(np.float64) for campo in viajes.dtype.names
+                       if campo not in ("vehiculo", "ruta")})
+    df["duration"] = df["arrival"] - df["depart"]
+    df.insert(0, "vehiculo", viajes["vehiculo"].astype(np.int64))
+    rutas = np.array(cabecera["rutas"] + [""], dtype=object)
+    df.insert(1, "ruta", rutas[np.minimum(viajes["ruta"], len(rutas) - 1)])
+    return df
@@ -0,0 +1,79 @@
+import numpy as np
+import traci.constants as tc
+
+# --- SENSADO POR SUSCRIPCIONES ---
+# En lugar de preguntar calle por calle en cada paso (un viaje por socket por consulta),
+# nos suscribimos una sola vez y SUMO devuelve todos los valores junto con simulationStep().
+# Leer la "foto" del paso no genera llamadas extra a TraCI.
+
+VARIABLES_CALLE = (tc.LAST_STEP_VEHICLE_HALTING_NUMBER, tc.LAST_STEP_VEHICLE_NUMBER)
+VARIABLES_SEMAFORO = (tc.TL_CURRENT_PHASE,)
+
+
+class Lectura:
+    # Foto de un paso: colas (detenidos), vehículos totales por calle y fase de cada semáforo
+    __slots__ = ("detenidos", "vehiculos", "fases")
+
+    def __init__(self, detenidos, vehiculos, fases):
+        self.detenidos = detenidos
+        self.vehiculos = vehiculos
+        self.fases = fases
+
+    def max_cola(self, calles):
+        return max((self.detenidos.get(c, 0) for c in calles), default=0)
+
+    def total_vehiculos(self, calles):
+        return sum(self.vehiculos.get(c, 0) for c in calles)
+
+
+class Sensor:
+    def __init__(self, conn, calles, semaforos):
+        self.conn = conn
+        self.calles = list(calles)
+        self.semaforos = list(semaforos)
+        for calle in self.calles:
+            conn.edge.subscribe(calle, VARIABLES_CALLE)
+        for tls in self.semaforos:
+            conn.trafficlight.subscribe(tls, VARIABLES_SEMAFORO)
+
+    def leer(self):
+        # Un solo lote por dominio (resultados ya recibidos con el último simulationStep)
+        calles = self.conn.edge.getAllSubscriptionResults()
+        semaforos = self.conn.trafficlight.getAllSubscriptionResults()
+
+        detenidos = {}
+        vehiculos = {}
+        for calle, valores in calles.items():
+            detenidos[calle] = valores[tc.LAST_STEP_VEHICLE_HALTING_NUMBER]
+            vehiculos[calle] = valores[tc.LAST_STEP_VEHICLE_NUMBER]
+        fases = {tls: valores[tc.TL_CURRENT_PHASE] for tls, valores in semaforos.items()}
+        return Lectura(detenidos, vehiculos, fases)
+
+
+class SensorVectorial:
+    # Igual que Sensor, pero entrega arreglos NumPy alineados con la lista de ids
+    # (para controladores que procesan muchos semáforos a la vez).
+    # dominio: "edge" (calles) o "lane" (carriles)
+    def __init__(self, conn, ids, dominio="edge"):
+        self.conn = conn
+        self.ids = list(ids)
+        self._dominio = getattr(conn, dominio)
+        for i in self.ids:
+            self._dominio.subscribe(i, VARIABLES_CALLE)
+
+    def leer(self):
+        resultados = self._dominio.getAllSubscriptionResults()
+        n = len(self.ids)
+        detenidos = np.fromiter((resultados[i][tc.LAST_STEP_VEHICLE_HALTING_NUMBER] for i in self.ids),
+                                dtype=np.int64, count=n)
+        vehiculos = np.fromiter((resultados[i][tc.LAST_STEP_VEHICLE_NUMBER] for i in self.ids),
+                                dtype=np.int64, count=n)
+        return detenidos, vehiculos
+
+    def leer_variable(self, variable, posiciones):
+        # Solo las posiciones pedidas (p. ej. los carriles con verde en la fase actual):
+        # con libsumo getAllSubscriptionResults arma el diccionario completo en cada llamada
+        obtener = self._dominio.getSubscriptionResults
+        ids = self.ids
+        return np.fromiter((obtener(ids[p])[variable] for p in posiciones.tolist()),
+                           dtype=np.int64, count=len(posiciones))
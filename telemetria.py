@@ -0,0 +1,87 @@
+import collections
+import sys
+import threading
+import time
+
+# --- TELEMETRÍA ASÍNCRONA Y RITMO DE SIMULACIÓN ---
+# El hilo de simulación nunca escribe en la terminal: deja los mensajes en un buffer
+# circular acotado y un hilo de fondo los vuelca a la consola cada cierto intervalo.
+
+RITMOS = ("rapido", "tiempo_real")
+
+
+class Telemetria:
+    def __init__(self, capacidad=10000, intervalo=0.5, salida=None):
+        # deque(maxlen) descarta lo más antiguo si se llena: publicar() nunca bloquea
+        self._buffer = collections.deque(maxlen=capacidad)
+        self._capacidad = capacidad
+        self._intervalo = intervalo
+        self._salida = salida or sys.stdout
+        self._publicados = 0
+        self._escritos = 0
+        self._detener = threading.Event()
+        self._hilo = threading.Thread(target=self._drenar_periodicamente, name="telemetria", daemon=True)
+        self._hilo.start()
+
+    def publicar(self, mensaje):
+        self._buffer.append(mensaje)
+        self._publicados += 1
+
+    @property
+    def descartados(self):
+        return max(0, self._publicados - self._escritos - len(self._buffer))
+
+    def _drenar(self):
+        lineas = []
+        try:
+            while True:
+                lineas.append(self._buffer.popleft())
+        except IndexError:
+            pass
+        if lineas:
+            self._escritos += len(lineas)
+            self._salida.write("\n".join(lineas) + "\n")
+            self._salida.flush()
+
+    def _drenar_periodicamente(self):
+        while not self._detener.wait(self._intervalo):
+            self._drenar()
+
+    def cerrar(self):
+        self._detener.set()
+        self._hilo.join()
+        self._drenar()
+        if self.descartados:
+            self._salida.write(f"⚠️ Telemetría: {self.descartados} mensajes descartados (buffer lleno)\n")
+            self._salida.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+
+class Ritmo:
+    # rapido:      sin pausas, la simulación corre tan rápido como SUMO lo permita.
+    # tiempo_real: un paso cada 'periodo' segundos, compensando la deriva: se apunta a
+    #              inicio + n*periodo, así el tiempo de cálculo de cada paso no se acumula.
+    def __init__(self, modo="rapido", periodo=0.1):
+        if modo not in RITMOS:
+            raise ValueError(f"Ritmo desconocido: {modo!r} (opciones: {', '.join(RITMOS)})")
+        self.modo = modo
+        self.periodo = periodo
+        self._inicio = None
+        self._pasos = 0
+
+    def esperar(self):
+        if self.modo == "rapido":
+            return
+        ahora = time.perf_counter()
+        if self._inicio is None:
+            self._inicio = ahora
+        self._pasos += 1
+        objetivo = self._inicio + self._pasos * self.periodo
+        restante = objetivo - ahora
+        if restante > 0:
+            time.sleep(restante)
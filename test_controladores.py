@@ -0,0 +1,145 @@
+import numpy as np
+import pytest
+
+from controladores import CONTROLADORES, GAP_OUT_MINIMO, TIEMPO_VERDE_FIJO
+from demanda import Demanda
+from escenario import ARCHIVO_RED, configurar_calles
+from motor_semaforos import MotorSemaforos
+from topologia import cargar_topologia
+from traci_falso import SumoFalso
+
+# --- PRUEBAS DE LOS CONTROLADORES SOBRE EL SUMO FALSO ---
+# Sin SUMO instalado: traci_falso.py reproduce colas, verdes y el programa de los semáforos de
+# forma determinista, así que cada prueba mira el comportamiento (cuánto dura un verde, qué
+# fase se elige) y no solo que el código corra.  python -m pytest -q
+
+PASOS = 1500
+
+
+@pytest.fixture(scope="module")
+def topologia():
+    return cargar_topologia(ARCHIVO_RED)
+
+
+def _escenario(topologia, modo, perfil=None, pasos=PASOS):
+    conn = SumoFalso(topologia)
+    demanda = None
+    if perfil is not None:
+        _, entradas, salidas, permitidos = configurar_calles(topologia)
+        demanda = Demanda(perfil, 42, entradas, salidas, pasos, permitidos)
+        demanda.preparar(conn)
+    return conn, demanda, MotorSemaforos(conn, topologia, modo)
+
+
+def _verdes(fases, es_verde):
+    # (inicio, largo) de cada verde completo en la secuencia de fases de un semáforo
+    tramos, inicio = [], None
+    for step in range(1, len(fases)):
+        if fases[step] != fases[step - 1]:
+            if inicio is not None:
+                tramos.append((inicio, step - inicio))
+            inicio = step if es_verde[fases[step]] else None
+    return tramos
+
+
+def _correr(conn, demanda, motor, pasos=PASOS):
+    # Bucle de escenario.py paso a paso; devuelve las fases de cada semáforo en cada paso
+    fases = np.empty((pasos, len(motor.semaforos)), dtype=np.int64)
+    for step in range(pasos):
+        conn.simulationStep()
+        if demanda is not None:
+            demanda.insertar(conn, step)
+        motor.paso()
+        fases[step] = motor.fase
+    return fases
+
+
+def test_fijo_mantiene_verde_de_45_segundos(topologia):
+    conn, demanda, motor = _escenario(topologia, "fijo", "hora_pico")
+    fases = _correr(conn, demanda, motor)
+    for i in range(len(motor.semaforos)):
+        largos = [largo for _, largo in _verdes(fases[:, i], motor.es_verde[i])]
+        assert largos
+        assert set(largos) == {TIEMPO_VERDE_FIJO * 10}
+
+
+def test_ia_corta_el_verde_si_sus_carriles_se_vacian(topologia):
+    # Demanda solo al principio: los verdes largos que se asignan por la cola se cortan al vaciarse
+    conn, demanda, motor = _escenario(topologia, "ia", "hora_pico")
+    asignados = {}
+    cortados = 0
+    for step in range(PASOS):
+        conn.simulationStep()
+        if step < 300:
+            demanda.insertar(conn, step)
+        antes = motor.fase.copy()
+        cambian = motor.paso()
+        for i in cambian.tolist():
+            if motor.en_verde(i):
+                asignados[i] = (step, int(motor.temporizador[i]))
+            elif i in asignados and motor.es_verde[i, antes[i]]:
+                inicio, verde = asignados.pop(i)
+                # Un verde que no pasa del mínimo nunca se corta
+                assert step - inicio <= verde
+                if step - inicio < verde:
+                    assert verde > GAP_OUT_MINIMO
+                    cortados += 1
+    assert cortados > 0
+
+
+def test_max_presion_elige_la_fase_cargada(topologia):
+    _, entradas, salidas, permitidos = configurar_calles(topologia)
+    elegidas = set()
+    for origen in entradas:
+        destino = sorted(permitidos[origen])[0]
+        conn = SumoFalso(topologia)
+        conn.route.add("ruta", [origen, destino])
+        motor = MotorSemaforos(conn, topologia, "max_presion")
+        for k in range(8):
+            conn.vehicle.add(f"auto_{k}", "ruta")
+        conn.simulationStep()
+
+        idx = np.arange(len(motor.semaforos))
+        objetivo = motor.controlador.fase_objetivo(motor, idx)
+        for i, tls in enumerate(motor.semaforos):
+            if origen in topologia.calles_controladas(tls):
+                verdes = topologia.carriles_verdes(tls, int(objetivo[i]))
+                assert origen in {topologia.calle(c) for c in verdes}
+                elegidas.add(int(objetivo[i]))
+    # No es siempre la fase en curso: cada acceso cargado lleva a la suya
+    assert len(elegidas) > 1
+
+
+@pytest.mark.parametrize("modo", sorted(CONTROLADORES))
+def test_fases_del_motor_y_de_sumo_coinciden(topologia, modo):
+    # El programa del semáforo no puede cambiar por su cuenta una fase que el motor mantiene
+    conn, demanda, motor = _escenario(topologia, modo, "pulsos")
+    for step in range(PASOS):
+        conn.simulationStep()
+        demanda.insertar(conn, step)
+        motor.paso()
+        assert motor.desfasados() == []
+
+
+@pytest.mark.parametrize("modo", sorted(CONTROLADORES))
+def test_avance_rapido_equivale_a_paso_a_paso(topologia, modo):
+    resultados = []
+    for saltar in (False, True):
+        conn, demanda, motor = _escenario(topologia, modo, "hora_pico")
+        cambios = []
+        step = 0
+        while step < PASOS:
+            if saltar:
+                libres = min(motor.pasos_libres(), demanda.proximo_paso(step) - step, PASOS - step)
+                if libres > 1:
+                    conn.simulationStep(step + libres)
+                    motor.avanzar(libres)
+                    step += libres
+                    continue
+            conn.simulationStep()
+            demanda.insertar(conn, step)
+            for i in motor.paso().tolist():
+                cambios.append((step, i, int(motor.fase[i]), int(motor.temporizador[i])))
+            step += 1
+        resultados.append((cambios, motor.temporizador.tolist(), conn.resumen()))
+    assert resultados[0] == resultados[1]
@@ -0,0 +1,30 @@
+import numpy as np
+import pytest
+
+from demanda import PERFILES_DEMANDA, Demanda
+from escenario import ARCHIVO_RED, configurar_calles
+from topologia import cargar_topologia
+
+# --- PRUEBAS DEL CALENDARIO DE DEMANDA ---
+
+
+@pytest.fixture(scope="module")
+def calles():
+    _, entradas, salidas, permitidos = configurar_calles(cargar_topologia(ARCHIVO_RED))
+    return entradas, salidas, permitidos
+
+
+@pytest.mark.parametrize("perfil", sorted(PERFILES_DEMANDA))
+def test_horizonte_corto_es_prefijo_del_largo(calles, perfil):
+    # Mismas inserciones (paso, vehículo, ruta) en los primeros pasos, sin importar el horizonte
+    largo = list(Demanda(perfil, 42, *calles[:2], 3000, calles[2]).vehiculos())
+    for pasos in (1, 450, 1200):
+        corto = list(Demanda(perfil, 42, *calles[:2], pasos, calles[2]).vehiculos())
+        assert corto
+        assert corto == [v for v in largo if v[0] < pasos]
+
+
+def test_semillas_distintas_dan_calendarios_distintos(calles):
+    a = Demanda("hora_pico", 1, *calles[:2], 600, calles[2])
+    b = Demanda("hora_pico", 2, *calles[:2], 600, calles[2])
+    assert not (len(a) == len(b) and np.array_equal(a.paso, b.paso) and np.array_equal(a.ruta, b.ruta))
@@ -0,0 +1,246 @@
+import os
+from xml.parsers import expat
+
+import numpy as np
+
+from archivos import escribir_atomico
+from cache_resultados import huella
+
+# --- ÍNDICE DE TOPOLOGÍA DE LA RED ---
+# Se construye una sola vez leyendo el .net.xml (carriles, calles, nodos, conexiones y
+# programas de semáforo) y se guarda en disco con el hash del archivo como clave: los
+# arranques siguientes cargan arreglos ya resueltos en lugar de deducir la estructura
+# de la intersección a partir de los nombres ("E10_0".split('_'), "-E10", ...).
+
+DIRECTORIO_CACHE = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "topologia")
+# Se incrementa si cambia el formato del .npz (invalida las cachés anteriores)
+VERSION = 2
+TAM_LECTURA = 1 << 20
+
+# Movimientos que no cuentan como destino válido de la demanda (vuelta en U)
+DIRECCION_RETORNO = "t"
+
+_memoria = {}
+
+
+# --- LECTURA DEL .net.xml ---
+def _leer_red(ruta):
+    calles, desde, hacia = [], [], []
+    carriles, calle_de_carril = [], []
+    nodos = []
+    conexiones = []
+    programas = {}
+    duraciones = {}
+    actual = {"calle": None, "semaforo": None}
+
+    def inicio_elemento(nombre, a):
+        if nombre == "edge":
+            # Solo calles normales (sin internas, cruces peatonales, etc.)
+            if a.get("function", "normal") == "normal":
+                actual["calle"] = len(calles)
+                calles.append(a["id"])
+                desde.append(a["from"])
+                hacia.append(a["to"])
+        elif nombre == "lane":
+            if actual["calle"] is not None:
+                carriles.append(a["id"])
+                calle_de_carril.append(actual["calle"])
+        elif nombre == "junction":
+            if a.get("type") != "internal":
+                nodos.append(a["id"])
+        elif nombre == "connection":
+            conexiones.append((a["from"], a["fromLane"], a["to"], a["toLane"],
+                               a.get("tl", ""), int(a.get("linkIndex", -1)), a.get("dir", "")))
+        elif nombre == "tlLogic":
+            # Si hay varios programas para un semáforo se usa el primero (como el motor)
+            if a["id"] not in programas:
+                programas[a["id"]] = []
+                duraciones[a["id"]] = []
+                actual["semaforo"] = a["id"]
+        elif nombre == "phase":
+            if actual["semaforo"] is not None:
+                programas[actual["semaforo"]].append(a["state"])
+                duraciones[actual["semaforo"]].append(float(a.get("duration", 0)))
+
+    def fin_elemento(nombre):
+        if nombre == "edge":
+            actual["calle"] = None
+        elif nombre == "tlLogic":
+            actual["semaforo"] = None
+
+    parser = expat.ParserCreate()
+    parser.buffer_text = True
+    parser.StartElementHandler = inicio_elemento
+    parser.EndElementHandler = fin_elemento
+    with open(ruta, "rb") as f:
+        for trozo in iter(lambda: f.read(TAM_LECTURA), b""):
+            parser.Parse(trozo, False)
+    parser.Parse(b"", True)
+    return calles, desde, hacia, carriles, calle_de_carril, nodos, conexiones, programas, duraciones
+
+
+def construir_topologia(ruta):
+    calles, desde, hacia, carriles, calle_de_carril, nodos, conexiones, programas, duraciones = _leer_red(ruta)
+    indice_nodo = {n: i for i, n in enumerate(nodos)}
+    indice_carril = {c: i for i, c in enumerate(carriles)}
+    semaforos = sorted(programas)
+    indice_semaforo = {t: i for i, t in enumerate(semaforos)}
+
+    # Movimientos carril -> carril (las conexiones que salen de calles internas se descartan)
+    movimientos = [
+        (indice_carril[f"{c_desde}_{l_desde}"], indice_carril[f"{c_hacia}_{l_hacia}"],
+         indice_semaforo.get(tls, -1), enlace, direccion)
+        for c_desde, l_desde, c_hacia, l_hacia, tls, enlace, direccion in conexiones
+        if f"{c_desde}_{l_desde}" in indice_carril and f"{c_hacia}_{l_hacia}" in indice_carril
+    ]
+    mov_desde = np.array([m[0] for m in movimientos], dtype=np.int64)
+    mov_hacia = np.array([m[1] for m in movimientos], dtype=np.int64)
+    mov_semaforo = np.array([m[2] for m in movimientos], dtype=np.int64)
+    mov_enlace = np.array([m[3] for m in movimientos], dtype=np.int64)
+    mov_direccion = np.array([m[4] for m in movimientos], dtype=str)
+
+    # Fases de cada semáforo, planas y con desplazamientos por semáforo
+    estados = [s for t in semaforos for s in programas[t]]
+    # Duración de cada fase en el programa del .net.xml (s), alineada con estados
+    duraciones_fase = [d for t in semaforos for d in duraciones[t]]
+    num_fases = np.array([len(programas[t]) for t in semaforos], dtype=np.int64)
+    max_fases = max(num_fases.max(initial=0), 1)
+    fase_verde = np.zeros((len(semaforos), max_fases), dtype=bool)
+
+    # Carriles controlados por cada semáforo (contiguos por semáforo y por calle) y en qué fases tienen verde
+    controlados, inicio_controlados = [], [0]
+    verde_carril = []
+    for i, tls in enumerate(semaforos):
+        for f, estado in enumerate(programas[tls]):
+            fase_verde[i, f] = ("G" in estado or "g" in estado) and "y" not in estado
+
+        propios = np.flatnonzero((mov_semaforo == i) & (mov_enlace >= 0))
+        carriles_tls = np.unique(mov_desde[propios])
+        if programas[tls] and propios.size:
+            # (fases × enlaces): verde si el enlace tiene G/g en esa fase
+            matriz = np.array([list(s) for s in programas[tls]])
+            verde_enlace = np.isin(matriz, ["G", "g"])
+            posicion = np.searchsorted(carriles_tls, mov_desde[propios])
+            verde = np.zeros((len(carriles_tls), max_fases), dtype=bool)
+            enlaces = mov_enlace[propios]
+            validos = enlaces < matriz.shape[1]
+            # Un carril tiene verde si alguno de sus enlaces lo tiene
+            np.logical_or.at(verde[:, :len(programas[tls])], posicion[validos], verde_enlace[:, enlaces[validos]].T)
+        else:
+            verde = np.zeros((len(carriles_tls), max_fases), dtype=bool)
+        controlados.append(carriles_tls)
+        verde_carril.append(verde)
+        inicio_controlados.append(inicio_controlados[-1] + len(carriles_tls))
+
+    return {
+        "calles": np.array(calles, dtype=str),
+        "calle_desde": np.array([indice_nodo[n] for n in desde], dtype=np.int64),
+        "calle_hacia": np.array([indice_nodo[n] for n in hacia], dtype=np.int64),
+        "carriles": np.array(carriles, dtype=str),
+        "calle_de_carril": np.array(calle_de_carril, dtype=np.int64),
+        "nodos": np.array(nodos, dtype=str),
+        "mov_desde": mov_desde,
+        "mov_hacia": mov_hacia,
+        "mov_semaforo": mov_semaforo,
+        "mov_enlace": mov_enlace,
+        "mov_direccion": mov_direccion,
+        "semaforos": np.array(semaforos, dtype=str),
+        "estados": np.array(estados, dtype=str),
+        "duraciones": np.array(duraciones_fase, dtype=np.float64),
+        "num_fases": num_fases,
+        "fase_verde": fase_verde,
+        "controlados": np.concatenate(controlados) if controlados else np.zeros(0, dtype=np.int64),
+        "inicio_controlados": np.array(inicio_controlados, dtype=np.int64),
+        "verde_carril": np.concatenate(verde_carril) if verde_carril else np.zeros((0, max_fases), dtype=bool),
+    }
+
+
+# --- ACCESO ---
+class Topologia:
+    def __init__(self, datos):
+        self.datos = datos
+        self.calles = datos["calles"].tolist()
+        self.carriles = datos["carriles"].tolist()
+        self.nodos = datos["nodos"].tolist()
+        self.semaforos = datos["semaforos"].tolist()
+        self.calle_de_carril = datos["calle_de_carril"]
+        self.num_fases = datos["num_fases"]
+        self.fase_verde = datos["fase_verde"]
+        self.controlados = datos["controlados"]
+        self.inicio_controlados = datos["inicio_controlados"]
+        self.verde_carril = datos["verde_carril"]
+
+        self.indice_calle = {c: i for i, c in enumerate(self.calles)}
+        self.indice_carril = {c: i for i, c in enumerate(self.carriles)}
+        self.indice_nodo = {n: i for i, n in enumerate(self.nodos)}
+        self.indice_semaforo = {t: i for i, t in enumerate(self.semaforos)}
+        # Calle inversa: la que une los mismos nodos en sentido contrario
+        extremos = {}
+        for i, par in enumerate(zip(datos["calle_desde"].tolist(), datos["calle_hacia"].tolist())):
+            extremos.setdefault(par, i)
+        self._inversa = [extremos.get((b, a)) for a, b in
+                         zip(datos["calle_desde"].tolist(), datos["calle_hacia"].tolist())]
+
+    def calle(self, carril):
+        return self.calles[self.calle_de_carril[self.indice_carril[carril]]]
+
+    def inversa(self, calle):
+        i = self._inversa[self.indice_calle[calle]]
+        return None if i is None else self.calles[i]
+
+    def entrantes(self, nodo):
+        i = self.indice_nodo[nodo]
+        return [self.calles[c] for c in np.flatnonzero(self.datos["calle_hacia"] == i)]
+
+    def salientes(self, nodo):
+        i = self.indice_nodo[nodo]
+        return [self.calles[c] for c in np.flatnonzero(self.datos["calle_desde"] == i)]
+
+    def carriles_controlados(self, tls):
+        i = self.indice_semaforo[tls]
+        return self.controlados[self.inicio_controlados[i]:self.inicio_controlados[i + 1]]
+
+    def carriles_verdes(self, tls, fase):
+        i = self.indice_semaforo[tls]
+        inicio, fin = self.inicio_controlados[i], self.inicio_controlados[i + 1]
+        return [self.carriles[c] for c in self.controlados[inicio:fin][self.verde_carril[inicio:fin, fase]]]
+
+    def calles_controladas(self, tls):
+        return sorted({self.calles[c] for c in self.calle_de_carril[self.carriles_controlados(tls)]})
+
+    def movimientos(self, tls=None):
+        # (calle origen, calle destino, dirección) de los giros válidos, sin repetir por carril
+        d = self.datos
+        filtro = np.ones(len(d["mov_desde"]), dtype=bool) if tls is None else d["mov_semaforo"] == self.indice_semaforo[tls]
+        origen = self.calle_de_carril[d["mov_desde"][filtro]].tolist()
+        destino = self.calle_de_carril[d["mov_hacia"][filtro]].tolist()
+        vistos = dict.fromkeys(zip(origen, destino, d["mov_direccion"][filtro].tolist()))
+        return [(self.calles[o], self.calles[t], direccion) for o, t, direccion in vistos]
+
+    def destinos_validos(self, tls):
+        # origen -> destinos alcanzables en la intersección sin vuelta en U
+        destinos = {}
+        for origen, destino, direccion in self.movimientos(tls):
+            if direccion != DIRECCION_RETORNO:
+                destinos.setdefault(origen, set()).add(destino)
+        return destinos
+
+
+# --- CACHÉ EN DISCO ---
+def _guardar(datos, ruta):
+    escribir_atomico(ruta, lambda f: np.savez(f, **datos), "wb")
+
+
+def cargar_topologia(red, directorio=DIRECTORIO_CACHE):
+    clave = f"{huella(red)}-v{VERSION}"
+    if clave in _memoria:
+        return _memoria[clave]
+    ruta = os.path.join(directorio, f"{clave}.npz")
+    if os.path.exists(ruta):
+        with np.load(ruta, allow_pickle=False) as archivo:
+            datos = {nombre: archivo[nombre] for nombre in archivo.files}
+    else:
+        datos = construir_topologia(red)
+        _guardar(datos, ruta)
+    _memoria[clave] = topologia = Topologia(datos)
+    return topologia
@@ -0,0 +1,333 @@
+import collections
+
+import numpy as np
+import traci
+import traci.constants as tc
+
+# --- SUMO FALSO EN MEMORIA (MISMA SUPERFICIE QUE "conn") ---
+# Modelo de colas determinista sobre el índice de topología de la red, para correr y medir
+# controladores sin SUMO: expone lo que usan main.py, escenario.py, demanda.py y el motor
+# (edge, lane, trafficlight, route, vehicle, simulation, simulationStep, close).
+# - Un vehículo entra por el carril de su calle de origen que tiene giro hacia el destino,
+#   tarda RECORRIDO pasos en llegar a la línea de detención y ahí queda detenido (en cola).
+# - La cabeza de la cola cruza si su movimiento tiene verde (G/g), uno cada SEPARACION pasos
+#   por carril; recorre la calle de destino y sale de la red.
+# - Los semáforos siguen su programa como en SUMO: cada fase dura lo que dice el .net.xml salvo
+#   que se cambie con setPhase (vuelve a la duración del programa) o setPhaseDuration.
+# - Las suscripciones devuelven la foto tomada en el último simulationStep, como en TraCI.
+# Sin aleatoriedad: la misma secuencia de llamadas produce siempre el mismo resultado.
+
+RECORRIDO = 10
+SEPARACION = 2
+
+VARIABLES = (tc.LAST_STEP_VEHICLE_HALTING_NUMBER, tc.LAST_STEP_VEHICLE_NUMBER)
+
+
+def _error(mensaje):
+    return traci.TraCIException(mensaje)
+
+
+class _Dominio:
+    def __init__(self, sumo, ids):
+        self._sumo = sumo
+        self._ids = list(ids)
+        self._indice = {i: k for k, i in enumerate(self._ids)}
+        self._suscripciones = {}
+
+    def _posicion(self, objeto_id):
+        try:
+            return self._indice[objeto_id]
+        except KeyError:
+            raise _error(f"{type(self).__name__} desconocido: {objeto_id!r}") from None
+
+    def getIDList(self):
+        return tuple(self._ids)
+
+    def getIDCount(self):
+        return len(self._ids)
+
+    def subscribe(self, objeto_id, varIDs=VARIABLES, begin=None, end=None, parameters=None):
+        self._posicion(objeto_id)
+        self._suscripciones[objeto_id] = tuple(varIDs)
+
+    def getSubscriptionResults(self, objeto_id):
+        variables = self._suscripciones.get(objeto_id, ())
+        k = self._indice[objeto_id] if variables else None
+        return {v: self._foto(v, k) for v in variables}
+
+    def getAllSubscriptionResults(self):
+        return {i: self.getSubscriptionResults(i) for i in self._suscripciones}
+
+
+class _Carriles(_Dominio):
+    def _foto(self, variable, k):
+        return int(self._sumo._foto[variable][k])
+
+    def getLastStepVehicleNumber(self, carril):
+        return self._foto(tc.LAST_STEP_VEHICLE_NUMBER, self._posicion(carril))
+
+    def getLastStepHaltingNumber(self, carril):
+        return self._foto(tc.LAST_STEP_VEHICLE_HALTING_NUMBER, self._posicion(carril))
+
+
+class _Calles(_Dominio):
+    def _por_calle(self, por_carril):
+        return np.bincount(self._sumo._calle_de_carril, weights=por_carril, minlength=len(self._ids))
+
+    def _foto(self, variable, k):
+        # Suma de los carriles de la calle (se agrega una vez por paso)
+        foto = self._sumo._foto_calles
+        if variable not in foto:
+            foto[variable] = self._por_calle(self._sumo._foto[variable]).astype(np.int64)
+        return int(foto[variable][k])
+
+    def getLastStepVehicleNumber(self, calle):
+        return self._foto(tc.LAST_STEP_VEHICLE_NUMBER, self._posicion(calle))
+
+    def getLastStepHaltingNumber(self, calle):
+        return self._foto(tc.LAST_STEP_VEHICLE_HALTING_NUMBER, self._posicion(calle))
+
+
+class _Semaforos(_Dominio):
+    def _foto(self, variable, k):
+        if variable != tc.TL_CURRENT_PHASE:
+            raise _error(f"Variable de semáforo no soportada: {variable:#x}")
+        return int(self._sumo._foto_fases[k])
+
+    def getPhase(self, tls):
+        return int(self._sumo._fase[self._posicion(tls)])
+
+    def setPhase(self, tls, fase):
+        k = self._posicion(tls)
+        if not 0 <= fase < self._sumo._num_fases[k]:
+            raise _error(f"Fase {fase} fuera de rango para {tls!r}")
+        self._sumo._fase[k] = fase
+        self._sumo._restante[k] = self._sumo._duracion_programa(k)
+
+    def setPhaseDuration(self, tls, duracion):
+        self._sumo._restante[self._posicion(tls)] = duracion
+
+    def getRedYellowGreenState(self, tls):
+        k = self._posicion(tls)
+        return self._sumo._estados[self._sumo._inicio_fases[k] + self._sumo._fase[k]]
+
+
+class _Rutas:
+    def __init__(self, sumo):
+        self._sumo = sumo
+        self._rutas = {}
+
+    def getIDList(self):
+        return tuple(self._rutas)
+
+    def add(self, ruta_id, edges):
+        if ruta_id in self._rutas:
+            raise _error(f"La ruta {ruta_id!r} ya existe")
+        self._rutas[ruta_id] = list(edges)
+
+
+class _Vehiculos:
+    def __init__(self, sumo):
+        self._sumo = sumo
+
+    def getIDList(self):
+        return tuple(self._sumo._activos)
+
+    def getIDCount(self):
+        return len(self._sumo._activos)
+
+    def add(self, vehID, routeID, typeID="DEFAULT_VEHTYPE", depart="now", **opciones):
+        self._sumo._insertar(vehID, routeID)
+
+
+class _Simulacion:
+    def __init__(self, sumo):
+        self._sumo = sumo
+        self._suscripciones = ()
+
+    def subscribe(self, varIDs=(tc.VAR_ARRIVED_VEHICLES_NUMBER,), begin=None, end=None, parameters=None):
+        self._suscripciones = tuple(varIDs)
+
+    def getSubscriptionResults(self, objectID=""):
+        valores = {tc.VAR_ARRIVED_VEHICLES_NUMBER: self._sumo._foto_llegados,
+                   tc.VAR_DEPARTED_VEHICLES_NUMBER: self._sumo._foto_salidos,
+                   tc.VAR_TIME: float(self._sumo._foto_tiempo)}
+        return {v: valores[v] for v in self._suscripciones}
+
+    def getTime(self):
+        return float(self._sumo.tiempo)
+
+    def getMinExpectedNumber(self):
+        return len(self._sumo._activos)
+
+    def getArrivedNumber(self):
+        return self._sumo._llegados_paso
+
+    def getDepartedNumber(self):
+        return self._sumo._salidos_paso
+
+    def saveState(self, archivo):
+        raise _error("El SUMO falso no guarda estados")
+
+    def loadState(self, archivo):
+        raise _error("El SUMO falso no carga estados")
+
+
+class SumoFalso:
+    def __init__(self, topologia, recorrido=RECORRIDO, separacion=SEPARACION):
+        d = topologia.datos
+        self.topologia = topologia
+        self.recorrido = recorrido
+        self.separacion = separacion
+        self.tiempo = 0
+        n_carriles = len(topologia.carriles)
+        self._calle_de_carril = topologia.calle_de_carril
+
+        # Movimientos por (calle origen, calle destino), con su semáforo y enlace
+        self._mov_desde, self._mov_hacia = d["mov_desde"], d["mov_hacia"]
+        self._mov_semaforo, self._mov_enlace = d["mov_semaforo"], d["mov_enlace"]
+        self._giros = collections.defaultdict(list)
+        origen = topologia.calle_de_carril[self._mov_desde].tolist()
+        destino = topologia.calle_de_carril[self._mov_hacia].tolist()
+        for m, par in enumerate(zip(origen, destino)):
+            self._giros[par].append(m)
+        self._turno = collections.Counter()
+
+        # Semáforos: fase actual, estados y duración de cada fase, y lo que le queda a la actual
+        self._num_fases = topologia.num_fases
+        self._inicio_fases = np.concatenate(([0], np.cumsum(self._num_fases))).tolist()
+        self._estados = d["estados"].tolist()
+        self._duraciones = d["duraciones"].tolist()
+        self._fase = np.zeros(len(topologia.semaforos), dtype=np.int64)
+        self._restante = np.array([self._duracion_programa(k) for k in range(len(topologia.semaforos))])
+
+        # Colas por carril: (vehículo, movimiento, paso en que llega a la línea de detención)
+        self._colas = [collections.deque() for _ in range(n_carriles)]
+        # Vehículos que recorren la calle de destino: (vehículo, paso en que sale, carril, espera en cola)
+        self._saliendo = collections.deque()
+        self._con_cola = set()
+        self._ultima_descarga = np.full(n_carriles, -separacion, dtype=np.int64)
+        self._vehiculos = np.zeros(n_carriles, dtype=np.int64)
+        self._detenidos = np.zeros(n_carriles, dtype=np.int64)
+        self._activos = {}
+        self._llegados_paso = self._salidos_paso = 0
+        self._pendientes = []
+
+        # Resumen de viajes terminados (para comparar controladores sin tripinfo)
+        self.viajes = 0
+        self.espera_total = 0
+
+        self.edge = _Calles(self, topologia.calles)
+        self.lane = _Carriles(self, topologia.carriles)
+        self.trafficlight = _Semaforos(self, topologia.semaforos)
+        self.route = _Rutas(self)
+        self.vehicle = _Vehiculos(self)
+        self.simulation = _Simulacion(self)
+        self._tomar_foto()
+
+    def _insertar(self, vehiculo, ruta_id):
+        if vehiculo in self._activos:
+            raise _error(f"El vehículo {vehiculo!r} ya existe")
+        ruta = self.route._rutas.get(ruta_id)
+        if ruta is None:
+            raise _error(f"Ruta desconocida: {ruta_id!r}")
+        indice = self.edge._indice
+        if len(ruta) != 2 or ruta[0] not in indice or ruta[1] not in indice:
+            raise _error(f"Ruta no soportada por el SUMO falso: {ruta!r} (origen y destino)")
+        par = (indice[ruta[0]], indice[ruta[1]])
+        giros = self._giros.get(par)
+        if not giros:
+            raise _error(f"La ruta {ruta_id!r} no está conectada")
+        # Reparto determinista entre los carriles con giro al destino
+        m = giros[self._turno[par] % len(giros)]
+        self._turno[par] += 1
+        self._activos[vehiculo] = ruta_id
+        # Como en SUMO, el vehículo entra a la red en el próximo paso
+        self._pendientes.append((vehiculo, m))
+
+    def _duracion_programa(self, k):
+        if not self._num_fases[k]:
+            return np.inf
+        return self._duraciones[self._inicio_fases[k] + self._fase[k]]
+
+    def _verde(self, m):
+        t = self._mov_semaforo[m]
+        if t < 0:
+            return True
+        estado = self._estados[self._inicio_fases[t] + self._fase[t]]
+        enlace = self._mov_enlace[m]
+        return 0 <= enlace < len(estado) and estado[enlace] in "Gg"
+
+    def _avanzar(self):
+        self.tiempo += 1
+        t = self.tiempo
+        self._llegados_paso = self._salidos_paso = 0
+
+        # Programa de los semáforos: al vencer una fase se pasa a la siguiente
+        self._restante -= 1
+        for k in np.flatnonzero(self._restante <= 0).tolist():
+            self._fase[k] = (self._fase[k] + 1) % self._num_fases[k]
+            self._restante[k] = self._duracion_programa(k)
+
+        for vehiculo, m in self._pendientes:
+            c = self._mov_desde[m]
+            self._colas[c].append((vehiculo, m, t + self.recorrido))
+            self._vehiculos[c] += 1
+            self._con_cola.add(c)
+        self._salidos_paso = len(self._pendientes)
+        self._pendientes = []
+
+        # Salen de la red los que terminaron de recorrer la calle de destino
+        saliendo = self._saliendo
+        while saliendo and saliendo[0][1] <= t:
+            vehiculo, _, carril, espera = saliendo.popleft()
+            self._vehiculos[carril] -= 1
+            del self._activos[vehiculo]
+            self._llegados_paso += 1
+            self.viajes += 1
+            self.espera_total += espera
+
+        # Descarga: la cabeza de cada cola cruza si tiene verde y pasó la separación mínima
+        for c in sorted(self._con_cola):
+            cola = self._colas[c]
+            vehiculo, m, llegada = cola[0]
+            if llegada <= t and t - self._ultima_descarga[c] >= self.separacion and self._verde(m):
+                cola.popleft()
+                self._ultima_descarga[c] = t
+                self._vehiculos[c] -= 1
+                destino = self._mov_hacia[m]
+                self._vehiculos[destino] += 1
+                saliendo.append((vehiculo, t + self.recorrido, destino, t - llegada))
+            # Detenidos: los que ya llegaron a la línea (las llegadas son crecientes en la cola)
+            detenidos = len(cola)
+            for _, _, llegada in reversed(cola):
+                if llegada <= t:
+                    break
+                detenidos -= 1
+            self._detenidos[c] = detenidos
+            if not cola:
+                self._con_cola.discard(c)
+
+    def _tomar_foto(self):
+        self._foto = {
+            tc.LAST_STEP_VEHICLE_NUMBER: self._vehiculos.copy(),
+            tc.LAST_STEP_VEHICLE_HALTING_NUMBER: self._detenidos.copy(),
+        }
+        self._foto_calles = {}
+        self._foto_fases = self._fase.copy()
+        self._foto_llegados, self._foto_salidos = self._llegados_paso, self._salidos_paso
+        self._foto_tiempo = self.tiempo
+
+    def simulationStep(self, step=0.0):
+        # step > 0: avanza hasta ese tiempo (como TraCI); 0: un solo paso
+        self._avanzar()
+        while self.tiempo < step:
+            self._avanzar()
+        self._tomar_foto()
+
+    def close(self):
+        pass
+
+    def resumen(self):
+        return {"viajes": self.viajes, "espera_media": self.espera_total / self.viajes if self.viajes else 0.0,
+                "en_red": len(self._activos)}
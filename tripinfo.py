@@ -0,0 +1,103 @@
+import os
+from operator import itemgetter
+from xml.parsers import expat
+
+import numpy as np
+import pandas as pd
+
+# --- LECTOR INCREMENTAL DE TRIPINFO ---
+# Lee el XML por trozos con expat (no se construye ningún árbol), así la memoria no
+# crece con el tamaño del archivo. Los atributos numéricos se convierten a arreglos
+# tipados (columnas) y se entregan por bloques de ~tam_bloque viajes.
+
+ATRIBUTOS_NUMERICOS = (
+    "depart", "departPos", "departSpeed", "departDelay",
+    "arrival", "arrivalPos", "arrivalSpeed",
+    "duration", "routeLength", "waitingTime", "waitingCount",
+    "stopTime", "timeLoss", "rerouteNo", "speedFactor",
+)
+ATRIBUTOS_TEXTO = ("id", "vType")
+
+TAM_BLOQUE = 65536
+TAM_LECTURA = 1 << 20
+
+
+# --- LECTURA POR BLOQUES (TAMBIÉN LA USA meandata.py) ---
+def convertir_columnas(filas_texto, filas_numericas, texto, numericas):
+    # Filas acumuladas -> {columna: arreglo}: texto como object, numéricas como float64
+    matriz_texto = np.array(filas_texto, dtype=object).reshape(-1, len(texto))
+    # np.array sobre listas de strings parsea directamente a float64
+    try:
+        matriz = np.array(filas_numericas, dtype=np.float64)
+    except ValueError:
+        # Algún atributo numérico vacío ("") -> NaN
+        matriz = np.array([[v or "nan" for v in fila] for fila in filas_numericas], dtype=np.float64)
+    matriz = matriz.reshape(-1, len(numericas))
+    bloque = {a: matriz_texto[:, i] for i, a in enumerate(texto)}
+    bloque.update((a, matriz[:, i]) for i, a in enumerate(numericas))
+    return bloque
+
+
+def abrir_fuente(fuente):
+    # fuente: ruta o archivo abierto (p. ej. el UploadedFile de Streamlit); devuelve (archivo, propio)
+    if isinstance(fuente, (str, os.PathLike)):
+        return open(fuente, "rb"), True
+    return fuente, False
+
+
+def iterar_columnas(fuente, crear_manejador, texto, numericas, tam_bloque=TAM_BLOQUE, tam_lectura=TAM_LECTURA):
+    # crear_manejador(filas_texto, filas_numericas) devuelve el StartElementHandler de expat, que agrega
+    # una tupla por fila a cada lista; texto y numericas nombran sus columnas. Los nombres se leen al
+    # cerrar cada bloque: un archivo que los conoce recién en la primera fila puede completarlos al leer
+    filas_texto = []
+    filas_numericas = []
+    parser = expat.ParserCreate()
+    parser.StartElementHandler = crear_manejador(filas_texto, filas_numericas)
+
+    archivo, propio = abrir_fuente(fuente)
+    try:
+        while True:
+            datos = archivo.read(tam_lectura)
+            parser.Parse(datos, not datos)
+            if len(filas_texto) >= tam_bloque or (not datos and filas_texto):
+                yield convertir_columnas(filas_texto, filas_numericas, texto, numericas)
+                filas_texto.clear()
+                filas_numericas.clear()
+            if not datos:
+                break
+    finally:
+        if propio:
+            archivo.close()
+
+
+# --- TRIPINFO ---
+def _manejador(filas_texto, filas_numericas):
+    # itemgetter extrae todos los atributos de una fila en una sola llamada
+    extraer_texto = itemgetter(*ATRIBUTOS_TEXTO)
+    extraer_numericas = itemgetter(*ATRIBUTOS_NUMERICOS)
+
+    def inicio_elemento(nombre, atributos):
+        if nombre != "tripinfo":
+            return
+        try:
+            filas_texto.append(extraer_texto(atributos))
+            filas_numericas.append(extraer_numericas(atributos))
+        except KeyError:
+            # Falta algún atributo (versiones viejas de SUMO): None / NaN
+            if len(filas_texto) > len(filas_numericas):
+                filas_texto.pop()
+            filas_texto.append(tuple(atributos.get(a) for a in ATRIBUTOS_TEXTO))
+            filas_numericas.append(tuple(atributos.get(a) or "nan" for a in ATRIBUTOS_NUMERICOS))
+
+    return inicio_elemento
+
+
+def iterar_bloques(fuente, tam_bloque=TAM_BLOQUE, tam_lectura=TAM_LECTURA):
+    return iterar_columnas(fuente, _manejador, ATRIBUTOS_TEXTO, ATRIBUTOS_NUMERICOS, tam_bloque, tam_lectura)
+
+
+def leer_tripinfo(fuente, tam_bloque=TAM_BLOQUE):
+    bloques = [pd.DataFrame(b) for b in iterar_bloques(fuente, tam_bloque)]
+    if not bloques:
+        return pd.DataFrame(columns=list(ATRIBUTOS_TEXTO + ATRIBUTOS_NUMERICOS))
+    return pd.concat(bloques, ignore_index=True)